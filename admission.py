@@ -0,0 +1,102 @@
+import contextlib
+import math
+import threading
+import time
+from telemetry import ADMISSION_ACTIVE, ADMISSION_QUEUED, ADMISSION_REJECTED, stage
+
+
+class Overloaded(Exception):
+    """Raised when a limiter turns a caller away; retry_after is in seconds."""
+
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class AdmissionLimiter:
+    """
+    Bounds how many callers run a block at once.
+
+    Up to `max_concurrent` callers run; up to `max_queue` more wait, each for
+    at most `max_wait_seconds`. Anyone beyond that, or who waits too long, gets
+    Overloaded straight away instead of tying up a thread, with a Retry-After
+    estimate based on how long admitted callers have recently held a slot.
+    """
+
+    def __init__(self, name, max_concurrent, max_queue, max_wait_seconds):
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.max_wait_seconds = max_wait_seconds
+        self.active = 0
+        self.queued = 0
+        self.admitted = 0
+        self.rejected = 0
+        self._avg_hold_seconds = max_wait_seconds
+        self._cond = threading.Condition()
+
+    @contextlib.contextmanager
+    def admit(self):
+        with self._cond:
+            if self.active >= self.max_concurrent:
+                if self.queued >= self.max_queue:
+                    self._reject("queue_full")
+                with stage("admission_wait"):
+                    self._wait_for_slot()
+            self.active += 1
+            self.admitted += 1
+            self._publish()
+
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            held = time.monotonic() - start
+            with self._cond:
+                self.active -= 1
+                self._avg_hold_seconds += 0.2 * (held - self._avg_hold_seconds)
+                self._publish()
+                self._cond.notify()
+
+    def retry_after(self):
+        """Seconds until a slot is likely to free up for a new caller."""
+        waiting = self.queued + 1
+        slots = max(1, self.max_concurrent)
+        return max(1, math.ceil(self._avg_hold_seconds * waiting / slots))
+
+    def stats(self):
+        return {
+            "active": self.active,
+            "queued": self.queued,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+        }
+
+    def _wait_for_slot(self):
+        # Called with the condition held
+        deadline = time.monotonic() + self.max_wait_seconds
+        self.queued += 1
+        self._publish()
+        try:
+            while self.active >= self.max_concurrent:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._reject("timeout")
+                self._cond.wait(remaining)
+        finally:
+            self.queued -= 1
+            self._publish()
+
+    def _reject(self, reason):
+        self.rejected += 1
+        ADMISSION_REJECTED.inc(limiter=self.name, reason=reason)
+        raise Overloaded(
+            "The server is busy answering other questions. Please try again shortly.",
+            self.retry_after(),
+        )
+
+    def _publish(self):
+        ADMISSION_ACTIVE.set(self.active, limiter=self.name)
+        ADMISSION_QUEUED.set(self.queued, limiter=self.name)
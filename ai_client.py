@@ -1,17 +1,26 @@
 import logging
 import re
-from openai import OpenAI
 from config import config
+from telemetry import LLM_RETRIES, UPSTREAM_ERRORS, stage
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s",
-)
+
+def make_client(api_key=None, base_url=None):
+    """
+    Creates an OpenAI client, importing the SDK on first use so that
+    importing this module stays cheap on cold starts.
+    """
+    from openai import OpenAI
+
+    return OpenAI(api_key=api_key, base_url=base_url)
 
 
 def get_sql_from_llm(
-    question, schema_context, limit, validation_callback=None, max_retries=5
+    question,
+    schema_context,
+    limit,
+    validation_callback=None,
+    max_retries=5,
+    client=None,
 ):
     """
     Generates SQL from natural language.
@@ -24,12 +33,15 @@ def get_sql_from_llm(
                              If provided, it will be used to VALIDATE the SQL via EXPLAIN.
                              If it returns (False, error), the LLM is prompted to retry.
         max_retries: Number of retry attempts.
+        client: Optional client to use instead of a new OpenAI client, e.g. a
+                `llm_cassette.Cassette` client for offline replay.
     """
-    api_key = config.OPENAI_API_KEY
-    if not api_key:
-        raise ValueError("OPENAI_API_KEY not found in environment variables.")
-    base_url = config.OPENAI_BASE_URL
-    client = OpenAI(api_key=api_key, base_url=base_url)
+    if client is None:
+        api_key = config.OPENAI_API_KEY
+        if not api_key:
+            raise ValueError("OPENAI_API_KEY not found in environment variables.")
+        base_url = config.OPENAI_BASE_URL
+        client = make_client(api_key=api_key, base_url=base_url)
 
     # Allow overriding max_retries via env var
     max_retries = config.SQL_MAX_RETRIES
@@ -43,7 +55,7 @@ def get_sql_from_llm(
     Rules:
     1. Return ONLY the SQL query. No markdown, no explanations.
     2. Use the full table names provided in the context (e.g., charts.uk_singles_prestreaming_raw).
-    3. Be careful with string matching - use ILIKE for case-insensitive searches and remember all text data is UPPERCASE.
+    3. Be careful with string matching - remember all text data is UPPERCASE. If the context provides a name lookup, filter on the exact names it returns; otherwise use ILIKE for case-insensitive searches.
     4. Limit results to {limit} unless specified otherwise by the user.
     5. Always select `artist`, `title`, and context columns if available (e.g., `peak_position`, `weeks_in_chart`, `weeks_at_top` for rankings; `position`, `from_date` for raw charts).
     6. DATE LOGIC: Charts are weekly. If the user asks about a specific date, find the week containing it:
@@ -59,52 +71,19 @@ def get_sql_from_llm(
     last_error = None
 
     for attempt in range(max_retries):
-        response = client.chat.completions.create(
-            model=config.OPENAI_MODEL,
-            messages=messages,
-            temperature=0,
-        )
-
-        raw_response = response.choices[0].message.content.strip()
-
-        # Improved SQL Extraction
-        # 1. Try to find content within <sql> tags (common in reasoning models)
-        sql_match = re.search(
-            r"<sql>(.*?)</sql>", raw_response, re.DOTALL | re.IGNORECASE
-        )
-        if sql_match:
-            sql_query = sql_match.group(1).strip()
-        else:
-            # 2. Try to find content within markdown code blocks
-            # Matches ``` followed by optional lang, optional newline/space, then content, then ```
-            code_block_match = re.search(
-                r"```(?:[\w\s]*)\n(.*?)```", raw_response, re.DOTALL | re.IGNORECASE
-            )
-            if code_block_match:
-                sql_query = code_block_match.group(1).strip()
-            else:
-                # 3. Fallback: aggressive cleanup
-                sql_query = raw_response.strip()
-                if sql_query.startswith("```"):
-                    # Split by newline and drop the first line if it looks like a language tag
-                    parts = sql_query.split("\n", 1)
-                    if len(parts) > 1:
-                        sql_query = parts[1]
-                    else:
-                        sql_query = sql_query.lstrip("`")
-
-                if sql_query.endswith("```"):
-                    sql_query = sql_query.rstrip("`").rstrip()
-
-        # Post-cleanup: Sometimes "sql" lingers if regex was imperfect
-        if sql_query.lower().startswith("sql"):
-            sql_query = sql_query[3:].strip()
-
-        cleaned_sql = sql_query
+        try:
+            with stage("llm"):
+                response = client.chat.completions.create(
+                    model=config.OPENAI_MODEL,
+                    messages=messages,
+                    temperature=0,
+                )
+        except Exception:
+            UPSTREAM_ERRORS.inc(service="openai")
+            raise
 
-        # Final Safety Net: Blindly remove backticks if they still exist
-        if "```" in cleaned_sql:
-            cleaned_sql = cleaned_sql.replace("```sql", "").replace("```", "").strip()
+        with stage("sql_extract"):
+            cleaned_sql, sql_query, raw_response = _extract_sql(response)
 
         logging.info(
             f"DEBUG extraction. Raw: {raw_response!r} -> Cleaned: {cleaned_sql!r}"
@@ -112,7 +91,8 @@ def get_sql_from_llm(
 
         # Validation Step
         if validation_callback:
-            is_valid, error_msg = validation_callback(cleaned_sql)
+            with stage("validate"):
+                is_valid, error_msg = validation_callback(cleaned_sql)
 
             if is_valid:
                 # If we get here, SQL is valid
@@ -126,6 +106,7 @@ def get_sql_from_llm(
                     f"FAILURE. Question: {question} -> Generated SQL: {cleaned_sql} -> Error: {error_msg}"
                 )
                 last_error = error_msg
+                LLM_RETRIES.inc()
                 # Feedback to LLM
                 messages.append({"role": "assistant", "content": sql_query})
                 messages.append(
@@ -147,3 +128,50 @@ def get_sql_from_llm(
     raise Exception(
         f"Failed to generate valid SQL after {max_retries} attempts. Last error: {last_error}"
     )
+
+
+def _extract_sql(response):
+    """
+    Pulls the SQL out of a completion. Returns (cleaned_sql, sql_query,
+    raw_response); sql_query is what gets echoed back to the LLM on retry.
+    """
+    raw_response = response.choices[0].message.content.strip()
+
+    # Improved SQL Extraction
+    # 1. Try to find content within <sql> tags (common in reasoning models)
+    sql_match = re.search(r"<sql>(.*?)</sql>", raw_response, re.DOTALL | re.IGNORECASE)
+    if sql_match:
+        sql_query = sql_match.group(1).strip()
+    else:
+        # 2. Try to find content within markdown code blocks
+        # Matches ``` followed by optional lang, optional newline/space, then content, then ```
+        code_block_match = re.search(
+            r"```(?:[\w\s]*)\n(.*?)```", raw_response, re.DOTALL | re.IGNORECASE
+        )
+        if code_block_match:
+            sql_query = code_block_match.group(1).strip()
+        else:
+            # 3. Fallback: aggressive cleanup
+            sql_query = raw_response.strip()
+            if sql_query.startswith("```"):
+                # Split by newline and drop the first line if it looks like a language tag
+                parts = sql_query.split("\n", 1)
+                if len(parts) > 1:
+                    sql_query = parts[1]
+                else:
+                    sql_query = sql_query.lstrip("`")
+
+            if sql_query.endswith("```"):
+                sql_query = sql_query.rstrip("`").rstrip()
+
+    # Post-cleanup: Sometimes "sql" lingers if regex was imperfect
+    if sql_query.lower().startswith("sql"):
+        sql_query = sql_query[3:].strip()
+
+    cleaned_sql = sql_query
+
+    # Final Safety Net: Blindly remove backticks if they still exist
+    if "```" in cleaned_sql:
+        cleaned_sql = cleaned_sql.replace("```sql", "").replace("```", "").strip()
+
+    return cleaned_sql, sql_query, raw_response
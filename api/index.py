@@ -1,12 +1,75 @@
-from fastapi import FastAPI
+import base64
+import contextlib
+import contextvars
+import hashlib
+import time
+from concurrent.futures import ThreadPoolExecutor
+from fastapi import FastAPI, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-import duckdb
-from ai_client import get_sql_from_llm
-from artwork_client import get_artwork_url
+import functools
+import logging
+import chart_db
+import schema_context
+import scoring
+import slow_query_log
+from admission import AdmissionLimiter, Overloaded
+from chart_catalog import chart_table, list_charts
+from chart_db import get_db_version
+from columnar import encode_json, fetch_columns, to_rows
 from config import config
+from shared_cache import MISSING, normalize_question, result_cache, sql_cache
+from singleflight import SingleFlight
+from score_index import ScoreIndex
+from suggest_index import SuggestIndex
+from telemetry import REQUEST_SECONDS, StageTimer, render_prometheus, stage
+from week_index import WeekIndex
 
-app = FastAPI()
+# duckdb, the OpenAI SDK (ai_client) and requests (artwork_client) are
+# imported on first use rather than here, so that serverless cold starts and
+# /api/health do not pay for them.
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(levelname)s - %(message)s",
+)
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    # In memory mode, pay the load at startup instead of on the first query
+    if config.DUCKDB_IN_MEMORY:
+        try:
+            chart_db.get_memory_db()
+        except Exception as e:
+            logging.error(f"Failed to load DuckDB into memory: {e}")
+    # The schema context is read (or built) by the first /api/query that
+    # needs it, which keeps it off the cold start of every worker
+    yield
+
+
+app = FastAPI(lifespan=lifespan)
+
+query_flight = SingleFlight("query")
+
+# LLM generation holds a thread for several OpenAI round trips, so only a
+# bounded number run (or wait to run) at once; the rest get a fast 429.
+# Cached answers never take a slot.
+llm_limiter = AdmissionLimiter(
+    "llm",
+    max_concurrent=config.LLM_MAX_CONCURRENT,
+    max_queue=config.LLM_MAX_QUEUE,
+    max_wait_seconds=config.LLM_MAX_QUEUE_WAIT_SECONDS,
+)
+
+# Upper bound on a requested page size
+MAX_PAGE_SIZE = 1000
+
+# Most songs accepted by /api/compare
+MAX_COMPARE_SONGS = 500
+
+# Accept header value (or ?format=columnar) that selects the compact format
+COLUMNAR_MEDIA_TYPE = "application/vnd.chart-explorer.columnar+json"
 
 app.add_middleware(
     CORSMiddleware,
@@ -14,24 +77,277 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing"],
 )
 
 
+@app.middleware("http")
+async def server_timing(request: Request, call_next):
+    """
+    Times every request and reports its stages (LLM call, validation,
+    execution, ...) in a Server-Timing header. Handlers run in a copy of
+    this context, so `telemetry.stage()` calls record into this timer.
+    """
+    timer = StageTimer()
+    start = time.perf_counter()
+    with timer.activate():
+        response = await call_next(request)
+    elapsed = time.perf_counter() - start
+    timer.add("total", elapsed)
+    REQUEST_SECONDS.observe(elapsed, path=request.url.path)
+    response.headers["Server-Timing"] = timer.server_timing()
+    return response
+
+
 class QueryRequest(BaseModel):
-    query: str
+    query: str = ""
+    page_size: int | None = None
+    # Chart to ask about (see /api/charts); config.DEFAULT_CHART if unset
+    chart: str | None = None
+    # From a previous response's next_cursor (an offset into its cached
+    # result, see encode_cursor); the query is then ignored
+    cursor: str | None = None
 
 
 class QueryResponse(BaseModel):
     sql: str
+    # One dict per row. Dates and timestamps are ISO strings (as isoformat()),
+    # DECIMAL values are numbers (integers at scale 0) and NULL is ""
     data: list[dict]
     metrics: dict | None = None
     history: list[dict] | None = None
     artwork_url: str | None = None
+    # Compact format: column names and one value array per column, in place
+    # of a dict per row in `data`
+    columns: list[str] | None = None
+    values: list[list] | None = None
+    total_rows: int | None = None
+    next_cursor: str | None = None
+    error: str | None = None
+
+
+class BatchQueryRequest(BaseModel):
+    queries: list[str]
+    page_size: int | None = None
+    chart: str | None = None
+
+
+class BatchItem(BaseModel):
+    query: str
+    response: QueryResponse
+    elapsed_ms: float
+    timings: dict[str, float] = {}
+    # True when the same question appeared earlier in the batch
+    duplicate: bool = False
+
+
+class BatchQueryResponse(BaseModel):
+    results: list[BatchItem] = []
+    elapsed_ms: float = 0
+    error: str | None = None
+
+
+class Song(BaseModel):
+    artist: str
+    title: str
+
+
+class CompareRequest(BaseModel):
+    songs: list[Song]
+    # "debut" (x is weeks since debut) or "date" (x is the chart date)
+    align: str = "debut"
+    chart: str | None = None
+
+
+class CompareResponse(BaseModel):
+    align: str | None = None
+    # One entry per song: artist, title, and x/position arrays with a null
+    # position where the song dropped out of the chart
+    series: list[dict] = []
+    error: str | None = None
+
+
+class ChartsResponse(BaseModel):
+    # chart_id, name, first_week, last_week, weeks and entries per chart
+    charts: list[dict] = []
+    default: str | None = None
+    error: str | None = None
+
+
+class ChartResponse(BaseModel):
+    from_date: str | None = None
+    to_date: str | None = None
+    entries: list[dict] = []
+    error: str | None = None
+
+
+class SuggestResponse(BaseModel):
+    suggestions: list[dict] = []
+    error: str | None = None
+
+
+class ScoringsResponse(BaseModel):
+    # name and description of each scoring function
+    scorings: list[dict] = []
+    default: str | None = None
+
+
+class RangeRankingResponse(BaseModel):
+    start: str | None = None
+    end: str | None = None
+    # artist, title, score, weeks and weeks_at_top within the range
+    entries: list[dict] = []
+    error: str | None = None
+
+
+class RankingResponse(BaseModel):
+    chart: str | None = None
+    scoring: str | None = None
+    # rank, artist, title, score, first_charted, peak_position, weeks_in_chart
+    entries: list[dict] = []
     error: str | None = None
 
 
 def get_db():
-    return duckdb.connect(config.DUCKDB_PATH, read_only=True)
+    return chart_db.connect()
+
+
+def get_charts():
+    return _load_charts(get_db_version())
+
+
+def resolve_chart(chart):
+    """Returns the chart id to use for a request, or raises ValueError."""
+    chart = chart or config.DEFAULT_CHART
+    if chart not in {c["chart_id"] for c in get_charts()}:
+        raise ValueError(f"Unknown chart: {chart}")
+    return chart
+
+
+def get_schema_context(chart=None):
+    """The LLM's description of a chart's tables (see schema_context.py)."""
+    return _load_schema_context(get_db_version(), resolve_chart(chart))
+
+
+def get_score_index(chart=None):
+    return _load_score_index(get_db_version(), resolve_chart(chart))
+
+
+def get_week_index(chart=None):
+    return _load_week_index(get_db_version(), resolve_chart(chart))
+
+
+def get_suggest_index(chart=None):
+    return _load_suggest_index(get_db_version(), resolve_chart(chart))
+
+
+# Stats of the suggest and score indexes built for each chart, for /api/health
+suggest_index_stats = {}
+score_index_stats = {}
+
+
+# In-memory indexes are keyed by the database version, so they are rebuilt
+# the first time they are used after init_duckdb.py rewrites the file. Each
+# chart has its own.
+@functools.lru_cache(maxsize=1)
+def _load_charts(db_version):
+    conn = get_db()
+    try:
+        return list_charts(conn)
+    finally:
+        conn.close()
+
+
+@functools.lru_cache(maxsize=8)
+def _load_schema_context(db_version, chart):
+    return schema_context.get_schema_context(
+        get_db, db_version, chart, schema_context.QUERY_KINDS
+    )
+
+
+@functools.lru_cache(maxsize=8)
+def _load_week_index(db_version, chart):
+    conn = get_db()
+    try:
+        return WeekIndex.from_connection(conn, chart)
+    finally:
+        conn.close()
+
+
+@functools.lru_cache(maxsize=8)
+def _load_score_index(db_version, chart):
+    conn = get_db()
+    try:
+        index = ScoreIndex.from_connection(conn, chart)
+    finally:
+        conn.close()
+    score_index_stats[chart] = index.stats()
+    logging.info(
+        f"Built {chart} score index for DB version {db_version}: {index.stats()}"
+    )
+    return index
+
+
+@functools.lru_cache(maxsize=8)
+def _load_suggest_index(db_version, chart):
+    conn = get_db()
+    try:
+        index = SuggestIndex.from_connection(conn, chart)
+    finally:
+        conn.close()
+    suggest_index_stats[chart] = index.stats()
+    logging.info(
+        f"Built {chart} suggest index for DB version {db_version}: {index.stats()}"
+    )
+    return index
+
+
+def result_id(db_version, sql):
+    """Identifies a query's cached result."""
+    return hashlib.sha1(f"{db_version}:{sql}".encode()).hexdigest()[:20]
+
+
+def encode_cursor(result_id, last_row):
+    """
+    Returns an opaque cursor for the rows after `last_row` of a cached
+    result. It is an offset into that snapshot, not a keyset over the
+    tables: pages stay consistent with the first one, and once the
+    snapshot leaves the result cache the cursor expires and the question
+    has to be asked again.
+    """
+    return base64.urlsafe_b64encode(f"{result_id}:{last_row}".encode()).decode()
+
+
+def decode_cursor(cursor):
+    """Returns (result_id, last_row) from an opaque cursor."""
+    try:
+        result_id, last_row = base64.urlsafe_b64decode(cursor).decode().split(":")
+        return result_id, int(last_row)
+    except Exception:
+        raise ValueError("Invalid cursor.")
+
+
+def paginate(response, result_id, first_row, page_size, compact=False):
+    """
+    Cuts one page out of a complete (column-major) response, in the compact
+    format or as a dict per row. The cursor points at the last row returned,
+    so the next page starts right after it.
+    """
+    values = response.values or []
+    total_rows = len(values[0]) if values else 0
+    page = [column[first_row : first_row + page_size] for column in values]
+    last_row = first_row + (len(page[0]) if page else 0) - 1
+    has_more = last_row + 1 < total_rows
+
+    update = {
+        "total_rows": total_rows,
+        "next_cursor": encode_cursor(result_id, last_row) if has_more else None,
+    }
+    if compact:
+        update.update(data=[], values=page)
+    else:
+        update.update(data=to_rows(response.columns, page), columns=None, values=None)
+    return response.model_copy(update=update)
 
 
 def format_val(val):
@@ -42,66 +358,419 @@ def format_val(val):
 
 @app.get("/api/health")
 def health():
-    return {"status": "ok", "db": config.DUCKDB_PATH}
+    status = {
+        "status": "ok",
+        "db": config.DUCKDB_PATH,
+        "db_mode": chart_db.get_db_mode(),
+    }
+    if chart_db.memory_stats:
+        status["memory"] = dict(chart_db.memory_stats)
+    status["caches"] = {
+        "sql": sql_cache.stats(),
+        "result": result_cache.stats(),
+    }
+    status["coalescing"] = {"query": query_flight.stats()}
+    status["admission"] = {"llm": llm_limiter.stats()}
+    # Only report indexes that are already built; health checks never build them
+    if suggest_index_stats:
+        status["suggest_index"] = dict(suggest_index_stats)
+    if score_index_stats:
+        status["score_index"] = dict(score_index_stats)
+    if scoring.engine_stats():
+        status["scoring"] = scoring.engine_stats()
+    return status
+
+
+@app.get("/api/metrics")
+def handle_metrics():
+    """Stage latencies, retries, cache hits and upstream errors for Prometheus."""
+    return Response(render_prometheus(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/api/charts", response_model=ChartsResponse)
+def handle_charts():
+    """Lists the charts that can be queried."""
+    try:
+        return ChartsResponse(charts=get_charts(), default=config.DEFAULT_CHART)
+
+    except Exception as e:
+        return ChartsResponse(error=str(e))
+
+
+@app.get("/api/chart", response_model=ChartResponse)
+def handle_chart(date: str, limit: int = 100, chart: str | None = None):
+    """Returns the chart for the week containing `date` (YYYY-MM-DD)."""
+    try:
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        chart = get_week_index(chart).get_chart(date, limit=limit)
+        if chart is None:
+            return ChartResponse(error=f"No chart found for the week of {date}.")
+        return ChartResponse(**chart)
+
+    except Exception as e:
+        return ChartResponse(error=str(e))
+
+
+@app.post("/api/compare", response_model=CompareResponse)
+def handle_compare(req: CompareRequest):
+    """Chart runs of several songs, loaded with one query and aligned."""
+    from history import align_histories, fetch_histories
+
+    try:
+        if len(req.songs) > MAX_COMPARE_SONGS:
+            return CompareResponse(
+                error=f"At most {MAX_COMPARE_SONGS} songs can be compared."
+            )
+
+        chart = resolve_chart(req.chart)
+        conn = get_db()
+        try:
+            with stage("history"):
+                histories = fetch_histories(
+                    conn, [(song.artist, song.title) for song in req.songs], chart
+                )
+        finally:
+            conn.close()
+
+        with stage("align"):
+            aligned = align_histories(histories, by=req.align)
+            x = aligned["x"]
+            if req.align == "date":
+                x = x.dt.strftime("%Y-%m-%d")
+            positions = aligned["position"].astype("Int64").astype(object)
+            positions = positions.where(positions.notna(), None)
+
+        series = [
+            {
+                "artist": artist,
+                "title": title,
+                "x": x.iloc[rows].tolist(),
+                "position": positions.iloc[rows].tolist(),
+            }
+            for (artist, title), rows in aligned.groupby(
+                ["artist", "title"], sort=False
+            ).indices.items()
+        ]
+        return CompareResponse(align=req.align, series=series)
+
+    except Exception as e:
+        return CompareResponse(error=str(e))
+
+
+@app.get("/api/suggest", response_model=SuggestResponse)
+def handle_suggest(q: str, limit: int = 10, chart: str | None = None):
+    """Autocompletes artists and song titles from the in-memory prefix index."""
+    try:
+        return SuggestResponse(
+            suggestions=get_suggest_index(chart).suggest(q, limit=limit)
+        )
+
+    except Exception as e:
+        return SuggestResponse(error=str(e))
+
+
+@app.get("/api/scorings", response_model=ScoringsResponse)
+def handle_scorings():
+    """Lists the scoring functions /api/ranking can rank by."""
+    return ScoringsResponse(
+        scorings=[
+            {"name": name, "description": spec["description"]}
+            for name, spec in scoring.SCORINGS.items()
+        ],
+        default=scoring.DEFAULT_SCORING,
+    )
+
+
+@app.get("/api/ranking", response_model=RankingResponse)
+def handle_ranking(
+    scoring_name: str = Query(scoring.DEFAULT_SCORING, alias="scoring"),
+    chart: str | None = None,
+    limit: int = 50,
+    offset: int = 0,
+):
+    """
+    Ranks a chart's songs by a scoring function (see /api/scorings). The
+    ranking is materialized on first use and served from memory after that.
+    """
+    try:
+        chart = resolve_chart(chart)
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        columns, rows = scoring.get_engine().ranking(
+            chart, scoring_name, limit=limit, offset=max(offset, 0)
+        )
+        return RankingResponse(
+            chart=chart,
+            scoring=scoring_name,
+            entries=[
+                {col: format_val(val) for col, val in zip(columns, row)} for row in rows
+            ],
+        )
+
+    except Exception as e:
+        return RankingResponse(error=str(e))
+
+
+@app.get("/api/ranking/range", response_model=RangeRankingResponse)
+def handle_range_ranking(
+    start: str, end: str, limit: int = 50, chart: str | None = None
+):
+    """
+    Ranks songs by their score over the chart weeks starting between `start`
+    and `end` (YYYY-MM-DD), from the in-memory prefix-sum score index.
+    """
+    try:
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        return RangeRankingResponse(
+            start=start, end=end, entries=get_score_index(chart).top(start, end, limit)
+        )
+
+    except Exception as e:
+        return RangeRankingResponse(error=str(e))
 
 
 @app.post("/api/query", response_model=QueryResponse)
-def handle_query(req: QueryRequest):
+def handle_query(req: QueryRequest, request: Request, format: str | None = None):
+    compact = format == "columnar" or COLUMNAR_MEDIA_TYPE in request.headers.get(
+        "accept", ""
+    )
+    page_size = max(1, min(req.page_size or config.QUERY_PAGE_SIZE, MAX_PAGE_SIZE))
+    if req.cursor:
+        response = next_page(req.cursor, page_size, compact)
+    elif not req.query.strip():
+        # The query is only optional alongside a cursor
+        return _query_error("A question or a cursor is required.", 422)
+    else:
+        try:
+            response = first_page(req.query, page_size, compact, req.chart)
+        except Overloaded as e:
+            return _query_error(str(e), 429, {"Retry-After": str(e.retry_after)})
+
+    # Serialized here rather than by FastAPI so it shows up as a stage
+    with stage("serialize"):
+        if compact:
+            fields = {
+                name: getattr(response, name)
+                for name in QueryResponse.model_fields
+                if name != "data"
+            }
+            body = encode_json({"format": "columnar", **fields})
+        else:
+            body = response.model_dump_json(exclude={"columns", "values"})
+    return Response(body, media_type="application/json")
+
+
+def _query_error(error, status_code, headers=None):
+    return Response(
+        QueryResponse(sql="", data=[], error=error).model_dump_json(
+            exclude={"columns", "values"}
+        ),
+        status_code=status_code,
+        headers=headers,
+        media_type="application/json",
+    )
+
+
+@app.post("/api/query/batch", response_model=BatchQueryResponse)
+def handle_query_batch(req: BatchQueryRequest):
+    """
+    Answers several questions concurrently, at most config.BATCH_MAX_PARALLEL
+    at a time. Each distinct question is answered once, through the same
+    caches and in-flight coalescing as /api/query; results come back in
+    request order with their own error and timings.
+    """
+    start = time.perf_counter()
+    if len(req.queries) > config.BATCH_MAX_QUERIES:
+        return BatchQueryResponse(
+            error=f"At most {config.BATCH_MAX_QUERIES} questions per batch."
+        )
+
+    page_size = max(1, min(req.page_size or config.QUERY_PAGE_SIZE, MAX_PAGE_SIZE))
+    unique = {}
+    for question in req.queries:
+        unique.setdefault(normalize_question(question), question)
+
+    workers = max(1, min(config.BATCH_MAX_PARALLEL, len(unique)))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            key: executor.submit(
+                contextvars.copy_context().run,
+                _answer_batch_item,
+                question,
+                page_size,
+                req.chart,
+            )
+            for key, question in unique.items()
+        }
+        answers = {key: future.result() for key, future in futures.items()}
+
+    results = []
+    seen = set()
+    for question in req.queries:
+        key = normalize_question(question)
+        response, elapsed_ms, timings = answers[key]
+        results.append(
+            BatchItem(
+                query=question,
+                response=response,
+                elapsed_ms=elapsed_ms,
+                timings=timings,
+                duplicate=key in seen,
+            )
+        )
+        seen.add(key)
+
+    batch = BatchQueryResponse(
+        results=results, elapsed_ms=(time.perf_counter() - start) * 1000
+    )
+    with stage("serialize"):
+        body = batch.model_dump_json(
+            exclude={"results": {"__all__": {"response": {"columns", "values"}}}}
+        )
+    return Response(body, media_type="application/json")
+
+
+def _answer_batch_item(question, page_size, chart=None):
+    timer = StageTimer()
+    start = time.perf_counter()
+    with timer.activate():
+        try:
+            response = first_page(question, page_size, chart=chart)
+        except Exception as e:
+            response = QueryResponse(sql="", data=[], error=str(e))
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    timings = {name: round(ms, 1) for name, (ms, _) in timer.totals().items()}
+    return response, elapsed_ms, timings
+
+
+def first_page(
+    question: str, page_size: int, compact=False, chart: str | None = None
+) -> QueryResponse:
+    # Identical questions arriving while one is being answered wait for it
+    # and share its response, instead of each calling the LLM
+    try:
+        db_version = get_db_version()
+        chart = resolve_chart(chart)
+    except Exception as e:
+        return QueryResponse(sql="", data=[], error=str(e))
+
+    key = f"{db_version}:{chart}:{normalize_question(question)}"
+    response = query_flight.do(key, answer_query, question, db_version, chart)
+    if response.error:
+        return response
+    rid = result_id(db_version, response.sql)
+    return paginate(response, rid, 0, page_size, compact)
+
+
+def next_page(cursor: str, page_size: int, compact=False) -> QueryResponse:
+    """
+    Serves a later page from the cached result, without the LLM or the DB,
+    or an error once that result has been evicted.
+    """
+    try:
+        rid, last_row = decode_cursor(cursor)
+    except ValueError as e:
+        return QueryResponse(sql="", data=[], error=str(e))
+
+    cached = result_cache.get(rid)
+    if cached is MISSING or "values" not in cached:
+        return QueryResponse(
+            sql="",
+            data=[],
+            error="These results have expired. Please ask the question again.",
+        )
+    # Cached values were validated when first stored
+    response = QueryResponse.model_construct(
+        sql=cached["sql"], data=[], columns=cached["columns"], values=cached["values"]
+    )
+    return paginate(response, rid, last_row + 1, page_size, compact)
+
+
+def answer_query(
+    question: str, db_version: str, chart: str | None = None
+) -> QueryResponse:
+    from ai_client import get_sql_from_llm
+    from artwork_client import get_artwork_url
+
     try:
         conn = get_db()
 
         def validate_sql(sql: str):
+            if not chart_db.is_select_only(conn, sql):
+                return False, "Only SELECT queries are allowed."
             try:
-                conn.execute(f"EXPLAIN {sql}")
+                with scoring.get_engine().pinned(sql):
+                    conn.execute(f"EXPLAIN {sql}")
                 return True, None
             except Exception as e:
                 return False, str(e)
 
-        # Generate SQL
-        sql_query = get_sql_from_llm(
-            question=req.query,
-            schema_context="""Table: charts.uk_singles_prestreaming_scored
-Columns:
-- artist (text)
-- title (text)
-- score (bigint)
-- first_charted (date)
-- peak_position (integer)
-- weeks_at_top (integer)
-- weeks_in_chart (integer)""",
-            limit=50,
-            max_retries=config.SQL_MAX_RETRIES,
-            validation_callback=validate_sql,
-        )
-
-        # Execute Query
-        result = conn.execute(sql_query)
-        columns = [desc[0] for desc in result.description]
-        rows = result.fetchall()
+        # Generate SQL (or reuse it for a question already answered). Cache
+        # entries are keyed by DB version so a rebuild invalidates them, and
+        # by chart since the prompt names that chart's tables.
+        chart = chart or config.DEFAULT_CHART
+        sql_key = f"{db_version}:{chart}:{normalize_question(question)}"
+        sql_query = sql_cache.get(sql_key)
+        if sql_query is MISSING:
+            context = get_schema_context(chart)
+            with llm_limiter.admit():
+                sql_query = get_sql_from_llm(
+                    question=question,
+                    schema_context=context,
+                    limit=50,
+                    max_retries=config.SQL_MAX_RETRIES,
+                    validation_callback=validate_sql,
+                )
+            sql_cache.set(sql_key, sql_query)
 
-        data = [
-            {col: format_val(val) for col, val in zip(columns, row)} for row in rows
-        ]
+        # Execute Query (or reuse its formatted result). Later pages of the
+        # result are served from this cache entry.
+        # Results are kept column-major, as converted from DuckDB's Arrow
+        # output, and turned into rows only for the row format.
+        result_key = result_id(db_version, sql_query)
+        cached_result = result_cache.get(result_key)
+        if cached_result is MISSING or "values" not in cached_result:
+            start = time.perf_counter()
+            # What-if rankings may not be materialized in this process yet,
+            # and must not be evicted before the result is fetched
+            with scoring.get_engine().pinned(sql_query):
+                with stage("execute"):
+                    result = conn.execute(sql_query)
+                with stage("format"):
+                    columns, values = fetch_columns(result)
+            row_count = len(values[0]) if values else 0
+            slow_query_log.record_if_slow(
+                question,
+                sql_query,
+                (time.perf_counter() - start) * 1000,
+                row_count,
+                db_version=db_version,
+            )
+            result_cache.set(
+                result_key, {"sql": sql_query, "columns": columns, "values": values}
+            )
+        else:
+            columns = cached_result["columns"]
+            values = cached_result["values"]
 
         metrics = None
         history = None
         artwork_url = None
 
         # If user searched for a specific song or artist, fetch details for the top result
-        if data and "artist" in columns and "title" in columns:
-            top_row = data[0]
-            artist_name = str(top_row["artist"])
-            song_title = str(top_row["title"])
-
-            history_query = """
-                SELECT from_date, to_date, position 
-                FROM charts.uk_singles_prestreaming_raw 
-                WHERE artist = ? AND title = ? 
+        if values and values[0] and "artist" in columns and "title" in columns:
+            artist_name = str(values[columns.index("artist")][0])
+            song_title = str(values[columns.index("title")][0])
+
+            history_query = f"""
+                SELECT from_date, to_date, position
+                FROM {chart_table(chart, "raw")}
+                WHERE artist = ? AND title = ?
                 ORDER BY from_date
             """
-            hist_result = conn.execute(history_query, [artist_name, song_title])
-            hist_columns = [desc[0] for desc in hist_result.description]
-            hist_rows = hist_result.fetchall()
+            with stage("history"):
+                hist_result = conn.execute(history_query, [artist_name, song_title])
+                hist_columns = [desc[0] for desc in hist_result.description]
+                hist_rows = hist_result.fetchall()
 
             history = [
                 {col: format_val(val) for col, val in zip(hist_columns, row)}
@@ -117,15 +786,22 @@ Columns:
                 }
 
             # Artwork
-            artwork_url = get_artwork_url(artist_name, song_title)
+            with stage("artwork"):
+                artwork_url = get_artwork_url(artist_name, song_title)
 
-        return QueryResponse(
+        # Built without validating every cell; paginate() produces the
+        # public shape
+        return QueryResponse.model_construct(
             sql=sql_query,
-            data=data,
+            data=[],
+            columns=columns,
+            values=values,
             metrics=metrics,
             history=history,
             artwork_url=artwork_url,
         )
 
+    except Overloaded:
+        raise
     except Exception as e:
         return QueryResponse(sql="", data=[], error=str(e))
@@ -1,20 +1,55 @@
-import requests
 import time
 import logging
-import functools
 from config import config
+from shared_cache import MISSING, artwork_cache
+from singleflight import SingleFlight
+from telemetry import UPSTREAM_ERRORS, stage
+
+# `requests` is imported inside the functions that call MusicBrainz, so that
+# importing this module does not load the HTTP stack on API cold starts.
 
 # User Agent is required by MusicBrainz API
 # See: https://musicbrainz.org/doc/MusicBrainz_API/Rate_Limiting
 USER_AGENT = config.USER_AGENT
 
+# "No artwork" can come from a transient MusicBrainz error, so it is shared
+# for a shorter time than a found URL
+NOT_FOUND_TTL_SECONDS = 3600
+
+# Concurrent lookups of the same song share one MusicBrainz round trip
+artwork_flight = SingleFlight("artwork")
+
 
-@functools.lru_cache(maxsize=100)
 def get_artwork_url(artist: str, title: str) -> str:
     """
     Fetches the URL of the album artwork for a given artist and song title
     using MusicBrainz and the Cover Art Archive.
 
+    Results (including "not found") are kept in the shared artwork cache, so
+    other API workers do not repeat the lookup, and concurrent lookups of the
+    same song in this process are coalesced into one.
+    """
+    if not artist or not title:
+        return None
+
+    key = f"{artist}\x1f{title}"
+    return artwork_flight.do(key, _get_shared_artwork_url, key, artist, title)
+
+
+def _get_shared_artwork_url(key, artist, title):
+    cached = artwork_cache.get(key)
+    if cached is not MISSING:
+        return cached
+
+    url = _fetch_artwork_url(artist, title)
+    artwork_cache.set(key, url, ttl_seconds=None if url else NOT_FOUND_TTL_SECONDS)
+    return url
+
+
+def _fetch_artwork_url(artist, title):
+    """
+    Looks up the artwork URL without caching.
+
     Strategy:
     1. Search MusicBrainz for a list of candidate "Release Groups" matching the artist and title.
        - Prioritize type "Single", then "Album", etc.
@@ -22,18 +57,17 @@ def get_artwork_url(artist: str, title: str) -> str:
        the Cover Art Archive.
     3. Return the first valid URL found.
     """
-    if not artist or not title:
-        return None
-
     try:
         # 1. Search for Release Group Candidates
-        candidates = _search_musicbrainz_candidates(artist, title)
+        with stage("artwork_search"):
+            candidates = _search_musicbrainz_candidates(artist, title)
         if not candidates:
             return None
 
         # 2. Iterate and Fetch Cover Art
         for mbid in candidates:
-            url = _get_cover_art_archive_url(mbid)
+            with stage("cover_probe"):
+                url = _get_cover_art_archive_url(mbid)
             if url:
                 return url
             # Tiny sleep to be nice to Cover Art Archive if we are hammering it
@@ -53,6 +87,8 @@ def _search_musicbrainz_candidates(artist, title):
     2. Perfect matches (score ~100) and type 'Album'
     3. Other high-scoring matches
     """
+    import requests
+
     if not USER_AGENT:
         raise ValueError("USER_AGENT not found in environment variables.")
     url = "https://musicbrainz.org/ws/2/release-group"
@@ -107,10 +143,13 @@ def _search_musicbrainz_candidates(artist, title):
 
     except Exception as e:
         logging.error(f"MusicBrainz Search Error: {e}")
+        UPSTREAM_ERRORS.inc(service="musicbrainz")
         return []
 
 
 def _get_cover_art_archive_url(mbid):
+    import requests
+
     # Try to get the 500px front image
     # https://coverartarchive.org/release-group/{mbid}/front-500
 
@@ -132,6 +171,7 @@ def _get_cover_art_archive_url(mbid):
         except Exception as e:
             # Just log and continue to next format/candidate
             logging.debug(f"Failed to fetch {url}: {e}")
+            UPSTREAM_ERRORS.inc(service="coverartarchive")
             continue
 
     return None
@@ -0,0 +1,77 @@
+import itertools
+import queue
+import threading
+from concurrent.futures import Future
+
+# Request priorities; lower runs first
+SELECTED = 0
+VISIBLE = 1
+
+# Finished lookups kept for reuse; older ones are dropped beyond this
+MAX_ENTRIES = 1000
+
+
+class ArtworkPrefetcher:
+    """
+    Looks up artwork URLs on one background thread and hands out Futures.
+
+    One thread keeps MusicBrainz at its one-request-per-second limit. Requests
+    for the same song share a Future, and the song the user selected jumps
+    ahead of rows that are only being prefetched.
+    """
+
+    def __init__(self, fetch):
+        self._fetch = fetch
+        self._futures = {}
+        # key -> priority of its queued, not yet started lookup
+        self._queued = {}
+        self._queue = queue.PriorityQueue()
+        self._order = itertools.count()
+        self._lock = threading.Lock()
+        self._worker = None
+
+    def request(self, artist, title, priority=VISIBLE):
+        """Returns a Future for the artwork URL (or None) of a song."""
+        key = (artist, title)
+        with self._lock:
+            future = self._futures.get(key)
+            if future is None:
+                future = self._futures[key] = Future()
+                self._evict()
+            elif future.done() or future.running():
+                return future
+            elif priority >= self._queued[key]:
+                # Already queued at this priority or a higher one
+                return future
+            # A repeat request with a higher priority queues the song again;
+            # the worker skips whichever entry comes second
+            self._queued[key] = priority
+            self._queue.put((priority, next(self._order), key))
+            if self._worker is None:
+                self._worker = threading.Thread(
+                    target=self._run, name="artwork-prefetch", daemon=True
+                )
+                self._worker.start()
+        return future
+
+    def _run(self):
+        while True:
+            _, _, key = self._queue.get()
+            with self._lock:
+                future = self._futures.get(key)
+                if future is None or future.done() or future.running():
+                    continue
+                del self._queued[key]
+                future.set_running_or_notify_cancel()
+            try:
+                future.set_result(self._fetch(*key))
+            except Exception as e:
+                future.set_exception(e)
+
+    def _evict(self):
+        # Called with the lock held; drops the oldest finished lookups
+        excess = len(self._futures) - MAX_ENTRIES
+        if excess <= 0:
+            return
+        for key in [k for k, f in self._futures.items() if f.done()][:excess]:
+            del self._futures[key]
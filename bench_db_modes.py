@@ -0,0 +1,101 @@
+"""
+Compares query latency between file mode (read-only connection to the
+DuckDB file) and memory mode (in-memory copy loaded by chart_db).
+
+Runs a set of representative queries, the kind the LLM generates plus the
+API's history lookup, several times in each mode and prints per-query
+median and p95 latency, along with the in-memory load time and size.
+
+Usage:
+    python bench_db_modes.py [--repeat 50]
+"""
+
+import argparse
+import statistics
+import time
+import duckdb
+import chart_db
+from config import config
+
+QUERIES = {
+    "top scored": """
+        SELECT artist, title, score, peak_position, weeks_in_chart
+        FROM charts.uk_singles_prestreaming_scored
+        ORDER BY score DESC LIMIT 50
+    """,
+    "number ones in a decade": """
+        SELECT artist, COUNT(*) AS number_ones
+        FROM charts.uk_singles_prestreaming_number_ones
+        WHERE decade = 1980
+        GROUP BY artist ORDER BY number_ones DESC LIMIT 10
+    """,
+    "chart for a date": """
+        SELECT position, artist, title
+        FROM charts.uk_singles_prestreaming_raw
+        WHERE DATE '1985-07-13' BETWEEN from_date AND to_date
+        ORDER BY position
+    """,
+    "artist ILIKE scan": """
+        SELECT artist, title, MIN(position) AS peak
+        FROM charts.uk_singles_prestreaming_raw
+        WHERE artist ILIKE '%QUEEN%'
+        GROUP BY artist, title ORDER BY peak LIMIT 50
+    """,
+    "history lookup": """
+        SELECT from_date, to_date, position
+        FROM charts.uk_singles_prestreaming_raw
+        WHERE artist = (SELECT artist FROM charts.uk_singles_prestreaming_scored
+                        ORDER BY score DESC LIMIT 1)
+          AND title = (SELECT title FROM charts.uk_singles_prestreaming_scored
+                       ORDER BY score DESC LIMIT 1)
+        ORDER BY from_date
+    """,
+}
+
+
+def time_queries(conn, repeat):
+    results = {}
+    for name, sql in QUERIES.items():
+        conn.execute(sql).fetchall()  # warm up
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            conn.execute(sql).fetchall()
+            samples.append((time.perf_counter() - start) * 1000)
+        samples.sort()
+        results[name] = (
+            statistics.median(samples),
+            samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+        )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="File vs in-memory DuckDB latency")
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    file_conn = duckdb.connect(config.DUCKDB_PATH, read_only=True)
+    memory_db, stats = chart_db.load_into_memory(config.DUCKDB_PATH)
+    print(
+        f"In-memory load: {stats['load_ms']} ms, "
+        f"{stats['tables']} tables, {stats['rows']} rows, "
+        f"resident {stats['resident_bytes']} bytes"
+    )
+
+    file_results = time_queries(file_conn, args.repeat)
+    memory_results = time_queries(memory_db.cursor(), args.repeat)
+
+    print()
+    print(
+        f"{'query':<26} {'file p50':>9} {'file p95':>9} {'mem p50':>9} {'mem p95':>9}"
+    )
+    for name in QUERIES:
+        f50, f95 = file_results[name]
+        m50, m95 = memory_results[name]
+        print(f"{name:<26} {f50:>9.2f} {f95:>9.2f} {m50:>9.2f} {m95:>9.2f}")
+    print("(milliseconds)")
+
+
+if __name__ == "__main__":
+    main()
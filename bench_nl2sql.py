@@ -0,0 +1,265 @@
+"""
+Runs the golden question set through get_sql_from_llm with recorded
+completions, and reports accuracy, attempts per question and the time spent
+in SQL extraction, validation and execution.
+
+By default the completions are replayed from the cassette and nothing goes
+over the network, so runs are fast, free and repeatable: compare two runs
+to see whether an extraction or validation change made things faster or
+slower. Questions that are not on the cassette are reported as "missing".
+With --record, missing completions are fetched from OpenAI (needs
+OPENAI_API_KEY) and added to the cassette; a prompt or schema context
+change needs a new recording.
+
+A question is correct when its result set matches that of the expected
+SQL. Columns are matched by name, or else by equal values, so extra columns
+and different aliases are allowed; row order only counts for "ordered"
+questions.
+
+Usage:
+    python bench_nl2sql.py [--record] [--cassette nl2sql_cassette.json]
+        [--golden nl2sql_golden.json] [--db musiccharts.duckdb]
+        [--output report.json]
+"""
+
+import argparse
+import json
+import statistics
+import chart_db
+import scoring
+from ai_client import get_sql_from_llm, make_client
+from config import config
+from llm_cassette import Cassette, CassetteMiss
+from schema_context import QUERY_KINDS, build_schema_context
+from telemetry import StageTimer, stage
+
+STAGES = ("sql_extract", "validate", "execute")
+
+
+def load_golden(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def results_match(expected, actual, ordered=False):
+    """
+    Compares two result sets, each a (columns, rows) pair.
+
+    Every expected column must be found in the actual result, by name or
+    else by having the same values; other actual columns are ignored.
+    """
+    expected_columns, expected_rows = expected
+    actual_columns, actual_rows = actual
+    if len(expected_rows) != len(actual_rows):
+        return False
+
+    def column(rows, i):
+        values = [_normalize(row[i]) for row in rows]
+        return values if ordered else sorted(values, key=repr)
+
+    names = [c.lower() for c in actual_columns]
+    picked = []
+    for i, name in enumerate(expected_columns):
+        if name.lower() in names and names.index(name.lower()) not in picked:
+            picked.append(names.index(name.lower()))
+            continue
+        wanted = column(expected_rows, i)
+        for j in range(len(actual_columns)):
+            if j not in picked and column(actual_rows, j) == wanted:
+                picked.append(j)
+                break
+        else:
+            return False
+
+    expected_set = [tuple(_normalize(v) for v in row) for row in expected_rows]
+    actual_set = [tuple(_normalize(row[j]) for j in picked) for row in actual_rows]
+    if not ordered:
+        expected_set.sort(key=repr)
+        actual_set.sort(key=repr)
+    return expected_set == actual_set
+
+
+def _normalize(value):
+    # Counts come back as int from one query and float or Decimal from
+    # another; dates compare as text
+    if value is None:
+        return None
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return round(float(value), 6)
+    if hasattr(value, "is_finite"):  # Decimal
+        return round(float(value), 6)
+    return str(value)
+
+
+def run(golden, client, conn, cassette=None, limit=50):
+    """
+    Answers each golden question with `client` and checks the result.
+    Returns one dict per question with status ("correct", "wrong", "error"
+    or "missing"), attempts, sql, error and per-stage milliseconds.
+    """
+
+    # Materializes the what-if rankings (scores.*) that queries refer to, as
+    # scoring.get_engine() does for the API
+    engine = scoring.ScoringEngine(conn)
+
+    def validate_sql(sql):
+        if not chart_db.is_select_only(conn, sql):
+            return False, "Only SELECT queries are allowed."
+        try:
+            with engine.pinned(sql):
+                conn.execute(f"EXPLAIN {sql}")
+            return True, None
+        except Exception as e:
+            return False, str(e)
+
+    # What the API gives the LLM for the default chart
+    context = build_schema_context(conn, kinds=QUERY_KINDS)
+
+    results = []
+    for item in golden:
+        try:
+            expected = _fetch(conn, engine, item["expected_sql"])
+        except Exception as e:
+            # The golden set does not fit this database; nothing to measure
+            results.append(
+                {
+                    "question": item["question"],
+                    "status": "error",
+                    "sql": None,
+                    "error": f"Expected SQL failed: {e}",
+                    "attempts": 0,
+                    "recorded_llm_ms": None,
+                    "ms": dict.fromkeys(STAGES, 0.0),
+                }
+            )
+            continue
+        calls_before = cassette.calls if cassette else 0
+        replayed_before = cassette.replayed_ms if cassette else 0.0
+        timer = StageTimer()
+        outcome = {"question": item["question"], "sql": None, "error": None}
+        with timer.activate():
+            try:
+                sql = get_sql_from_llm(
+                    item["question"],
+                    context,
+                    limit,
+                    validation_callback=validate_sql,
+                    client=client,
+                )
+                outcome["sql"] = sql
+                with stage("execute"):
+                    actual = _fetch(conn, engine, sql)
+                correct = results_match(expected, actual, item.get("ordered", False))
+                outcome["status"] = "correct" if correct else "wrong"
+            except CassetteMiss as e:
+                outcome.update(status="missing", error=str(e))
+            except Exception as e:
+                outcome.update(status="error", error=str(e))
+
+        totals = timer.totals()
+        outcome["attempts"] = cassette.calls - calls_before if cassette else None
+        outcome["recorded_llm_ms"] = (
+            round(cassette.replayed_ms - replayed_before, 1) if cassette else None
+        )
+        outcome["ms"] = {
+            name: round(totals.get(name, (0.0, 0))[0], 2) for name in STAGES
+        }
+        results.append(outcome)
+    return results
+
+
+def _fetch(conn, engine, sql):
+    with engine.pinned(sql):
+        result = conn.execute(sql)
+        return [desc[0] for desc in result.description], result.fetchall()
+
+
+def summarize(results):
+    answered = [r for r in results if r["status"] != "missing"]
+    correct = sum(1 for r in answered if r["status"] == "correct")
+    attempts = [r["attempts"] for r in answered if r["attempts"]]
+    summary = {
+        "questions": len(results),
+        "answered": len(answered),
+        "missing": len(results) - len(answered),
+        "correct": correct,
+        "accuracy": round(correct / len(answered), 4) if answered else None,
+        "mean_attempts": round(statistics.mean(attempts), 2) if attempts else None,
+        # What the replayed completions took when they were recorded
+        "recorded_llm_ms_total": round(
+            sum(r["recorded_llm_ms"] or 0.0 for r in answered), 1
+        ),
+    }
+    for name in STAGES:
+        samples = [r["ms"][name] for r in answered]
+        summary[f"{name}_ms_total"] = round(sum(samples), 2)
+        summary[f"{name}_ms_median"] = (
+            round(statistics.median(samples), 2) if samples else None
+        )
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline NL-to-SQL benchmark")
+    parser.add_argument("--golden", default="nl2sql_golden.json")
+    parser.add_argument("--cassette", default="nl2sql_cassette.json")
+    parser.add_argument(
+        "--record",
+        action="store_true",
+        help="fetch completions missing from the cassette from OpenAI",
+    )
+    parser.add_argument("--db", default=config.DUCKDB_PATH)
+    parser.add_argument("--output", help="also write the report as JSON here")
+    args = parser.parse_args()
+
+    config.DUCKDB_PATH = args.db
+    cassette = Cassette(args.cassette, mode="record" if args.record else "replay")
+    real_client = None
+    if args.record:
+        if not config.OPENAI_API_KEY:
+            parser.error("--record needs OPENAI_API_KEY")
+        real_client = make_client(
+            api_key=config.OPENAI_API_KEY, base_url=config.OPENAI_BASE_URL
+        )
+
+    results = run(
+        load_golden(args.golden),
+        cassette.client(real_client),
+        chart_db.connect(),
+        cassette=cassette,
+    )
+    summary = summarize(results)
+
+    print(
+        f"{'status':<8} {'tries':>5} {'extract':>8} {'validate':>9} "
+        f"{'execute':>8}  question"
+    )
+    for r in results:
+        ms = r["ms"]
+        print(
+            f"{r['status']:<8} {r['attempts'] or 0:>5} {ms['sql_extract']:>8.2f} "
+            f"{ms['validate']:>9.2f} {ms['execute']:>8.2f}  {r['question']}"
+        )
+        if r["error"] and r["status"] != "missing":
+            print(f"{'':<8} {r['error']}")
+    print(
+        f"\naccuracy: {summary['correct']}/{summary['answered']} answered "
+        f"({summary['missing']} missing from the cassette), "
+        f"mean attempts: {summary['mean_attempts']}"
+    )
+    for name in STAGES:
+        print(
+            f"{name}: {summary[f'{name}_ms_total']} ms total, "
+            f"{summary[f'{name}_ms_median']} ms median"
+        )
+    print(f"llm (as recorded): {summary['recorded_llm_ms_total']} ms total")
+    if cassette.recorded:
+        print(f"recorded {cassette.recorded} new completions to {args.cassette}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"summary": summary, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Measures how ingestion and the query paths scale with the amount of chart
+data, using synthetic charts from generate_charts.py.
+
+For each scale (rows relative to the real dataset) it generates the data,
+builds a database with init_duckdb.init_db, and times:
+- generation, and the build (load, scored table, rollups and indexes);
+- the representative generated queries from bench_db_modes.py;
+- batched history lookups (history.fetch_histories) for 100 songs;
+- loading the week index and looking up a chart week;
+- a five-year ranking from the prefix-sum score index (score_index.py).
+
+Usage:
+    python bench_scaling.py [--scales 1,10] [--chart-size 200]
+        [--format parquet] [--repeat 10] [--keep DIR]
+"""
+
+import argparse
+import contextlib
+import datetime
+import os
+import statistics
+import tempfile
+import time
+import duckdb
+from bench_db_modes import time_queries
+from generate_charts import generate, weeks_for_scale, write_charts
+from history import fetch_histories
+from init_duckdb import init_db
+from score_index import ScoreIndex
+from week_index import WeekIndex
+
+HISTORY_SONGS = 100
+
+
+def median_ms(fn, repeat):
+    fn()  # warm up
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def run_scale(scale, chart_size, data_format, repeat, directory):
+    weeks = weeks_for_scale(scale, chart_size)
+    data_path = os.path.join(directory, f"charts_{scale:g}.{data_format}")
+    db_path = os.path.join(directory, f"charts_{scale:g}.duckdb")
+    result = {"scale": scale}
+
+    start = time.perf_counter()
+    charts, songs = generate(weeks, chart_size)
+    write_charts(charts, songs, data_path)
+    result["generate_s"] = time.perf_counter() - start
+    result["rows"] = len(charts)
+    del charts, songs
+
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(None):
+        init_db(db_path, data_path)
+    result["build_s"] = time.perf_counter() - start
+    result["db_mb"] = os.path.getsize(db_path) / 1e6
+
+    conn = duckdb.connect(db_path, read_only=True)
+    result["queries"] = {
+        name: p50 for name, (p50, _) in time_queries(conn, repeat).items()
+    }
+
+    songs = conn.execute(
+        """
+        SELECT artist, title FROM charts.uk_singles_prestreaming_scored
+        ORDER BY score DESC LIMIT ?
+        """,
+        [HISTORY_SONGS],
+    ).fetchall()
+    result["queries"][f"histories x{HISTORY_SONGS}"] = median_ms(
+        lambda: fetch_histories(conn, songs), repeat
+    )
+
+    start = time.perf_counter()
+    week_index = WeekIndex.from_connection(conn)
+    result["week_index_load_ms"] = (time.perf_counter() - start) * 1000
+    middle = week_index.week_starts[len(week_index.week_starts) // 2]
+    result["queries"]["week index chart"] = median_ms(
+        lambda: week_index.get_chart(middle), repeat
+    )
+
+    score_index = ScoreIndex.from_connection(conn)
+    five_years = middle + datetime.timedelta(days=5 * 365)
+    result["queries"]["score index 5y ranking"] = median_ms(
+        lambda: score_index.top(middle, five_years), repeat
+    )
+    conn.close()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingestion and query scaling")
+    parser.add_argument("--scales", default="1,10")
+    parser.add_argument("--chart-size", type=int, default=200)
+    parser.add_argument("--format", choices=["parquet", "tsv"], default="parquet")
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--keep", help="directory to keep the generated files in")
+    args = parser.parse_args()
+    scales = [float(scale) for scale in args.scales.split(",")]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = args.keep or tmp
+        os.makedirs(directory, exist_ok=True)
+        results = []
+        for scale in scales:
+            result = run_scale(
+                scale, args.chart_size, args.format, args.repeat, directory
+            )
+            results.append(result)
+            print(
+                f"scale {scale:g}: {result['rows']} rows, "
+                f"generated in {result['generate_s']:.1f} s, "
+                f"built in {result['build_s']:.1f} s, {result['db_mb']:.0f} MB, "
+                f"week index loaded in {result['week_index_load_ms']:.0f} ms"
+            )
+
+    print()
+    names = list(results[0]["queries"])
+    scale_names = ["x%g" % r["scale"] for r in results]
+    print(f"{'query':<26}" + "".join(f"{name:>10}" for name in scale_names))
+    for name in names:
+        print(f"{name:<26}" + "".join(f"{r['queries'][name]:>10.2f}" for r in results))
+    print("(median milliseconds)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Compares the two /api/query response formats: a dict per row (format_val
+per cell, pydantic validation and model_dump_json) against the compact
+columnar format (Arrow conversion with vectorized date formatting, encoded
+with orjson).
+
+Both are timed from the executed DuckDB query to the encoded body, on a
+generated table shaped like charts.uk_singles_prestreaming_raw, and the
+median time and payload size are printed per result size.
+
+Usage:
+    python bench_serialization.py [--repeat 20] [--sizes 100,1000,10000,100000]
+"""
+
+import argparse
+import statistics
+import time
+import duckdb
+from api.index import QueryResponse, format_val
+from columnar import encode_json, fetch_columns
+
+QUERY = """
+    SELECT id, from_date, to_date, position, artist, title, label
+    FROM raw ORDER BY id LIMIT ?
+"""
+
+
+def make_table(conn, rows):
+    conn.execute(
+        """
+        CREATE TABLE raw AS
+        SELECT
+            range AS id,
+            DATE '1952-11-14' + CAST(range // 100 * 7 AS INTEGER) AS from_date,
+            DATE '1952-11-20' + CAST(range // 100 * 7 AS INTEGER) AS to_date,
+            CAST(range % 100 + 1 AS INTEGER) AS position,
+            'ARTIST ' || (range % 5000) AS artist,
+            'SONG TITLE ' || (range % 20000) AS title,
+            'LABEL ' || (range % 300) AS label
+        FROM range(?)
+        """,
+        [rows],
+    )
+
+
+def encode_rows(conn, size):
+    result = conn.execute(QUERY, [size])
+    columns = [desc[0] for desc in result.description]
+    data = [
+        {col: format_val(val) for col, val in zip(columns, row)}
+        for row in result.fetchall()
+    ]
+    return QueryResponse(sql=QUERY, data=data).model_dump_json().encode()
+
+
+def encode_columnar(conn, size):
+    columns, values = fetch_columns(conn.execute(QUERY, [size]))
+    return encode_json(
+        {"format": "columnar", "sql": QUERY, "columns": columns, "values": values}
+    )
+
+
+def time_encoder(encode, conn, size, repeat):
+    body = encode(conn, size)  # warm up
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        encode(conn, size)
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples), len(body)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Row vs columnar response encoding")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--sizes", default="100,1000,10000,100000")
+    args = parser.parse_args()
+    sizes = [int(size) for size in args.sizes.split(",")]
+
+    conn = duckdb.connect()
+    make_table(conn, max(sizes))
+
+    print(
+        f"{'rows':>8} {'rows ms':>9} {'col ms':>9} {'speedup':>8} "
+        f"{'rows KB':>9} {'col KB':>9}"
+    )
+    for size in sizes:
+        rows_ms, rows_bytes = time_encoder(encode_rows, conn, size, args.repeat)
+        col_ms, col_bytes = time_encoder(encode_columnar, conn, size, args.repeat)
+        print(
+            f"{size:>8} {rows_ms:>9.2f} {col_ms:>9.2f} {rows_ms / col_ms:>7.1f}x "
+            f"{rows_bytes / 1024:>9.1f} {col_bytes / 1024:>9.1f}"
+        )
+    print("(median milliseconds from executed query to encoded body)")
+
+
+if __name__ == "__main__":
+    main()
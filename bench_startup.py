@@ -0,0 +1,125 @@
+"""
+Cold-start benchmark for the API (api/index.py).
+
+Every measurement runs in a fresh interpreter, as a serverless cold start
+would:
+
+1. Import time per module, from `python -X importtime -c "import api.index"`.
+2. Time to import the app, answer the first /api/health, and answer the
+   first successful /api/query, plus which heavy modules each step loaded.
+
+Usage:
+    python bench_startup.py
+    python bench_startup.py --question "Top 5 songs of 1985" --top 25
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+HEAVY_MODULES = ["duckdb", "openai", "requests", "dotenv"]
+
+COLD_START_SCRIPT = """
+import json, sys, time
+t0 = time.perf_counter()
+import api.index as api
+t_import = time.perf_counter() - t0
+
+from fastapi.testclient import TestClient  # test harness, not timed
+
+heavy = {heavy!r}
+loaded = lambda: [m for m in heavy if m in sys.modules]
+client = TestClient(api.app)
+timings = {{"import_s": t_import, "loaded_after_import": loaded()}}
+
+t = time.perf_counter()
+client.get("/api/health").raise_for_status()
+timings["first_health_s"] = time.perf_counter() - t
+timings["loaded_after_health"] = loaded()
+
+if {question!r}:
+    t = time.perf_counter()
+    body = client.post("/api/query", json={{"query": {question!r}}}).json()
+    timings["first_query_s"] = time.perf_counter() - t
+    timings["query_error"] = body.get("error")
+    timings["loaded_after_query"] = loaded()
+
+print(json.dumps(timings))
+"""
+
+
+def measure_import_times(top):
+    """Returns (total_us, [(cumulative_us, self_us, module), ...]) for api.index."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import api.index"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    modules = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        modules.append((int(cumulative_us), int(self_us), name.strip()))
+
+    total_us = next((m[0] for m in modules if m[2] == "api.index"), 0)
+    # Only top-level packages, to avoid listing every submodule of a package
+    top_level = [m for m in modules if "." not in m[2]]
+    top_level.sort(reverse=True)
+    return total_us, top_level[:top]
+
+
+def measure_cold_start(question):
+    script = COLD_START_SCRIPT.format(heavy=HEAVY_MODULES, question=question)
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-c", script],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    wall = time.perf_counter() - start
+    timings = json.loads(proc.stdout.strip().splitlines()[-1])
+    timings["process_wall_s"] = wall
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--question",
+        default="What were the top 5 songs of 1985?",
+        help="Question for the first /api/query (empty string to skip).",
+    )
+    parser.add_argument("--top", type=int, default=15, help="Modules to list.")
+    args = parser.parse_args()
+
+    total_us, modules = measure_import_times(args.top)
+    print(f"import api.index: {total_us / 1000:.1f} ms")
+    print(f"{'cumulative ms':>14} {'self ms':>9}  module")
+    for cumulative_us, self_us, name in modules:
+        print(f"{cumulative_us / 1000:>14.1f} {self_us / 1000:>9.1f}  {name}")
+
+    timings = measure_cold_start(args.question)
+    print()
+    print(f"Process wall time:     {timings['process_wall_s'] * 1000:.1f} ms")
+    print(f"Import app:            {timings['import_s'] * 1000:.1f} ms")
+    print(f"  heavy modules loaded: {timings['loaded_after_import']}")
+    print(f"First /api/health:     {timings['first_health_s'] * 1000:.1f} ms")
+    print(f"  heavy modules loaded: {timings['loaded_after_health']}")
+    if "first_query_s" in timings:
+        status = timings["query_error"] or "ok"
+        print(f"First /api/query:      {timings['first_query_s'] * 1000:.1f} ms")
+        print(f"  result:               {status}")
+        print(f"  heavy modules loaded: {timings['loaded_after_query']}")
+
+
+if __name__ == "__main__":
+    main()
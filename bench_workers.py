@@ -0,0 +1,126 @@
+"""
+Measures API throughput as the number of uvicorn workers grows.
+
+For each worker count from 1 to --max-workers, starts `serve.py` on a free
+port with a shared cache, waits for /api/health, warms up the target once,
+then sends --requests requests from --concurrency client threads and
+reports requests per second and latency percentiles.
+
+The default target, /api/chart, needs no LLM. Pass --question to benchmark
+/api/query instead. The first request generates the SQL (one LLM call) and
+later requests are served from the shared SQL and result caches.
+
+Usage:
+    python bench_workers.py --max-workers 4
+    python bench_workers.py --question "Top 5 songs of 1985" --requests 500
+"""
+
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def request(base_url, question, path):
+    if question:
+        body = json.dumps({"query": question}).encode()
+        req = urllib.request.Request(
+            base_url + "/api/query",
+            data=body,
+            headers={"Content-Type": "application/json"},
+        )
+    else:
+        req = urllib.request.Request(base_url + path)
+    with urllib.request.urlopen(req, timeout=60) as response:
+        return response.read()
+
+
+def wait_for_health(base_url, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            request(base_url, None, "/api/health")
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError("API did not become healthy")
+
+
+def run(workers, args, cache_path):
+    port = free_port()
+    env = dict(
+        os.environ,
+        API_WORKERS=str(workers),
+        API_PORT=str(port),
+        CACHE_PATH=cache_path,
+    )
+    server = subprocess.Popen(
+        [sys.executable, "serve.py"],
+        cwd=ROOT,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        wait_for_health(base_url)
+        request(base_url, args.question, args.path)  # warm caches and indexes
+
+        def timed(_):
+            start = time.perf_counter()
+            request(base_url, args.question, args.path)
+            return (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            latencies = sorted(pool.map(timed, range(args.requests)))
+        elapsed = time.perf_counter() - start
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+    return {
+        "rps": args.requests / elapsed,
+        "p50": latencies[len(latencies) // 2],
+        "p95": latencies[int(len(latencies) * 0.95) - 1],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="API throughput vs worker count")
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 2)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--path", default="/api/chart?date=1985-07-13")
+    parser.add_argument("--question", default=None)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache_path = os.path.join(tmp, "cache.sqlite")
+        print(f"{'workers':>7} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'scaling':>8}")
+        baseline = None
+        for workers in range(1, args.max_workers + 1):
+            result = run(workers, args, cache_path)
+            baseline = baseline or result["rps"]
+            print(
+                f"{workers:>7} {result['rps']:>9.1f} {result['p50']:>8.1f} "
+                f"{result['p95']:>8.1f} {result['rps'] / baseline:>7.2f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+import re
+from config import config
+
+# Per-chart tables. Each is stored once for every chart, in
+# charts.chart_<kind> (the raw weeks in charts.chart_entries) with a chart_id
+# column, and read through the view charts.<chart_id>_<kind>.
+KINDS = (
+    "raw",
+    "scored",
+    "number_ones",
+    "yearly",
+    "decades",
+    "artists",
+    "labels",
+    "weeks",
+    "runs",
+    "cumulative",
+)
+
+_CHART_ID = re.compile(r"[a-z][a-z0-9_]{0,47}")
+
+
+def check_chart_id(chart_id):
+    """
+    Returns `chart_id` if it can name a chart. Chart ids become part of
+    view names, so they are limited to lower case letters, digits and _.
+    """
+    if not isinstance(chart_id, str) or not _CHART_ID.fullmatch(chart_id):
+        raise ValueError(f"Invalid chart id: {chart_id!r}")
+    return chart_id
+
+
+def chart_table(chart_id, kind):
+    """The view holding one chart's rows of a table, e.g. charts.uk_albums_raw."""
+    if kind not in KINDS:
+        raise ValueError(f"Unknown chart table: {kind!r}")
+    return f"charts.{check_chart_id(chart_id or config.DEFAULT_CHART)}_{kind}"
+
+
+def storage_table(kind):
+    """The table holding every chart's rows of a table."""
+    if kind not in KINDS:
+        raise ValueError(f"Unknown chart table: {kind!r}")
+    return "charts.chart_entries" if kind == "raw" else f"charts.chart_{kind}"
+
+
+def list_charts(conn):
+    """
+    Returns the loaded charts as dicts with chart_id, name, first_week,
+    last_week, weeks and entries. A database built before charts were
+    catalogued has just the default chart.
+    """
+    import duckdb
+
+    try:
+        result = conn.execute("""
+            SELECT chart_id, name, first_week, last_week, weeks, entries
+            FROM charts.chart_catalog
+            ORDER BY chart_id
+        """)
+    except duckdb.CatalogException:
+        return [{"chart_id": config.DEFAULT_CHART, "name": config.DEFAULT_CHART}]
+    columns = [desc[0] for desc in result.description]
+    return [dict(zip(columns, row)) for row in result.fetchall()]
@@ -0,0 +1,221 @@
+import logging
+import os
+import threading
+import time
+from config import config
+
+_memory_lock = threading.Lock()
+_memory_db = None
+_memory_db_version = None
+_memory_skipped_version = None
+memory_stats = {}
+
+# Read-only connection to the file, one per worker process
+_file_lock = threading.Lock()
+_file_db = None
+_file_db_key = None
+
+
+def get_db_version(path=None):
+    """
+    Identifies the current build of the DuckDB file from its modification
+    time and size. In-memory indexes key on this, so they are rebuilt after
+    init_duckdb.py rewrites the database.
+    """
+    stat = os.stat(path or config.DUCKDB_PATH)
+    return f"{stat.st_mtime_ns}-{stat.st_size}"
+
+
+def connect():
+    """
+    Returns a cursor for serving queries.
+
+    With DUCKDB_IN_MEMORY enabled this is a cursor on a shared in-memory copy
+    of the database (loaded on first use). Otherwise, or if memory is too
+    tight for the copy, it is a cursor on the process's read-only connection
+    to the file.
+    """
+    return get_db().cursor()
+
+
+def get_db():
+    """
+    Returns the shared connection that connect() makes cursors on: the
+    in-memory copy when it is in use, otherwise the read-only file
+    connection.
+    """
+    if config.DUCKDB_IN_MEMORY:
+        db = get_memory_db()
+        if db is not None:
+            return db
+
+    return get_file_db()
+
+
+def get_file_db():
+    """
+    Returns this process's read-only connection to the DuckDB file, opening
+    it on first use and reopening it when the file's version changes. Callers
+    should use a cursor per request or thread.
+    """
+    global _file_db, _file_db_key
+
+    key = (os.getpid(), get_db_version())
+    if _file_db is not None and _file_db_key == key:
+        return _file_db
+
+    with _file_lock:
+        if _file_db is None or _file_db_key != key:
+            import duckdb
+
+            _file_db = duckdb.connect(config.DUCKDB_PATH, read_only=True)
+            _file_db_key = key
+        return _file_db
+
+
+def is_select_only(conn, sql):
+    """
+    Returns True if `sql` consists only of SELECT statements. The in-memory
+    database cannot be opened read-only, so generated SQL is checked before
+    it runs.
+    """
+    import duckdb
+
+    try:
+        statements = conn.extract_statements(sql)
+    except duckdb.Error:
+        # Let EXPLAIN report the parse error to the LLM
+        return True
+    return all(s.type == duckdb.StatementType.SELECT for s in statements)
+
+
+def get_db_mode():
+    """Returns "memory" if queries are being served from memory, else "file"."""
+    return "memory" if config.DUCKDB_IN_MEMORY and _memory_db is not None else "file"
+
+
+def get_memory_db():
+    """
+    Returns the shared in-memory database, loading it on first use and
+    reloading it when the file's version changes. Returns None if it does
+    not fit in memory.
+    """
+    global _memory_db, _memory_db_version, _memory_skipped_version
+
+    version = get_db_version()
+    if _memory_db is not None and _memory_db_version == version:
+        return _memory_db
+    if _memory_skipped_version == version:
+        return None
+
+    with _memory_lock:
+        if _memory_db is not None and _memory_db_version == version:
+            return _memory_db
+
+        file_bytes = os.path.getsize(config.DUCKDB_PATH)
+        needed = int(file_bytes * config.DUCKDB_MEMORY_HEADROOM)
+        available = available_memory_bytes()
+        if available is not None and needed > available:
+            logging.warning(
+                f"Not loading DuckDB into memory: needs ~{needed} bytes, "
+                f"{available} available. Serving from {config.DUCKDB_PATH}."
+            )
+            _memory_db = None
+            _memory_skipped_version = version
+            return None
+
+        # The previous copy is not closed: in-flight requests may still hold
+        # cursors on it. It is freed once they are done.
+        _memory_db, stats = load_into_memory(config.DUCKDB_PATH)
+        _memory_db_version = version
+        memory_stats.clear()
+        memory_stats.update(stats)
+        logging.info(f"Loaded DuckDB into memory: {stats}")
+        return _memory_db
+
+
+def load_into_memory(path):
+    """
+    Copies every table, view and macro in the `charts` schema of the DuckDB
+    file at `path` into a new in-memory database.
+
+    Returns:
+        (connection, stats) where stats has load_ms, resident_bytes, tables
+        and rows.
+    """
+    import duckdb
+
+    start = time.perf_counter()
+    conn = duckdb.connect(":memory:")
+    escaped = path.replace("'", "''")
+    conn.execute(f"ATTACH '{escaped}' AS source (READ_ONLY);")
+    conn.execute("CREATE SCHEMA IF NOT EXISTS charts;")
+
+    tables = conn.execute("""
+        SELECT table_name, estimated_size
+        FROM duckdb_tables()
+        WHERE database_name = 'source' AND schema_name = 'charts'
+        ORDER BY table_name
+    """).fetchall()
+    for table_name, _ in tables:
+        conn.execute(
+            f'CREATE TABLE charts."{table_name}" AS '
+            f'SELECT * FROM source.charts."{table_name}";'
+        )
+
+    macros = conn.execute("""
+        SELECT function_name, function_type, parameters, macro_definition
+        FROM duckdb_functions()
+        WHERE database_name = 'source' AND schema_name = 'charts'
+            AND function_type IN ('macro', 'table_macro')
+    """).fetchall()
+    for name, function_type, parameters, definition in macros:
+        table = "TABLE " if function_type == "table_macro" else ""
+        conn.execute(
+            f'CREATE MACRO charts."{name}"({", ".join(parameters)}) AS '
+            f"{table}{definition};"
+        )
+
+    # View definitions are stored as CREATE VIEW statements on charts.*
+    views = conn.execute("""
+        SELECT sql
+        FROM duckdb_views()
+        WHERE database_name = 'source' AND schema_name = 'charts'
+    """).fetchall()
+    for (view_sql,) in views:
+        conn.execute(view_sql)
+
+    conn.execute("DETACH source;")
+
+    stats = {
+        "load_ms": round((time.perf_counter() - start) * 1000, 1),
+        "resident_bytes": _resident_bytes(conn),
+        "tables": len(tables),
+        "rows": sum(size for _, size in tables),
+    }
+    return conn, stats
+
+
+def available_memory_bytes():
+    """Returns the memory available to new allocations, or None if unknown."""
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    except (ValueError, OSError, AttributeError):
+        return None
+
+
+def _resident_bytes(conn):
+    try:
+        (total,) = conn.execute(
+            "SELECT SUM(memory_usage_bytes) FROM duckdb_memory()"
+        ).fetchone()
+        return int(total or 0)
+    except Exception:
+        return None
@@ -0,0 +1,103 @@
+import decimal
+import json
+
+# pyarrow and orjson are optional. Without them results are converted row by
+# row and encoded with the standard json module, with the same output.
+
+
+def fetch_columns(result):
+    """
+    Converts a DuckDB result into (columns, values), where values holds one
+    list per column.
+
+    With pyarrow installed the result is fetched as an Arrow table and each
+    column is converted in one call, with dates and timestamps formatted as
+    ISO strings by Arrow compute instead of per cell in Python.
+    """
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return _fetch_columns_by_row(result)
+
+    to_arrow = getattr(result, "to_arrow_table", None) or result.fetch_arrow_table
+    table = to_arrow()
+    return table.column_names, [_format_column(c).to_pylist() for c in table.columns]
+
+
+def _format_column(column):
+    import pyarrow as pa
+
+    kind = column.type
+    if pa.types.is_date(kind) or pa.types.is_time(kind):
+        return column.cast(pa.string())
+    if pa.types.is_timestamp(kind):
+        return _format_timestamp(column)
+    if pa.types.is_decimal(kind):
+        # SUM() over integers comes back as DECIMAL(38, 0)
+        if kind.scale == 0:
+            try:
+                return column.cast(pa.int64())
+            except pa.ArrowInvalid:
+                pass
+        return column.cast(pa.float64())
+    return column
+
+
+def _format_timestamp(column):
+    # As datetime.isoformat(): microseconds only if there are any, and the
+    # UTC offset (+HH:MM) of timestamps with a time zone
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    tz = column.type.tz
+    micros = pc.floor_temporal(column, unit="microsecond").cast(pa.timestamp("us", tz))
+    seconds = pc.floor_temporal(micros, unit="second")
+    parts = [
+        pc.strftime(seconds.cast(pa.timestamp("s", tz)), format="%Y-%m-%dT%H:%M:%S")
+    ]
+    fraction = pc.subtract(micros.cast(pa.int64()), seconds.cast(pa.int64()))
+    digits = pc.utf8_lpad(fraction.cast(pa.string()), width=6, padding="0")
+    parts.append(
+        pc.if_else(
+            pc.equal(fraction, 0), "", pc.binary_join_element_wise(".", digits, "")
+        )
+    )
+    if tz is not None:
+        offset = pc.strftime(micros, format="%z")
+        parts.append(
+            pc.replace_substring_regex(offset, pattern=r"(\d\d)$", replacement=r":\1")
+        )
+    return pc.binary_join_element_wise(*parts, "")
+
+
+def _fetch_columns_by_row(result):
+    columns = [desc[0] for desc in result.description]
+    rows = result.fetchall()
+    values = [[_plain_value(val) for val in column] for column in zip(*rows)]
+    return columns, values or [[] for _ in columns]
+
+
+def _plain_value(val):
+    # Matches what _format_column produces for the same column types
+    if hasattr(val, "isoformat"):
+        return val.isoformat()
+    if isinstance(val, decimal.Decimal):
+        return int(val) if val.as_tuple().exponent == 0 else float(val)
+    return val
+
+
+def to_rows(columns, values):
+    """Turns column-major values into the row-per-dict format."""
+    return [
+        {col: "" if val is None else val for col, val in zip(columns, row)}
+        for row in zip(*values)
+    ]
+
+
+def encode_json(obj):
+    """Encodes `obj` as compact JSON bytes, using orjson when installed."""
+    try:
+        import orjson
+    except ImportError:
+        return json.dumps(obj, separators=(",", ":"), default=str).encode()
+    return orjson.dumps(obj, default=str)
@@ -1,8 +1,17 @@
 import os
-from dotenv import load_dotenv
 
-# Load environment variables from .env file once
-load_dotenv()
+# Load environment variables from a local .env file once. python-dotenv is
+# only imported when there is a file to read, which keeps it off the cold
+# start path of deployments that configure the environment directly.
+_ENV_FILES = [
+    os.path.join(os.getcwd(), ".env"),
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".env"),
+]
+if any(os.path.exists(path) for path in _ENV_FILES):
+    from dotenv import load_dotenv
+
+    for path in _ENV_FILES:
+        load_dotenv(path)
 
 
 class Config:
@@ -14,6 +23,62 @@ class Config:
 
     # Database Settings
     DUCKDB_PATH = os.environ.get("DUCKDB_PATH", "musiccharts.duckdb")
+    # Serve queries from an in-memory copy of the charts.* tables
+    DUCKDB_IN_MEMORY = os.environ.get("DUCKDB_IN_MEMORY", "False").lower() in (
+        "true",
+        "1",
+        "t",
+    )
+    # Only load into memory if this multiple of the file size is available
+    DUCKDB_MEMORY_HEADROOM = float(os.environ.get("DUCKDB_MEMORY_HEADROOM", "2.0"))
+    # Chart used when a request or the UI does not pick one (see
+    # chart_catalog.py); its tables are charts.<DEFAULT_CHART>_raw and so on
+    DEFAULT_CHART = os.environ.get("DEFAULT_CHART", "uk_singles_prestreaming")
+    # What-if rankings (see scoring.py) kept materialized per process
+    SCORING_MAX_TABLES = int(os.environ.get("SCORING_MAX_TABLES", "8"))
+
+    # Cache Settings
+    # SQLite file shared by all API workers for the SQL, result and artwork
+    # caches. Empty keeps a separate in-memory cache per process.
+    CACHE_PATH = os.environ.get("CACHE_PATH", "")
+    CACHE_TTL_SECONDS = int(os.environ.get("CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+    CACHE_MAX_ENTRIES = int(os.environ.get("CACHE_MAX_ENTRIES", "10000"))
+    # JSON file caching the LLM schema context built from the database (see
+    # schema_context.py) for the current database version. Empty disables it.
+    SCHEMA_CACHE_PATH = os.environ.get("SCHEMA_CACHE_PATH", "schema_context.json")
+
+    # Slow Query Log
+    # Generated queries slower than this are profiled with EXPLAIN ANALYZE and
+    # appended to a local SQLite log. An empty path disables the log.
+    SLOW_QUERY_MS = float(os.environ.get("SLOW_QUERY_MS", "1000"))
+    SLOW_QUERY_LOG_PATH = os.environ.get("SLOW_QUERY_LOG_PATH", "slow_queries.sqlite")
+
+    # Server Settings
+    API_HOST = os.environ.get("API_HOST", "127.0.0.1")
+    API_PORT = int(os.environ.get("API_PORT", "8000"))
+    API_WORKERS = int(os.environ.get("API_WORKERS", "1"))
+    # Rows per page of /api/query results (and of the Streamlit results table)
+    QUERY_PAGE_SIZE = int(os.environ.get("QUERY_PAGE_SIZE", "100"))
+    # /api/query/batch: questions answered concurrently per batch, and the
+    # most questions accepted in one batch
+    BATCH_MAX_PARALLEL = int(os.environ.get("BATCH_MAX_PARALLEL", "4"))
+    BATCH_MAX_QUERIES = int(os.environ.get("BATCH_MAX_QUERIES", "50"))
+    # Admission control for LLM generation: concurrent generations, callers
+    # allowed to wait for one, and how long they wait before getting a 429
+    LLM_MAX_CONCURRENT = int(os.environ.get("LLM_MAX_CONCURRENT", "8"))
+    LLM_MAX_QUEUE = int(os.environ.get("LLM_MAX_QUEUE", "16"))
+    LLM_MAX_QUEUE_WAIT_SECONDS = float(
+        os.environ.get("LLM_MAX_QUEUE_WAIT_SECONDS", "5")
+    )
+
+    # Streamlit Result Store
+    # Results held in memory per session and across all sessions; beyond
+    # these they are spilled to RESULT_STORE_SPILL_DIR (a temp dir if empty),
+    # which is itself capped
+    RESULT_STORE_SESSION_MB = int(os.environ.get("RESULT_STORE_SESSION_MB", "64"))
+    RESULT_STORE_TOTAL_MB = int(os.environ.get("RESULT_STORE_TOTAL_MB", "512"))
+    RESULT_STORE_SPILL_MB = int(os.environ.get("RESULT_STORE_SPILL_MB", "2048"))
+    RESULT_STORE_SPILL_DIR = os.environ.get("RESULT_STORE_SPILL_DIR", "")
 
     # App Settings
     SHOW_SQL_DEBUG = os.environ.get("SHOW_SQL_DEBUG", "False").lower() in (
@@ -1,16 +1,98 @@
-import duckdb
+import os
+import tempfile
 import streamlit as st
+import chart_db
+import schema_context
+from chart_catalog import list_charts
 from config import config
+from history import align_histories, fetch_histories, split_histories
+from result_store import ResultStore
+from week_index import WeekIndex
 
 
-@st.cache_resource(show_spinner=False)
-def get_connection():
+@st.cache_resource(show_spinner=False, max_entries=1)
+def get_connection(db_version):
     """
-    Retrieves a read-only connection to the local DuckDB database.
+    Retrieves a read-only connection to the local DuckDB database, or a cursor
+    on its in-memory copy when DUCKDB_IN_MEMORY is enabled. `db_version` is
+    only part of the cache key: after a rebuild the cursor is opened on the
+    new database, where the scoring engine attaches its rankings.
     """
     try:
-        conn = duckdb.connect(config.DUCKDB_PATH, read_only=True)
+        conn = chart_db.connect()
         return conn
     except Exception as e:
         st.error(f"Failed to connect to DuckDB database: {e}")
         return None
+
+
+@st.cache_data(show_spinner=False)
+def get_charts(db_version):
+    """The charts in the database (see chart_catalog.list_charts)."""
+    conn = get_connection(db_version)
+    if conn is None:
+        return []
+    return list_charts(conn)
+
+
+@st.cache_data(show_spinner=False)
+def get_schema_context(db_version, chart_id=None):
+    """The LLM's description of a chart's tables (see schema_context.py)."""
+    return schema_context.get_schema_context(chart_db.connect, db_version, chart_id)
+
+
+@st.cache_resource(show_spinner=False, max_entries=8)
+def get_week_index(db_version, chart_id=None):
+    """
+    Builds the in-memory week index of a chart once per server process.
+    `db_version` is only part of the cache key, so a rebuilt database is
+    indexed again.
+    """
+    conn = get_connection(db_version)
+    if conn is None:
+        return None
+    return WeekIndex.from_connection(conn, chart_id)
+
+
+@st.cache_data(show_spinner=False, max_entries=256)
+def get_histories(songs, db_version, chart_id=None):
+    """
+    Chart runs for a tuple of (artist, title) pairs, loaded with one query
+    and shared across sessions. `db_version` is only part of the cache key,
+    so a rebuilt database is queried again.
+    """
+    conn = get_connection(db_version)
+    if conn is None:
+        return {}
+    return split_histories(fetch_histories(conn, songs, chart_id))
+
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def get_comparison(songs, align, db_version, chart_id=None):
+    """
+    Chart runs for a tuple of (artist, title) pairs, loaded with one query
+    and aligned for overlaying (see history.align_histories).
+    """
+    conn = get_connection(db_version)
+    if conn is None:
+        return None
+    return align_histories(fetch_histories(conn, songs, chart_id), by=align)
+
+
+@st.cache_resource(show_spinner=False)
+def get_result_store():
+    """
+    The memory-bounded store for query results, shared by all sessions of
+    this server process. Spill files from a previous process are removed.
+    """
+    spill_dir = config.RESULT_STORE_SPILL_DIR or os.path.join(
+        tempfile.gettempdir(), "chart_explorer_results"
+    )
+    store = ResultStore(
+        spill_dir,
+        max_session_bytes=config.RESULT_STORE_SESSION_MB * 1024 * 1024,
+        max_total_bytes=config.RESULT_STORE_TOTAL_MB * 1024 * 1024,
+        max_spill_bytes=config.RESULT_STORE_SPILL_MB * 1024 * 1024,
+    )
+    store.clear_spill_dir()
+    return store
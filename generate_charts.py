@@ -0,0 +1,294 @@
+"""
+Generates synthetic weekly singles charts for scale testing, in the formats
+init_duckdb.py loads: a Postgres COPY style TSV (tab separated, no header,
+\\N for NULL) or Parquet, with columns id, from_date, to_date, position,
+artist, title and label.
+
+The charts come from a simple simulation rather than random rows:
+- artist popularity follows a power law, so a few artists have dozens of
+  hits and most have one;
+- each song rises to a peak over a few weeks and then decays at its own
+  rate, with weekly noise, so run lengths are long-tailed;
+- songs hovering around the cut-off drop out and come back, and a few
+  songs are revived around their anniversaries (re-entries);
+- each artist mostly releases on one label, and label size follows a
+  power law too.
+
+Usage:
+    python generate_charts.py --output synthetic.parquet [--scale 10]
+        [--weeks 3200] [--chart-size 200] [--seed 0]
+"""
+
+import argparse
+import datetime
+import duckdb
+import numpy as np
+import pandas as pd
+
+# About the span of the real pre-streaming dataset
+BASE_WEEKS = 3200
+START_DATE = datetime.date(1952, 11, 14)
+
+# Weeks a song stays a candidate for the chart, and for an anniversary
+# revival (only for the songs picked for one)
+SONG_LIFETIME = 60
+REVIVAL_LIFETIME = 3 * 52 + 8
+REVIVAL_RATE = 0.03
+MAX_SONGS_PER_ARTIST = 150
+
+# Weeks simulated before the first chart week, so it starts full
+BURN_IN = SONG_LIFETIME
+
+FIRST_NAMES = """
+    ADAM ALICE BILLY BONNIE CARL CHER DAVID DIANA EDDIE ELLA FRANK GLORIA
+    HARRY HELEN IAN JACKIE JAMES JANET JOHNNY KATE KEVIN LISA MARK MARY
+    NEIL NINA PAUL PEGGY RICHARD ROSE SAM SANDIE STEVIE SUSAN TERRY TINA
+    TOM VICKY WILL ZOE
+""".split()
+LAST_NAMES = """
+    ADAMS BAKER BELL BROOKS CARTER CLARK COLE DAVIS EDWARDS EVANS FISHER
+    FOSTER GRAY GREEN HALL HARRIS HILL HUGHES JAMES JONES KING LEWIS MARSH
+    MARTIN MOORE MORGAN PARKER PRICE REED RICHARDS ROBERTS SHAW SMITH
+    STONE TAYLOR TURNER WALKER WARD WHITE YOUNG
+""".split()
+ADJECTIVES = """
+    BLUE BRIGHT BROKEN COLD CRAZY DARK ELECTRIC EMPTY GOLDEN HAPPY HEAVY
+    HOLLOW HOT LITTLE LONELY LOST MAGIC MIDNIGHT NEON PERFECT PURPLE QUIET
+    RED RESTLESS RUNAWAY SECRET SILENT SILVER SIMPLE SOFT STRANGE SUMMER
+    SWEET TENDER TWISTED VELVET WHITE WILD WINTER YOUNG
+""".split()
+NOUNS = """
+    ANGEL BIRD BOY CANDLE CITY DANCER DIAMOND DREAM FIRE FLOWER GHOST GIRL
+    HEART HIGHWAY HORSE KISS LIGHT LOVER MACHINE MIRROR MOON NIGHT OCEAN
+    PARADISE RAIN REBEL RIVER ROAD ROSE SHADOW SKY SOUL STAR STORM STREET
+    SUN THUNDER TRAIN WAVE WORLD
+""".split()
+VERBS = """
+    BELIEVE BREAK CALL CATCH DANCE DON'T STOP FEEL HOLD KEEP KISS LOVE MISS
+    NEED RUN SAVE SHOUT STAY TAKE TOUCH WAIT WALK WANT
+""".split()
+LABEL_WORDS = """
+    APEX ATLAS BEACON CAPITOL COBALT CROWN DECCA ECHO EMBER FALCON HARBOUR
+    HORIZON JUNCTION KESTREL LANTERN MERIDIAN MONARCH NORTHERN ORBIT PHOENIX
+    PILOT PRISM QUARTZ RADIANT REGAL SAPPHIRE SOVEREIGN SPIRAL SUMMIT
+    TEMPO TOWER VANGUARD VERTEX ZENITH
+""".split()
+
+
+def generate(weeks, chart_size=100, seed=0):
+    """
+    Simulates `weeks` weekly charts of up to `chart_size` positions.
+
+    Returns:
+        (charts, songs): charts has week, position and song (an index into
+        songs); songs has artist, title and label.
+    """
+    rng = np.random.default_rng(seed)
+
+    # About one in ten chart places is a new entry, as in the real charts
+    total_weeks = weeks + BURN_IN
+    new_per_week = rng.poisson(max(1.0, chart_size / 10), total_weeks)
+    debut = np.repeat(np.arange(total_weeks) - BURN_IN, new_per_week)
+    n_songs = len(debut)
+
+    # Songs per artist follow a power law: most artists have one or two,
+    # a few have a hundred. Prolific artists also have bigger hits.
+    counts = rng.zipf(2.2, n_songs)
+    counts = counts[counts <= MAX_SONGS_PER_ARTIST]
+    counts = counts[: np.searchsorted(np.cumsum(counts), n_songs) + 1]
+    n_artists = len(counts)
+    artist = rng.permutation(np.repeat(np.arange(n_artists), counts))[:n_songs]
+    boost = counts[artist] ** 0.2
+
+    # Song shape: strength, weeks to peak and weekly decay after the peak
+    strength = rng.lognormal(0.0, 0.8, n_songs) * boost
+    peak = rng.geometric(0.45, n_songs) - 1
+    decay = rng.lognormal(np.log(0.22), 0.5, n_songs)
+    revival = np.where(
+        rng.random(n_songs) < REVIVAL_RATE, 52 * rng.integers(1, 4, n_songs), 0
+    )
+
+    chart_weeks, chart_positions, chart_songs = [], [], []
+    for week in range(-BURN_IN, weeks):
+        # Songs are ordered by debut, so the candidates are two slices
+        recent = slice(
+            np.searchsorted(debut, week - SONG_LIFETIME, "left"),
+            np.searchsorted(debut, week, "right"),
+        )
+        older = np.arange(
+            np.searchsorted(debut, week - REVIVAL_LIFETIME, "left"), recent.start
+        )
+        older = older[revival[older] > 0]
+        candidates = np.concatenate([np.arange(recent.start, recent.stop), older])
+        if week < 0 or len(candidates) == 0:
+            continue
+
+        age = week - debut[candidates]
+        rising = np.minimum(1.0, (age + 1) / (peak[candidates] + 1))
+        falling = np.exp(-decay[candidates] * np.maximum(0, age - peak[candidates]))
+        anniversary = revival[candidates]
+        bump = np.where(
+            anniversary > 0, 0.6 * np.exp(-((age - anniversary) ** 2) / 4.0), 0.0
+        )
+        score = strength[candidates] * (rising * falling + bump)
+        score *= rng.lognormal(0.0, 0.2, len(candidates))
+
+        # Songs that have faded out do not chart even in a thin week
+        charted = candidates[score > 0.05]
+        score = score[score > 0.05]
+        if len(charted) > chart_size:
+            top = np.argpartition(-score, chart_size)[:chart_size]
+            charted, score = charted[top], score[top]
+        order = np.argsort(-score, kind="stable")
+        chart_weeks.append(np.full(len(order), week))
+        chart_positions.append(np.arange(1, len(order) + 1))
+        chart_songs.append(charted[order])
+
+    charts = pd.DataFrame(
+        {
+            "week": np.concatenate(chart_weeks),
+            "position": np.concatenate(chart_positions),
+            "song": np.concatenate(chart_songs),
+        }
+    )
+    songs = _name_songs(rng, artist, n_artists)
+    return charts, songs
+
+
+def _name_songs(rng, artist, n_artists):
+    artist_names = _unique(_artist_names(rng, n_artists))
+
+    # Each artist has a home label that most of their songs come out on;
+    # label sizes follow a power law
+    n_labels = max(10, n_artists // 10)
+    label_names = _unique(
+        _pick(rng, LABEL_WORDS, n_labels)
+        + np.where(rng.random(n_labels) < 0.5, " RECORDS", "")
+    )
+    label_weights = 1.0 / np.arange(1, n_labels + 1)
+    label_weights /= label_weights.sum()
+    home_label = rng.choice(n_labels, n_artists, p=label_weights)
+    label = np.where(
+        rng.random(len(artist)) < 0.85,
+        home_label[artist],
+        rng.choice(n_labels, len(artist), p=label_weights),
+    )
+
+    titles = _titles(rng, len(artist))
+    songs = pd.DataFrame(
+        {
+            "song": np.arange(len(artist)),
+            "artist": artist_names[artist],
+            "title": titles,
+            "label": label_names[label],
+        }
+    )
+    # A few entries without a label, as in the real data
+    songs.loc[rng.random(len(songs)) < 0.01, "label"] = None
+    # An artist does not release two songs with the same title
+    repeat = songs.groupby(["artist", "title"]).cumcount()
+    songs.loc[repeat > 0, "title"] += (
+        " (PART " + (repeat[repeat > 0] + 1).astype(str) + ")"
+    )
+    return songs
+
+
+def _artist_names(rng, n):
+    kind = rng.integers(0, 4, n)
+    first, last = _pick(rng, FIRST_NAMES, n), _pick(rng, LAST_NAMES, n)
+    adjective, noun = _pick(rng, ADJECTIVES, n), _pick(rng, NOUNS, n)
+    band = "THE " + adjective + " " + noun + "S"
+    return np.select(
+        [kind == 0, kind == 1, kind == 2],
+        [first + " " + last, band, first + " " + last + " AND " + band],
+        adjective + " " + noun,
+    )
+
+
+def _titles(rng, n):
+    kind = rng.integers(0, 4, n)
+    adjective, noun = _pick(rng, ADJECTIVES, n), _pick(rng, NOUNS, n)
+    verb, other = _pick(rng, VERBS, n), _pick(rng, NOUNS, n)
+    return np.select(
+        [kind == 0, kind == 1, kind == 2],
+        [adjective + " " + noun, verb + " ME", noun + " OF THE " + other],
+        verb + " THE " + adjective + " " + noun,
+    )
+
+
+def _pick(rng, words, n):
+    return np.array(words, dtype=object)[rng.integers(0, len(words), n)]
+
+
+def _unique(names):
+    # Numbers repeated names, so distinct entities keep distinct names
+    names = pd.Series(names)
+    repeat = names.groupby(names).cumcount()
+    names[repeat > 0] += " " + (repeat[repeat > 0] + 1).astype(str)
+    return names.to_numpy(dtype=object)
+
+
+def write_charts(charts, songs, path, start=START_DATE):
+    """
+    Writes the generated charts to `path`, as Parquet if it ends in
+    .parquet and as a Postgres COPY style TSV otherwise.
+    """
+    conn = duckdb.connect()
+    conn.register("charts_df", charts)
+    conn.register("songs_df", songs)
+    if path.endswith(".parquet"):
+        options = "FORMAT parquet"
+    else:
+        options = "FORMAT csv, DELIMITER '\\t', HEADER false, NULLSTR '\\N'"
+    escaped = path.replace("'", "''")
+    conn.execute(f"""
+        COPY (
+            SELECT
+                CAST(row_number() OVER (ORDER BY c.week, c.position) AS INTEGER)
+                    AS id,
+                DATE '{start.isoformat()}' + CAST(c.week * 7 AS INTEGER)
+                    AS from_date,
+                DATE '{start.isoformat()}' + CAST(c.week * 7 + 6 AS INTEGER)
+                    AS to_date,
+                CAST(c.position AS INTEGER) AS position,
+                s.artist,
+                s.title,
+                s.label
+            FROM charts_df c
+            JOIN songs_df s USING (song)
+            ORDER BY c.week, c.position
+        ) TO '{escaped}' ({options})
+    """)
+    conn.close()
+
+
+def weeks_for_scale(scale, chart_size=100):
+    """Weeks of `chart_size` charts for `scale` times the real row count."""
+    return max(1, round(BASE_WEEKS * scale * 100 / chart_size))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic chart data")
+    parser.add_argument("--output", required=True, help=".tsv or .parquet file")
+    parser.add_argument(
+        "--scale",
+        type=float,
+        default=1.0,
+        help="rows relative to the real dataset (sets --weeks if not given)",
+    )
+    parser.add_argument("--weeks", type=int)
+    parser.add_argument("--chart-size", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    weeks = args.weeks or weeks_for_scale(args.scale, args.chart_size)
+    charts, songs = generate(weeks, args.chart_size, args.seed)
+    write_charts(charts, songs, args.output)
+    print(
+        f"Wrote {len(charts)} chart entries ({weeks} weeks, "
+        f"{charts['song'].nunique()} songs) to {args.output}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+import pandas as pd
+from chart_catalog import chart_table
+
+# A gap of more than this many days between chart weeks is a drop-out
+GAP_DAYS = 9
+
+
+def fetch_histories(conn, songs, chart_id=None):
+    """
+    Loads the chart runs of many songs with one query.
+
+    Args:
+        conn: DuckDB connection or cursor.
+        songs: Iterable of (artist, title) pairs.
+        chart_id: Chart to read, config.DEFAULT_CHART if None.
+
+    Returns:
+        DataFrame with artist, title, from_date, to_date and position, one row
+        per chart week, ordered by song and date.
+    """
+    songs = list(songs)
+    artists = [artist for artist, _ in songs]
+    titles = [title for _, title in songs]
+    return conn.execute(
+        f"""
+        WITH songs AS (
+            SELECT DISTINCT
+                unnest(?::VARCHAR[]) AS artist,
+                unnest(?::VARCHAR[]) AS title
+        )
+        SELECT r.artist, r.title, r.from_date, r.to_date, r.position
+        FROM {chart_table(chart_id, "raw")} r
+        JOIN songs s ON r.artist = s.artist AND r.title = s.title
+        ORDER BY r.artist, r.title, r.from_date
+        """,
+        [artists, titles],
+    ).df()
+
+
+def split_histories(histories):
+    """
+    Splits fetch_histories output into {(artist, title): DataFrame of
+    from_date, to_date, position}.
+    """
+    return {
+        song: group[["from_date", "to_date", "position"]].reset_index(drop=True)
+        for song, group in histories.groupby(["artist", "title"], sort=False)
+    }
+
+
+def align_histories(histories, by="debut"):
+    """
+    Prepares fetch_histories output for overlaying many chart runs.
+
+    Adds `x`: weeks since the song's debut (by="debut") or the chart date
+    (by="date"). After each drop-out of more than GAP_DAYS a row with a
+    missing position is inserted, one week after the last charted week, so
+    plotted lines break between runs. Works on all songs at once rather
+    than row by row.
+
+    Returns:
+        DataFrame with artist, title, from_date, position (float, NaN at
+        gaps) and x, ordered by song and date.
+    """
+    if by not in ("debut", "date"):
+        raise ValueError(f"Unknown alignment: {by!r}")
+
+    df = histories[["artist", "title", "from_date", "position"]].copy()
+    df["from_date"] = pd.to_datetime(df["from_date"])
+    df["position"] = df["position"].astype("float64")
+
+    songs = df.groupby(["artist", "title"], sort=False)["from_date"]
+    previous = songs.shift()
+    is_gap = (df["from_date"] - previous).dt.days > GAP_DAYS
+    gaps = df[is_gap].assign(
+        from_date=previous[is_gap] + pd.Timedelta(days=7), position=float("nan")
+    )
+    debut = songs.transform("min")
+
+    df = pd.concat([df.assign(debut=debut), gaps.assign(debut=debut[is_gap])])
+    df = df.sort_values(["artist", "title", "from_date"], kind="stable")
+    if by == "debut":
+        df["x"] = (df["from_date"] - df["debut"]).dt.days // 7
+    else:
+        df["x"] = df["from_date"]
+    return df.drop(columns="debut").reset_index(drop=True)
@@ -1,16 +1,112 @@
 import duckdb
+from chart_catalog import chart_table, check_chart_id, storage_table
+from config import config
 
 
-def init_db():
-    conn = duckdb.connect("musiccharts.duckdb")
+def init_db(
+    db_path="musiccharts.duckdb", data_path="music_data.tsv", chart_id=None, name=None
+):
+    """
+    Loads a chart into the database at `db_path` from the chart data at
+    `data_path`: a Postgres COPY style TSV (the original dump), or a Parquet
+    file with the same columns, e.g. from generate_charts.py.
 
-    # Create schema
+    Charts already in the database are kept (a chart loaded again is
+    replaced), and the derived tables are rebuilt for all charts at once.
+    """
+    chart_id = check_chart_id(chart_id or config.DEFAULT_CHART)
+    conn = duckdb.connect(db_path)
+
+    load_chart(conn, chart_id, data_path, name)
+    build_scored(conn)
+    build_rollups(conn)
+    build_week_index(conn)
+    build_trigram_index(conn)
+    build_runs(conn)
+    build_score_index(conn)
+    build_catalog(conn)
+
+    conn.close()
+    print(f"DuckDB database created successfully: {db_path}")
+
+
+def load_chart(conn, chart_id, data_path, name=None):
+    """
+    Replaces one chart's rows in the fact table, charts.chart_entries, with
+    the data at `data_path`.
+    """
+    ensure_chart_entries(conn)
+
+    conn.execute("""
+        CREATE OR REPLACE TEMP TABLE staging (
+            id INTEGER,
+            from_date DATE,
+            to_date DATE,
+            position INTEGER,
+            artist VARCHAR,
+            title VARCHAR,
+            label VARCHAR
+        );
+    """)
+
+    print(f"Loading {chart_id} into DuckDB...")
+    if data_path.endswith(".parquet"):
+        conn.execute(
+            """
+            INSERT INTO staging
+            SELECT id, from_date, to_date, position, artist, title, label
+            FROM read_parquet(?)
+            """,
+            [data_path],
+        )
+    else:
+        # Postgres COPY format uses \\N for NULL and tab delimiter
+        conn.execute(f"""
+            COPY staging FROM '{data_path}'
+            (DELIMITER '\\t', HEADER FALSE, NULL '\\N');
+        """)
+
+    conn.execute("DELETE FROM charts.chart_entries WHERE chart_id = ?", [chart_id])
+    conn.execute(
+        "INSERT INTO charts.chart_entries SELECT ?, * FROM staging", [chart_id]
+    )
+    conn.execute("DROP TABLE staging;")
+    conn.execute(
+        "INSERT OR REPLACE INTO charts.chart_names VALUES (?, ?)",
+        [chart_id, name or chart_id],
+    )
+
+    # Keep the fact table physically sorted by chart, week and position.
+    # Each chart is then a contiguous range of row groups, which queries on
+    # one chart skip to by their min/max chart_id, and each chart week is a
+    # contiguous range of rows.
+    conn.execute("""
+        CREATE OR REPLACE TABLE charts.chart_entries AS
+        SELECT * FROM charts.chart_entries
+        ORDER BY chart_id, from_date, position;
+    """)
+    _create_views(conn, "raw")
+
+
+def ensure_chart_entries(conn):
+    """
+    Creates the fact table (and the chart names table) if missing. A single
+    chart database from before charts.chart_entries existed has its raw
+    table moved in as the default chart.
+    """
     conn.execute("CREATE SCHEMA IF NOT EXISTS charts;")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS charts.chart_names (
+            chart_id VARCHAR PRIMARY KEY,
+            name VARCHAR
+        );
+    """)
+    if _relation_type(conn, "charts.chart_entries"):
+        return
 
-    # Create the raw table
-    conn.execute("DROP TABLE IF EXISTS charts.uk_singles_prestreaming_raw;")
     conn.execute("""
-        CREATE TABLE charts.uk_singles_prestreaming_raw (
+        CREATE TABLE charts.chart_entries (
+            chart_id VARCHAR,
             id INTEGER,
             from_date DATE,
             to_date DATE,
@@ -20,31 +116,109 @@ def init_db():
             label VARCHAR
         );
     """)
+    legacy = chart_table(config.DEFAULT_CHART, "raw")
+    if _relation_type(conn, legacy) == "BASE TABLE":
+        conn.execute(
+            f"""
+            INSERT INTO charts.chart_entries
+            SELECT ?, id, from_date, to_date, position, artist, title, label
+            FROM {legacy}
+            ORDER BY from_date, position
+            """,
+            [config.DEFAULT_CHART],
+        )
+        conn.execute(
+            "INSERT OR REPLACE INTO charts.chart_names VALUES (?, ?)",
+            [config.DEFAULT_CHART, config.DEFAULT_CHART],
+        )
+        _create_views(conn, "raw")
 
-    # Load data from TSV
-    # Postgres COPY format uses \\N for NULL and tab delimiter
-    print("Loading raw data into DuckDB...")
+
+def build_catalog(conn):
+    """
+    Materializes charts.chart_catalog: one row per loaded chart with its
+    name, date range and size.
+    """
     conn.execute("""
-        COPY charts.uk_singles_prestreaming_raw FROM 'music_data.tsv' 
-        (DELIMITER '\\t', HEADER FALSE, NULL '\\N');
+        CREATE OR REPLACE TABLE charts.chart_catalog AS
+        SELECT
+            e.chart_id,
+            COALESCE(n.name, e.chart_id) AS name,
+            MIN(e.from_date) AS first_week,
+            MAX(e.from_date) AS last_week,
+            COUNT(DISTINCT e.from_date) AS weeks,
+            COUNT(*) AS entries
+        FROM
+            charts.chart_entries e
+            LEFT JOIN charts.chart_names n ON n.chart_id = e.chart_id
+        GROUP BY
+            e.chart_id,
+            n.name
+        ORDER BY
+            e.chart_id;
     """)
 
-    # Create the "materialized view" as a table
+
+def _relation_type(conn, name):
+    # "BASE TABLE", "VIEW" or None for a schema-qualified name
+    schema, table = name.split(".")
+    row = conn.execute(
+        """
+        SELECT table_type FROM information_schema.tables
+        WHERE table_schema = ? AND table_name = ?
+        """,
+        [schema, table],
+    ).fetchone()
+    return row[0] if row else None
+
+
+def _create_views(conn, kind):
+    """
+    Exposes each chart's rows of a per-chart table as its own view, e.g.
+    charts.uk_singles_prestreaming_scored. The chart_id filter lets DuckDB
+    skip the row groups of other charts.
+    """
+    storage = storage_table(kind)
+    chart_ids = [
+        row[0]
+        for row in conn.execute(
+            "SELECT DISTINCT chart_id FROM charts.chart_entries ORDER BY 1"
+        ).fetchall()
+    ]
+    for chart_id in chart_ids:
+        view = chart_table(chart_id, kind)
+        # Replaces the table of a single chart database
+        if _relation_type(conn, view) == "BASE TABLE":
+            conn.execute(f"DROP TABLE {view};")
+        conn.execute(f"""
+            CREATE OR REPLACE VIEW {view} AS
+            SELECT * EXCLUDE (chart_id) FROM {storage}
+            WHERE chart_id = '{check_chart_id(chart_id)}';
+        """)
+
+
+def build_scored(conn):
+    """
+    Creates the all-time scored table (the "materialized view") from the raw
+    chart positions, for every chart in one pass.
+    """
     print("Calculating scores and rankings...")
-    conn.execute("DROP TABLE IF EXISTS charts.uk_singles_prestreaming_scored;")
+    ensure_chart_entries(conn)
     conn.execute("""
-        CREATE TABLE charts.uk_singles_prestreaming_scored AS
+        CREATE OR REPLACE TABLE charts.chart_scored AS
         WITH song_weeks AS (
             SELECT
+                chart_id,
                 artist,
                 title,
                 from_date,
                 position,
                 (1.0 / position) * 100 AS score_per_week
             FROM
-                charts.uk_singles_prestreaming_raw
+                charts.chart_entries
         )
         SELECT
+            chart_id,
             artist,
             title,
             CAST(SUM(score_per_week) AS BIGINT) AS score,
@@ -55,12 +229,523 @@ def init_db():
         FROM
             song_weeks
         GROUP BY
+            chart_id,
             artist,
-            title;
+            title
+        ORDER BY
+            chart_id;
     """)
+    _create_views(conn, "scored")
 
-    print("DuckDB database created successfully: musiccharts.duckdb")
+
+def build_rollups(conn):
+    """
+    Materializes small rollup tables for common analytical questions
+    (number ones per year/decade, artist and label totals), so the LLM can
+    answer them with a lookup instead of a GROUP BY over the raw table.
+    Each is built for every chart in one pass.
+    """
+    print("Building rollup tables...")
+    ensure_chart_entries(conn)
+
+    # One row per song that reached #1, dated by its first week at the top
+    conn.execute("""
+        CREATE OR REPLACE TABLE charts.chart_number_ones AS
+        SELECT
+            chart_id,
+            artist,
+            title,
+            ARG_MIN(label, from_date) AS label,
+            MIN(from_date) AS first_week_at_top,
+            CAST(YEAR(MIN(from_date)) AS INTEGER) AS year,
+            CAST(YEAR(MIN(from_date)) // 10 * 10 AS INTEGER) AS decade,
+            COUNT(*) AS weeks_at_top
+        FROM
+            charts.chart_entries
+        WHERE
+            position = 1
+        GROUP BY
+            chart_id,
+            artist,
+            title
+        ORDER BY
+            chart_id,
+            first_week_at_top;
+    """)
+
+    conn.execute("""
+        CREATE OR REPLACE TABLE charts.chart_yearly AS
+        WITH entries AS (
+            SELECT
+                chart_id,
+                CAST(YEAR(first_charted) AS INTEGER) AS year,
+                COUNT(*) AS new_entries
+            FROM
+                charts.chart_scored
+            GROUP BY
+                1,
+                2
+        ),
+        tops AS (
+            SELECT
+                chart_id,
+                year,
+                COUNT(*) AS number_ones,
+                CAST(SUM(weeks_at_top) AS BIGINT) AS weeks_at_top
+            FROM
+                charts.chart_number_ones
+            GROUP BY
+                chart_id,
+                year
+        )
+        SELECT
+            e.chart_id,
+            e.year,
+            CAST(e.year // 10 * 10 AS INTEGER) AS decade,
+            e.new_entries,
+            COALESCE(t.number_ones, 0) AS number_ones,
+            COALESCE(t.weeks_at_top, 0) AS weeks_at_top
+        FROM
+            entries e
+            LEFT JOIN tops t ON t.chart_id = e.chart_id AND t.year = e.year
+        ORDER BY
+            e.chart_id,
+            e.year;
+    """)
+
+    conn.execute("""
+        CREATE OR REPLACE TABLE charts.chart_decades AS
+        SELECT
+            chart_id,
+            decade,
+            CAST(SUM(new_entries) AS BIGINT) AS new_entries,
+            CAST(SUM(number_ones) AS BIGINT) AS number_ones,
+            CAST(SUM(weeks_at_top) AS BIGINT) AS weeks_at_top
+        FROM
+            charts.chart_yearly
+        GROUP BY
+            chart_id,
+            decade
+        ORDER BY
+            chart_id,
+            decade;
+    """)
+
+    conn.execute("""
+        CREATE OR REPLACE TABLE charts.chart_artists AS
+        SELECT
+            chart_id,
+            artist,
+            COUNT(*) AS songs_charted,
+            COUNT(CASE WHEN peak_position = 1 THEN 1 END) AS number_ones,
+            CAST(SUM(weeks_in_chart) AS BIGINT) AS total_weeks,
+            CAST(SUM(weeks_at_top) AS BIGINT) AS weeks_at_top,
+            MIN(peak_position) AS best_peak,
+            CAST(SUM(score) AS BIGINT) AS total_score,
+            MIN(first_charted) AS first_charted
+        FROM
+            charts.chart_scored
+        GROUP BY
+            chart_id,
+            artist
+        ORDER BY
+            chart_id;
+    """)
+
+    # A song can move labels between weeks, so credit it to its first label
+    conn.execute("""
+        CREATE OR REPLACE TABLE charts.chart_labels AS
+        WITH song_labels AS (
+            SELECT
+                chart_id,
+                artist,
+                title,
+                ARG_MIN(label, from_date) AS label
+            FROM
+                charts.chart_entries
+            WHERE
+                label IS NOT NULL
+            GROUP BY
+                chart_id,
+                artist,
+                title
+        )
+        SELECT
+            l.chart_id,
+            l.label,
+            COUNT(*) AS songs_charted,
+            COUNT(DISTINCT l.artist) AS artists,
+            COUNT(CASE WHEN s.peak_position = 1 THEN 1 END) AS number_ones,
+            CAST(SUM(s.weeks_in_chart) AS BIGINT) AS total_weeks,
+            MIN(s.peak_position) AS best_peak
+        FROM
+            song_labels l
+            JOIN charts.chart_scored s
+                ON s.chart_id = l.chart_id
+                AND s.artist = l.artist
+                AND s.title = l.title
+        GROUP BY
+            l.chart_id,
+            l.label
+        ORDER BY
+            l.chart_id;
+    """)
+    for kind in ("number_ones", "yearly", "decades", "artists", "labels"):
+        _create_views(conn, kind)
+
+
+def build_week_index(conn):
+    """
+    Materializes the week index: one row per chart week with the offset and
+    length of its row range in the chart's raw rows sorted by (from_date,
+    position), for every chart.
+    """
+    print("Building week index...")
+    ensure_chart_entries(conn)
+    conn.execute("""
+        CREATE OR REPLACE TABLE charts.chart_weeks AS
+        WITH weeks AS (
+            SELECT
+                chart_id,
+                from_date,
+                MAX(to_date) AS to_date,
+                COUNT(*) AS entries
+            FROM
+                charts.chart_entries
+            GROUP BY
+                chart_id,
+                from_date
+        )
+        SELECT
+            chart_id,
+            from_date,
+            to_date,
+            CAST(
+                COALESCE(
+                    SUM(entries) OVER (
+                        PARTITION BY chart_id
+                        ORDER BY from_date
+                        ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING
+                    ),
+                    0
+                ) AS BIGINT
+            ) AS row_offset,
+            entries
+        FROM
+            weeks
+        ORDER BY
+            chart_id,
+            from_date;
+    """)
+    _create_views(conn, "weeks")
+
+
+def build_trigram_index(conn):
+    """
+    Builds a trigram index over each chart's distinct artists and titles,
+    plus the `charts.fuzzy_match(chart, kind, text)` table macro that ranks a
+    chart's canonical names by trigram similarity to user-typed (possibly
+    misspelled) text.
+
+    Trigrams follow pg_trgm: the text is uppercased, split into alphanumeric
+    words, and each word is padded with two leading and one trailing space.
+    Similarity is shared trigrams over the union of both trigram sets.
+    """
+    print("Building trigram index...")
+    # Names of every chart share one index, keyed by chart. A database that
+    # only has a single chart's scored table is indexed as the default chart.
+    scored = storage_table("scored")
+    chart_id = "chart_id"
+    if not _relation_type(conn, scored):
+        scored = chart_table(config.DEFAULT_CHART, "scored")
+        chart_id = f"'{check_chart_id(config.DEFAULT_CHART)}'"
+    conn.execute(f"""
+        CREATE OR REPLACE TABLE charts.name_trigrams AS
+        WITH names AS (
+            SELECT DISTINCT {chart_id} AS chart_id, 'artist' AS kind, artist AS name
+            FROM {scored}
+            UNION
+            SELECT DISTINCT {chart_id} AS chart_id, 'title' AS kind, title AS name
+            FROM {scored}
+        ),
+        words AS (
+            SELECT
+                chart_id,
+                kind,
+                name,
+                '  ' || UNNEST(regexp_extract_all(UPPER(name), '[A-Z0-9]+')) || ' '
+                    AS padded
+            FROM
+                names
+        )
+        SELECT DISTINCT
+            chart_id,
+            kind,
+            SUBSTRING(padded, UNNEST(range(1, LENGTH(padded) - 1)), 3) AS trigram,
+            name
+        FROM
+            words
+        ORDER BY
+            chart_id,
+            kind,
+            trigram;
+    """)
+
+    conn.execute("""
+        CREATE OR REPLACE TABLE charts.name_index AS
+        SELECT
+            chart_id,
+            kind,
+            name,
+            COUNT(*) AS trigram_count
+        FROM
+            charts.name_trigrams
+        GROUP BY
+            chart_id,
+            kind,
+            name
+        ORDER BY
+            chart_id,
+            kind,
+            name;
+    """)
+
+    conn.execute("""
+        CREATE OR REPLACE MACRO charts.fuzzy_match(match_chart, match_kind, match_text)
+        AS TABLE
+        WITH words AS (
+            SELECT
+                '  ' || UNNEST(regexp_extract_all(UPPER(match_text), '[A-Z0-9]+'))
+                    || ' ' AS padded
+        ),
+        query AS (
+            SELECT DISTINCT
+                SUBSTRING(padded, UNNEST(range(1, LENGTH(padded) - 1)), 3) AS trigram
+            FROM
+                words
+        ),
+        hits AS (
+            SELECT
+                t.name,
+                COUNT(*) AS shared
+            FROM
+                charts.name_trigrams t
+                JOIN query q ON q.trigram = t.trigram
+            WHERE
+                t.chart_id = match_chart
+                AND t.kind = match_kind
+            GROUP BY
+                t.name
+        )
+        SELECT
+            h.name,
+            h.shared / ((SELECT COUNT(*) FROM query) + n.trigram_count - h.shared)
+                AS similarity
+        FROM
+            hits h
+            JOIN charts.name_index n
+                ON n.chart_id = match_chart
+                AND n.kind = match_kind
+                AND n.name = h.name
+        ORDER BY
+            similarity DESC,
+            h.name;
+    """)
+
+
+def build_runs(conn):
+    """
+    Computes per-song chart-run statistics (runs, re-entries, longest run,
+    biggest climb, rise to peak) in a single sorted window pass over the raw
+    table, for every chart, and materializes them as charts.chart_runs (read
+    per chart as e.g. charts.uk_singles_prestreaming_runs).
+
+    A run is a stretch of consecutive chart weeks. As in the chart plots, a
+    gap of more than 9 days between entries starts a new run (a re-entry).
+    """
+    print("Computing chart-run statistics...")
+    ensure_chart_entries(conn)
+    conn.execute("""
+        CREATE OR REPLACE TABLE charts.chart_runs AS
+        WITH weeks AS (
+            SELECT
+                chart_id,
+                artist,
+                title,
+                from_date,
+                position,
+                ROW_NUMBER() OVER w AS chart_week,
+                COALESCE(from_date - LAG(from_date) OVER w > 9, TRUE) AS new_run,
+                LAG(position) OVER w - position AS climb,
+                MIN(position) OVER (PARTITION BY chart_id, artist, title)
+                    AS peak_position
+            FROM
+                charts.chart_entries
+            WINDOW w AS (PARTITION BY chart_id, artist, title ORDER BY from_date)
+        ),
+        numbered AS (
+            SELECT
+                *,
+                SUM(CAST(new_run AS INTEGER)) OVER (
+                    PARTITION BY chart_id, artist, title ORDER BY from_date
+                ) AS run_number
+            FROM
+                weeks
+        ),
+        runs AS (
+            SELECT
+                chart_id,
+                artist,
+                title,
+                run_number,
+                COUNT(*) AS run_length,
+                MAX(CASE WHEN NOT new_run THEN climb END) AS biggest_climb,
+                MIN(CASE WHEN position = peak_position THEN chart_week END)
+                    AS weeks_to_peak,
+                MIN(CASE WHEN position = 1 THEN chart_week END) AS weeks_to_top,
+                ARG_MIN(position, from_date) AS entry_position,
+                MIN(from_date) AS entry_date
+            FROM
+                numbered
+            GROUP BY
+                chart_id,
+                artist,
+                title,
+                run_number
+        )
+        SELECT
+            chart_id,
+            artist,
+            title,
+            MIN(entry_date) AS debut_date,
+            ARG_MIN(entry_position, run_number) AS debut_position,
+            CAST(COUNT(*) AS INTEGER) AS runs,
+            CAST(COUNT(*) - 1 AS INTEGER) AS reentries,
+            CAST(MAX(run_length) AS INTEGER) AS longest_run,
+            CASE WHEN MAX(biggest_climb) > 0 THEN MAX(biggest_climb) END
+                AS biggest_climb,
+            CAST(MIN(weeks_to_peak) AS INTEGER) AS weeks_to_peak,
+            CAST(MIN(weeks_to_top) AS INTEGER) AS weeks_to_top
+        FROM
+            runs
+        GROUP BY
+            chart_id,
+            artist,
+            title
+        ORDER BY
+            chart_id;
+    """)
+    _create_views(conn, "runs")
+
+
+def build_score_index(conn):
+    """
+    Builds the cumulative score index, for rankings over any date range.
+
+    For every song there is one row per chart week it charted in, holding
+    the week's ordinal on the chart's week axis and the song's running
+    totals of score (100 / position points, as in the all-time score) and
+    weeks at number 1 before and through that week. A song's score between
+    two weeks is then the difference of two running totals, which
+    score_index.ScoreIndex looks up per song, and the
+    `charts.range_scores(chart, start_date, end_date)` table macro takes
+    from the rows in the range. Rows are sorted by chart and week, so the
+    macro only reads the row groups of the range.
+    """
+    print("Building cumulative score index...")
+    ensure_chart_entries(conn)
+    conn.execute("""
+        CREATE OR REPLACE TABLE charts.chart_cumulative AS
+        WITH song_weeks AS (
+            SELECT
+                chart_id,
+                CAST(
+                    DENSE_RANK() OVER (PARTITION BY chart_id ORDER BY artist, title) - 1
+                    AS INTEGER
+                ) AS song_id,
+                artist,
+                title,
+                CAST(
+                    DENSE_RANK() OVER (PARTITION BY chart_id ORDER BY from_date) - 1
+                    AS INTEGER
+                ) AS week,
+                from_date,
+                (1.0 / position) * 100 AS score,
+                CAST(position = 1 AS INTEGER) AS at_top
+            FROM
+                charts.chart_entries
+        ),
+        running AS (
+            SELECT
+                *,
+                SUM(score) OVER song AS score_through,
+                CAST(SUM(at_top) OVER song AS INTEGER) AS top_through
+            FROM
+                song_weeks
+            WINDOW song AS (
+                PARTITION BY chart_id, song_id
+                ORDER BY week
+                ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW
+            )
+        )
+        SELECT
+            chart_id,
+            song_id,
+            artist,
+            title,
+            week,
+            from_date,
+            score_through - score AS score_before,
+            score_through,
+            top_through - at_top AS top_before,
+            top_through
+        FROM
+            running
+        ORDER BY
+            chart_id,
+            week,
+            song_id;
+    """)
+    _create_views(conn, "cumulative")
+
+    conn.execute("""
+        CREATE OR REPLACE MACRO charts.range_scores(chart, start_date, end_date)
+        AS TABLE
+        SELECT
+            artist,
+            title,
+            CAST(MAX(score_through) - MIN(score_before) AS BIGINT) AS score,
+            COUNT(*) AS weeks,
+            MAX(top_through) - MIN(top_before) AS weeks_at_top
+        FROM
+            charts.chart_cumulative
+        WHERE
+            chart_id = chart
+            AND from_date BETWEEN CAST(start_date AS DATE) AND CAST(end_date AS DATE)
+        GROUP BY
+            artist,
+            title
+        ORDER BY
+            score DESC,
+            weeks DESC,
+            artist,
+            title;
+    """)
 
 
 if __name__ == "__main__":
-    init_db()
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build the chart database")
+    parser.add_argument("--db", default="musiccharts.duckdb")
+    parser.add_argument(
+        "--data", default="music_data.tsv", help="chart data, .tsv or .parquet"
+    )
+    parser.add_argument(
+        "--chart",
+        default=config.DEFAULT_CHART,
+        help="id of the chart to load or replace; other charts are kept",
+    )
+    parser.add_argument("--name", help="display name of the chart")
+    args = parser.parse_args()
+    init_db(args.db, args.data, args.chart, args.name)
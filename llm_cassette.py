@@ -0,0 +1,117 @@
+import functools
+import hashlib
+import json
+import os
+import threading
+import time
+from types import SimpleNamespace
+
+
+class CassetteMiss(LookupError):
+    """Raised when replaying a request that was never recorded."""
+
+
+class Cassette:
+    """
+    Records OpenAI chat completions to a local JSON file and replays them.
+
+    Requests are keyed by model, temperature and the full message list, so
+    a replay only matches when the prompt (including retry feedback) is
+    exactly what was recorded. Changing the prompt or the schema context
+    needs a new recording; changing SQL extraction or validation does not.
+
+    In "replay" mode a request that is not on the cassette raises
+    CassetteMiss and nothing touches the network. In "record" mode recorded
+    requests are still replayed, and only the others go to the real client
+    and are saved.
+    """
+
+    def __init__(self, path, mode="replay"):
+        if mode not in ("replay", "record"):
+            raise ValueError(f"Unknown cassette mode: {mode!r}")
+        self.path = path
+        self.mode = mode
+        self.calls = 0
+        self.hits = 0
+        self.recorded = 0
+        # Recorded latency of the completions served from the cassette
+        self.replayed_ms = 0.0
+        self._lock = threading.Lock()
+        self._interactions = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                self._interactions = json.load(f).get("interactions", {})
+
+    def __len__(self):
+        return len(self._interactions)
+
+    def client(self, real_client=None):
+        """
+        Returns an object usable in place of an OpenAI client by
+        ai_client.get_sql_from_llm. Record mode needs the real client.
+        """
+        if self.mode == "record" and real_client is None:
+            raise ValueError("Recording needs a real OpenAI client.")
+        create = functools.partial(self._create, real_client)
+        return SimpleNamespace(
+            chat=SimpleNamespace(completions=SimpleNamespace(create=create))
+        )
+
+    def _create(self, real_client, model, messages, temperature=None, **kwargs):
+        key = request_key(model, messages, temperature)
+        with self._lock:
+            self.calls += 1
+            interaction = self._interactions.get(key)
+            if interaction is not None:
+                self.hits += 1
+                self.replayed_ms += interaction.get("elapsed_ms", 0.0)
+        if interaction is None:
+            if self.mode == "replay":
+                raise CassetteMiss(
+                    f"No recorded completion for this request in {self.path}; "
+                    "record it first."
+                )
+            start = time.perf_counter()
+            response = real_client.chat.completions.create(
+                model=model, messages=messages, temperature=temperature, **kwargs
+            )
+            interaction = {
+                "model": model,
+                "temperature": temperature,
+                # Copied, as ai_client appends to the list on retry
+                "messages": [dict(m) for m in messages],
+                "content": response.choices[0].message.content,
+                "elapsed_ms": round((time.perf_counter() - start) * 1000, 1),
+            }
+            with self._lock:
+                self._interactions[key] = interaction
+                self.recorded += 1
+                self._save()
+        return _response(interaction["content"])
+
+    def _save(self):
+        # Written in full after every recording, via a temp file, so an
+        # interrupted run keeps what it recorded so far
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(
+                {"version": 1, "interactions": self._interactions},
+                f,
+                indent=2,
+                sort_keys=True,
+            )
+        os.replace(tmp_path, self.path)
+
+
+def request_key(model, messages, temperature):
+    payload = json.dumps(
+        {"model": model, "messages": messages, "temperature": temperature},
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _response(content):
+    # Just the parts of a ChatCompletion that ai_client reads
+    message = SimpleNamespace(content=content)
+    return SimpleNamespace(choices=[SimpleNamespace(message=message)])
@@ -1,12 +1,38 @@
+import logging
+import time
+import uuid
 import streamlit as st
 
-from database import get_connection
+from chart_db import get_db_version, is_select_only
+from database import (
+    get_charts,
+    get_comparison,
+    get_connection,
+    get_histories,
+    get_result_store,
+    get_schema_context,
+    get_week_index,
+)
 from ai_client import get_sql_from_llm
 from artwork_client import get_artwork_url
+from artwork_prefetch import SELECTED, ArtworkPrefetcher
 from styles import apply_retro_style
-from ui_components import plot_song_chart, render_metrics, render_artwork
+from ui_components import (
+    plot_comparison,
+    plot_song_chart,
+    render_metrics,
+    render_artwork,
+    render_week_chart,
+)
 from config import config
-from schema_definitions import SCHEMA_ALL
+from scoring import get_engine as get_scoring_engine
+from slow_query_log import record_if_slow
+from telemetry import StageTimer, stage
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(levelname)s - %(message)s",
+)
 
 # Page Config
 st.set_page_config(
@@ -21,7 +47,7 @@ apply_retro_style()
 
 # Database Connection
 try:
-    conn = get_connection()
+    conn = get_connection(get_db_version())
 except Exception as e:
     st.error(f"Failed to connect to database: {e}")
     st.stop()
@@ -34,6 +60,43 @@ st.markdown(
 )
 
 
+# --- CHART SELECTION ---
+try:
+    charts = {c["chart_id"]: c["name"] for c in get_charts(get_db_version())}
+except Exception:
+    # Database unavailable; reported where it is used
+    charts = {}
+chart_ids = list(charts) or [config.DEFAULT_CHART]
+if len(chart_ids) > 1:
+    chart_id = st.selectbox(
+        "Chart",
+        chart_ids,
+        index=chart_ids.index(config.DEFAULT_CHART)
+        if config.DEFAULT_CHART in chart_ids
+        else 0,
+        format_func=lambda c: charts.get(c, c),
+    )
+else:
+    chart_id = chart_ids[0]
+
+
+# --- WEEKLY CHART (answered from the week index, no LLM) ---
+with st.expander("📅 Chart for a specific week", expanded=False):
+    week_index = get_week_index(get_db_version(), chart_id)
+    if week_index is None or not week_index.week_starts:
+        st.error("Database unavailable")
+    else:
+        chart_date = st.date_input(
+            "Week containing",
+            value=None,
+            min_value=week_index.week_starts[0],
+            max_value=week_index.week_ends[-1],
+            format="YYYY-MM-DD",
+        )
+        if chart_date:
+            render_week_chart(week_index.get_chart(chart_date))
+
+
 # --- CONFIGURATION ---
 api_key = config.OPENAI_API_KEY
 show_sql_debug = config.SHOW_SQL_DEBUG
@@ -59,12 +122,49 @@ with st.form("search_form"):
 # --- LOGIC & STATE MANAGEMENT ---
 
 # Initialize Session State
-if "search_results" not in st.session_state:
-    st.session_state.search_results = None
+# Results live in the memory-bounded result store; the session only keeps
+# the id of its latest result
+if "session_id" not in st.session_state:
+    st.session_state.session_id = uuid.uuid4().hex
+if "result_id" not in st.session_state:
+    st.session_state.result_id = None
 if "generated_sql" not in st.session_state:
     st.session_state.generated_sql = None
 if "last_question" not in st.session_state:
     st.session_state.last_question = ""
+if "rows_shown" not in st.session_state:
+    st.session_state.rows_shown = config.QUERY_PAGE_SIZE
+if "history_songs" not in st.session_state:
+    st.session_state.history_songs = ()
+if "result_chart" not in st.session_state:
+    st.session_state.result_chart = chart_id
+
+# Chart runs for up to this many result rows are loaded with the results
+HISTORY_PREFETCH_ROWS = 500
+
+# Artwork for the first rows of the table is looked up while the user reads
+ARTWORK_PREFETCH_ROWS = 10
+
+
+@st.cache_resource(show_spinner=False)
+def get_artwork_prefetcher():
+    """One background artwork worker per server process."""
+    return ArtworkPrefetcher(get_artwork_url)
+
+
+def prefetch_histories(df, chart_id):
+    """
+    Loads the chart runs of every song in the results with one query, so
+    selecting a row only renders. Returns the songs, which are the key of
+    the cached histories: the session keeps that rather than the histories.
+    """
+    if "artist" not in df.columns or "title" not in df.columns:
+        return ()
+    songs = zip(df["artist"].astype(str), df["title"].astype(str))
+    songs = tuple(dict.fromkeys(songs))[:HISTORY_PREFETCH_ROWS]
+    with stage("history"):
+        get_histories(songs, get_db_version(), chart_id)
+    return songs
 
 
 # Handling Form Submission
@@ -83,19 +183,25 @@ if submit_button and question:
         """
         if not conn:
             return False, "Database unavailable"
+        # The in-memory database is writable, and EXPLAIN runs every
+        # statement but the last, so anything but SELECT is rejected first
+        if not is_select_only(conn, sql):
+            return False, "Only SELECT queries are allowed."
 
         try:
-            conn.execute(f"EXPLAIN {sql}")
+            with get_scoring_engine().pinned(sql):
+                conn.execute(f"EXPLAIN {sql}")
             return True, None
         except Exception as e:
             return False, str(e)
 
     # Generate SQL
-    with st.spinner("Analyzing your request..."):
+    timer = StageTimer()
+    with st.spinner("Analyzing your request..."), timer.activate():
         try:
             sql_query = get_sql_from_llm(
                 question,
-                SCHEMA_ALL,
+                get_schema_context(get_db_version(), chart_id),
                 DEFAULT_LIMIT,
                 validation_callback=validate_sql_callback,
             )
@@ -105,13 +211,25 @@ if submit_button and question:
             st.session_state.generated_sql = sql_query
 
             # Validate Safety
-            if not sql_query.lower().strip().startswith("select"):
+            if not sql_query.lower().strip().startswith("select") or not is_select_only(
+                conn, sql_query
+            ):
                 st.error("For safety, only SELECT queries are allowed.")
-                st.session_state.search_results = None
+                st.session_state.result_id = None
             else:
                 # Execute Query
-                df = conn.execute(sql_query).df()
-                st.session_state.search_results = df
+                start = time.perf_counter()
+                with stage("execute"), get_scoring_engine().pinned(sql_query):
+                    df = conn.execute(sql_query).df()
+                record_if_slow(
+                    question, sql_query, (time.perf_counter() - start) * 1000, len(df)
+                )
+                st.session_state.result_id = get_result_store().put(
+                    st.session_state.session_id, df
+                )
+                st.session_state.rows_shown = config.QUERY_PAGE_SIZE
+                st.session_state.result_chart = chart_id
+                st.session_state.history_songs = prefetch_histories(df, chart_id)
 
         except Exception as e:
             if 'relation "charts.uk_singles_prestreaming_scored" does not exist' in str(
@@ -122,7 +240,10 @@ if submit_button and question:
                 )
             else:
                 st.error(f"An error occurred: {e}")
-            st.session_state.search_results = None
+            st.session_state.result_id = None
+
+    logging.info(f"Timings for {question!r}: {timer.summary()}")
+    st.session_state.timings = timer.summary()
 
 
 # --- RENDER RESULTS (Persisted State) ---
@@ -130,18 +251,31 @@ if submit_button and question:
 if st.session_state.generated_sql and show_sql_debug:
     with st.expander("View Generated SQL (Debug)", expanded=False):
         st.code(st.session_state.generated_sql, language="sql")
+        if st.session_state.get("timings"):
+            st.caption(f"Timings: {st.session_state.timings}")
+
+if show_sql_debug:
+    with st.expander("Result Store (Debug)", expanded=False):
+        st.json(get_result_store().stats(st.session_state.session_id))
 
-if st.session_state.search_results is not None:
-    df = st.session_state.search_results
+df = None
+if st.session_state.result_id is not None:
+    df = get_result_store().get(st.session_state.session_id, st.session_state.result_id)
+    if df is None:
+        st.warning("These results are no longer available. Please ask again.")
+        st.session_state.result_id = None
 
+if df is not None:
     if df.empty:
         st.warning("No results found for your query.")
     else:
         st.success(f"Found {len(df)} results")
 
         # Enhanced Dataframe Display
+        # Render one page at a time; row positions match df, so the
+        # selection below still indexes the full frame
         event = st.dataframe(
-            df,
+            df.head(st.session_state.rows_shown),
             use_container_width=True,
             column_config={
                 "position": st.column_config.NumberColumn("Rank", format="%d"),
@@ -159,6 +293,52 @@ if st.session_state.search_results is not None:
             selection_mode="single-row",
         )
 
+        if "artist" in df.columns and "title" in df.columns:
+            # Runs on every rerun; songs already queued or looked up are
+            # not queued again
+            prefetcher = get_artwork_prefetcher()
+            for artist, title in (
+                df[["artist", "title"]].head(ARTWORK_PREFETCH_ROWS).values
+            ):
+                prefetcher.request(str(artist), str(title))
+
+        if len(df) > st.session_state.rows_shown:
+
+            def show_more_rows():
+                st.session_state.rows_shown += config.QUERY_PAGE_SIZE
+
+            st.caption(f"Showing {st.session_state.rows_shown} of {len(df)} results")
+            st.button("Load more", on_click=show_more_rows)
+
+    # Comparison of several chart runs from the results
+    if not df.empty and "artist" in df.columns and "title" in df.columns:
+        with st.expander("📊 Compare chart runs", expanded=False):
+            songs = list(
+                dict.fromkeys(zip(df["artist"].astype(str), df["title"].astype(str)))
+            )
+            chosen = st.multiselect(
+                "Songs",
+                options=range(len(songs)),
+                default=range(min(10, len(songs))),
+                format_func=lambda i: f"{songs[i][0]} - {songs[i][1]}",
+            )
+            align = st.radio(
+                "Align by",
+                ["debut", "date"],
+                format_func=lambda a: "Weeks since debut" if a == "debut" else "Date",
+                horizontal=True,
+            )
+            if chosen:
+                with stage("comparison"):
+                    aligned = get_comparison(
+                        tuple(songs[i] for i in chosen),
+                        align,
+                        get_db_version(),
+                        st.session_state.result_chart,
+                    )
+                if aligned is not None:
+                    plot_comparison(aligned, align)
+
     # Visualization Logic
     # Check if we have artist/title columns to plot history
     if not df.empty and "artist" in df.columns and "title" in df.columns:
@@ -175,16 +355,18 @@ if st.session_state.search_results is not None:
         st.markdown("---")
         st.subheader(f"📈 History: {artist_name} - {song_title}")
 
-        # Fetch history
-        history_query = """
-            SELECT from_date, to_date, position 
-            FROM charts.uk_singles_prestreaming_raw 
-            WHERE artist = ? AND title = ? 
-            ORDER BY from_date
-        """
-        hist_df = conn.execute(history_query, [artist_name, song_title]).df()
-
-        if not hist_df.empty:
+        # History was prefetched with the results; rows beyond the prefetch
+        # limit are loaded on selection (and cached too)
+        song = (str(artist_name), str(song_title))
+        songs = st.session_state.history_songs
+        if song not in songs:
+            songs = (song,)
+        with stage("history"):
+            hist_df = get_histories(
+                songs, get_db_version(), st.session_state.result_chart
+            ).get(song)
+
+        if hist_df is not None and not hist_df.empty:
             # Calculate Metrics
             peak_pos = hist_df["position"].min()
             weeks_on_chart = len(hist_df)
@@ -200,6 +382,9 @@ if st.session_state.search_results is not None:
             # 2. Render Chart Immediately
             plot_song_chart(hist_df, f"Chart Run: {song_title}")
 
-            # 3. Fetch and Render Artwork (this happens last so UI is not blocked)
+            # 3. Artwork is looked up in the background and fills in when ready
+            artwork = get_artwork_prefetcher().request(
+                str(artist_name), str(song_title), priority=SELECTED
+            )
             with col_art:
-                render_artwork(artist_name, song_title, get_artwork_url)
+                render_artwork(artist_name, song_title, artwork)
@@ -0,0 +1,42 @@
+from chart_catalog import check_chart_id
+from config import config
+
+
+def resolve_name(conn, text, kind="artist", limit=5, min_similarity=0.3, chart_id=None):
+    """
+    Maps user-typed text to canonical artist or title keys using the trigram
+    index built by init_duckdb.py.
+
+    Args:
+        conn: DuckDB connection.
+        text: The name as the user typed it, e.g. "bohemian rapsody".
+        kind: "artist" or "title".
+        limit: Maximum number of candidates to return.
+        min_similarity: Drop candidates scoring below this (0 to 1).
+        chart_id: Chart whose names are matched (default: DEFAULT_CHART).
+
+    Returns:
+        List of (name, similarity) tuples, best match first. Names are the
+        exact values stored in the chart's tables, so they can be used in
+        `artist = ?` / `title = ?` filters.
+    """
+    if kind not in ("artist", "title"):
+        raise ValueError(f"Unknown name kind: {kind}")
+    if not text or not text.strip():
+        return []
+
+    return conn.execute(
+        """
+        SELECT name, similarity
+        FROM charts.fuzzy_match(?, ?, ?)
+        WHERE similarity >= ?
+        LIMIT ?
+        """,
+        [
+            check_chart_id(chart_id or config.DEFAULT_CHART),
+            kind,
+            text,
+            min_similarity,
+            limit,
+        ],
+    ).fetchall()
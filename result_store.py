@@ -0,0 +1,170 @@
+import collections
+import os
+import shutil
+import threading
+import uuid
+
+import pyarrow as pa
+import pyarrow.feather as feather
+
+
+class _Entry:
+    def __init__(self, session_id, table):
+        self.session_id = session_id
+        self.table = table
+        self.nbytes = table.nbytes
+        self.spill_path = None
+        self.spill_bytes = 0
+
+
+class ResultStore:
+    """
+    Keeps query results for Streamlit sessions as Arrow tables, within
+    memory bounds.
+
+    Results over the per-session or global memory cap are spilled to Arrow
+    files on local disk, least recently used first, and read back
+    (memory-mapped) when next requested. Each session keeps at most
+    `max_results_per_session` results, and spilled files are deleted
+    oldest-first beyond `max_spill_bytes`, so abandoned sessions cannot
+    fill the disk either.
+    """
+
+    def __init__(
+        self,
+        spill_dir,
+        max_session_bytes,
+        max_total_bytes,
+        max_spill_bytes,
+        max_results_per_session=10,
+    ):
+        self.spill_dir = spill_dir
+        self.max_session_bytes = max_session_bytes
+        self.max_total_bytes = max_total_bytes
+        self.max_spill_bytes = max_spill_bytes
+        self.max_results_per_session = max_results_per_session
+        # result_id -> _Entry, least recently used first
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self.spills = 0
+        self.reloads = 0
+
+    def put(self, session_id, df):
+        """Stores a DataFrame for a session and returns its result id."""
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        result_id = uuid.uuid4().hex
+        with self._lock:
+            self._entries[result_id] = _Entry(session_id, table)
+            self._drop_oldest_results(session_id)
+            self._enforce_limits(session_id)
+        return result_id
+
+    def get(self, session_id, result_id):
+        """
+        Returns the stored result as a DataFrame, reading it back from disk
+        if it was spilled, or None if it is unknown or has been dropped.
+        """
+        with self._lock:
+            entry = self._entries.get(result_id)
+            if entry is None or entry.session_id != session_id:
+                return None
+            self._entries.move_to_end(result_id)
+            if entry.table is None:
+                try:
+                    source = pa.memory_map(entry.spill_path)
+                    entry.table = pa.ipc.open_file(source).read_all()
+                except OSError:
+                    self._drop(result_id)
+                    return None
+                self.reloads += 1
+                self._enforce_limits(session_id)
+            table = entry.table
+        return table.to_pandas()
+
+    def clear_spill_dir(self):
+        """Removes spill files left behind by a previous server process."""
+        shutil.rmtree(self.spill_dir, ignore_errors=True)
+
+    def stats(self, session_id=None):
+        with self._lock:
+            in_memory = [e for e in self._entries.values() if e.table is not None]
+            stats = {
+                "results": len(self._entries),
+                "in_memory": len(in_memory),
+                "memory_bytes": sum(e.nbytes for e in in_memory),
+                "spilled": sum(1 for e in self._entries.values() if e.spill_path),
+                "spill_bytes": self._spill_bytes(),
+                "spills": self.spills,
+                "reloads": self.reloads,
+                "max_session_bytes": self.max_session_bytes,
+                "max_total_bytes": self.max_total_bytes,
+            }
+            if session_id is not None:
+                stats["session_memory_bytes"] = self._memory_bytes(session_id)
+                stats["session_results"] = sum(
+                    1 for e in self._entries.values() if e.session_id == session_id
+                )
+            return stats
+
+    # The methods below are called with the lock held
+
+    def _enforce_limits(self, session_id):
+        # The most recently used entry stays in memory even if it alone is
+        # over a cap, since it is about to be read
+        newest = next(reversed(self._entries))
+        for result_id, entry in list(self._entries.items()):
+            if result_id == newest:
+                break
+            if entry.table is None:
+                continue
+            over_session = (
+                entry.session_id == session_id
+                and self._memory_bytes(session_id) > self.max_session_bytes
+            )
+            if over_session or self._memory_bytes() > self.max_total_bytes:
+                self._spill(entry, result_id)
+        self._limit_spill_bytes()
+
+    def _spill(self, entry, result_id):
+        if entry.spill_path is None:
+            session_dir = os.path.join(self.spill_dir, entry.session_id)
+            os.makedirs(session_dir, exist_ok=True)
+            path = os.path.join(session_dir, f"{result_id}.arrow")
+            feather.write_feather(entry.table, path, compression="uncompressed")
+            entry.spill_path = path
+            entry.spill_bytes = os.path.getsize(path)
+            self.spills += 1
+        entry.table = None
+
+    def _limit_spill_bytes(self):
+        for result_id, entry in list(self._entries.items()):
+            if self._spill_bytes() <= self.max_spill_bytes:
+                return
+            if entry.table is None:
+                self._drop(result_id)
+
+    def _drop_oldest_results(self, session_id):
+        session_results = [
+            rid for rid, e in self._entries.items() if e.session_id == session_id
+        ]
+        for result_id in session_results[: -self.max_results_per_session]:
+            self._drop(result_id)
+
+    def _drop(self, result_id):
+        entry = self._entries.pop(result_id)
+        if entry.spill_path:
+            try:
+                os.remove(entry.spill_path)
+            except OSError:
+                pass
+
+    def _memory_bytes(self, session_id=None):
+        return sum(
+            e.nbytes
+            for e in self._entries.values()
+            if e.table is not None
+            and (session_id is None or e.session_id == session_id)
+        )
+
+    def _spill_bytes(self):
+        return sum(e.spill_bytes for e in self._entries.values() if e.spill_path)
@@ -0,0 +1,221 @@
+"""
+Builds the schema context given to the LLM from the database itself.
+
+Tables and column types come from information_schema (as inspect_schema.py
+lists them), the meaning of each table and column from schema_definitions,
+and each column gets cheap statistics from one scan of its table: the
+range of dates and numbers, and for text the distinct count and the most
+common values, which show the LLM how names are written (upper case) and
+keep it from filtering on values that do not occur.
+
+Building it scans every described table, so the text is cached on disk in
+SCHEMA_CACHE_PATH, keyed by the database version (chart_db.get_db_version)
+and a hash of the descriptions defined in code: it is built once per database
+build or description change, not per process or request.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import scoring
+from chart_catalog import chart_table, check_chart_id
+from config import config
+from schema_definitions import (
+    ROLLUP_KINDS,
+    ROLLUPS_NOTE,
+    SCHEMA_NAME_LOOKUP,
+    SCHEMA_RANGE_SCORES,
+    TABLES,
+)
+
+# Tables described by default, and those described to the API's LLM, which
+# does not get the raw weekly table
+ALL_KINDS = tuple(TABLES)
+QUERY_KINDS = tuple(kind for kind in TABLES if kind != "raw")
+
+# Most common values shown for text columns
+EXAMPLE_VALUES = 3
+
+_NUMBER_TYPES = ("TINYINT", "SMALLINT", "INTEGER", "BIGINT", "HUGEINT", "DOUBLE")
+_NUMBER_TYPES += ("FLOAT", "DECIMAL", "UTINYINT", "USMALLINT", "UINTEGER", "UBIGINT")
+
+
+def get_schema_context(connect, db_version, chart_id=None, kinds=ALL_KINDS):
+    """
+    Returns the schema context of a chart's tables, from the disk cache if it
+    was built for `db_version` and the current descriptions. Otherwise it is built on a connection from
+    `connect()` and cached.
+    """
+    key = f"{chart_id or config.DEFAULT_CHART}:{','.join(kinds)}"
+    cached = _read_cache(db_version)
+    if key in cached:
+        return cached[key]
+
+    conn = connect()
+    try:
+        context = build_schema_context(conn, chart_id, kinds)
+    finally:
+        conn.close()
+    # Re-read in case another process added a context meanwhile
+    cached = _read_cache(db_version)
+    cached[key] = context
+    _write_cache(db_version, cached)
+    return context
+
+
+def build_schema_context(conn, chart_id=None, kinds=ALL_KINDS):
+    """Describes a chart's tables (by chart_catalog kind) and the name lookup."""
+    sections = []
+    rollups_noted = False
+    for kind in kinds:
+        table = chart_table(chart_id, kind)
+        columns = _columns(conn, table)
+        if not columns:
+            # Not built in this database
+            continue
+        if kind in ROLLUP_KINDS and not rollups_noted:
+            sections.append(ROLLUPS_NOTE)
+            rollups_noted = True
+        note, descriptions = TABLES.get(kind, ("", {}))
+        rows, stats = _column_stats(conn, table, columns)
+        lines = [f"Table: {table} ({rows:,} rows)"]
+        if note:
+            lines.append(note)
+        lines.append("Columns:")
+        for name, data_type in columns:
+            line = f"- {name} ({data_type.lower()})"
+            details = " ".join(
+                part for part in (descriptions.get(name), stats.get(name)) if part
+            )
+            lines.append(f"{line}: {details}" if details else line)
+        sections.append("\n".join(lines))
+
+    chart_id = check_chart_id(chart_id or config.DEFAULT_CHART)
+    if "scored" in kinds:
+        sections.append(scoring.describe(chart_id))
+        if _has_macro(conn, "range_scores"):
+            sections.append(SCHEMA_RANGE_SCORES.format(chart_id=chart_id).strip())
+    if _has_macro(conn, "fuzzy_match"):
+        sections.append(SCHEMA_NAME_LOOKUP.format(chart_id=chart_id).strip())
+    return "\n\n".join(sections) + "\n"
+
+
+def _columns(conn, table):
+    schema, name = table.split(".")
+    return conn.execute(
+        """
+        SELECT column_name, data_type
+        FROM information_schema.columns
+        WHERE table_catalog = current_database()
+            AND table_schema = ? AND table_name = ?
+        ORDER BY ordinal_position
+        """,
+        [schema, name],
+    ).fetchall()
+
+
+def _column_stats(conn, table, columns):
+    """
+    Returns the table's row count and a description of each column's
+    values, gathered in one scan plus one small query per text column.
+    """
+    aggregates = ["count(*)"]
+    kinds = {}
+    for name, data_type in columns:
+        column = f'"{name}"'
+        if data_type.startswith(_NUMBER_TYPES) or data_type in ("DATE", "TIMESTAMP"):
+            kinds[name] = "range"
+            aggregates += [f"min({column})", f"max({column})"]
+        elif data_type == "VARCHAR":
+            kinds[name] = "text"
+            aggregates.append(f"count(DISTINCT {column})")
+    values = iter(
+        conn.execute(f"SELECT {', '.join(aggregates)} FROM {table}").fetchone()
+    )
+    rows = next(values)
+
+    stats = {}
+    for name, kind in kinds.items():
+        if kind == "range":
+            low, high = next(values), next(values)
+            if low is not None:
+                stats[name] = f"{low} to {high}." if low != high else f"Always {low}."
+            continue
+        distinct = next(values)
+        if not distinct:
+            continue
+        examples = conn.execute(f"""
+            SELECT "{name}" FROM {table}
+            WHERE "{name}" IS NOT NULL
+            GROUP BY ALL
+            ORDER BY count(*) DESC, "{name}"
+            LIMIT {EXAMPLE_VALUES}
+        """).fetchall()
+        quoted = ", ".join(
+            "'" + value.replace("'", "''") + "'" for (value,) in examples
+        )
+        stats[name] = f"{distinct:,} distinct, e.g. {quoted}."
+    return rows, stats
+
+
+def _has_macro(conn, name):
+    (found,) = conn.execute(
+        """
+        SELECT count(*) > 0 FROM duckdb_functions()
+        WHERE database_name = current_database()
+            AND schema_name = 'charts' AND function_name = ?
+        """,
+        [name],
+    ).fetchone()
+    return found
+
+
+def _definitions_hash():
+    # The table, column and macro descriptions and the scoring descriptions
+    # are part of the text but live in code, so a change to them must not be
+    # served from a cache built before it
+    definitions = [
+        TABLES,
+        ROLLUPS_NOTE,
+        SCHEMA_RANGE_SCORES,
+        SCHEMA_NAME_LOOKUP,
+        {name: spec["description"] for name, spec in scoring.SCORINGS.items()},
+        EXAMPLE_VALUES,
+    ]
+    text = json.dumps(definitions, sort_keys=True)
+    return hashlib.sha1(text.encode()).hexdigest()
+
+
+def _read_cache(db_version):
+    if not config.SCHEMA_CACHE_PATH:
+        return {}
+    try:
+        with open(config.SCHEMA_CACHE_PATH) as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if cache.get("db_version") != db_version:
+        return {}
+    if cache.get("definitions") != _definitions_hash():
+        return {}
+    return cache.get("contexts", {})
+
+
+def _write_cache(db_version, contexts):
+    # Only the current database version and definitions are kept. Written to a temporary file
+    # first so that other processes never read a partial file.
+    if not config.SCHEMA_CACHE_PATH:
+        return
+    tmp_path = f"{config.SCHEMA_CACHE_PATH}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "w") as f:
+            cache = {
+                "db_version": db_version,
+                "definitions": _definitions_hash(),
+                "contexts": contexts,
+            }
+            json.dump(cache, f, indent=1)
+        os.replace(tmp_path, config.SCHEMA_CACHE_PATH)
+    except OSError as e:
+        logging.warning(f"Could not cache the schema context: {e}")
@@ -1,25 +1,137 @@
-SCHEMA_RAW = """
-Table: charts.uk_singles_prestreaming_raw
-Columns:
-- id (integer)
-- from_date (date)
-- to_date (date)
-- position (integer): The rank on the chart (1 is best).
-- artist (text): The name of the artist or band.
-- title (text): The name of the song.
-- label (text): Record label.
-"""
+# What the tables given to the LLM mean. Column types, row counts and value
+# ranges are read from the database itself (see schema_context.py), so only
+# the meaning is written down here. Tables are keyed by their chart table
+# kind (see chart_catalog.KINDS) and described in this order.
+TABLES = {
+    "raw": (
+        "One row per song per chart week.",
+        {
+            "position": "The rank on the chart (1 is best).",
+            "artist": "The name of the artist or band.",
+            "title": "The name of the song.",
+            "label": "Record label.",
+        },
+    ),
+    "scored": (
+        "One row per song with its all-time ranking.",
+        {
+            "artist": "The name of the artist or band.",
+            "title": "The name of the song.",
+            "score": "A calculated score for all-time ranking.",
+            "first_charted": "Date the song first entered the chart.",
+            "peak_position": "Best position reached (1 is best).",
+            "weeks_at_top": "Number of weeks at position 1.",
+            "weeks_in_chart": "Total weeks spent on the chart.",
+        },
+    ),
+    "number_ones": (
+        "One row per song that reached number 1.",
+        {
+            "artist": "The name of the artist or band.",
+            "title": "The name of the song.",
+            "label": "Record label.",
+            "first_week_at_top": "First week the song was at number 1.",
+            "year": "Year of first_week_at_top.",
+            "decade": "Decade of first_week_at_top, e.g. 1980 for the 80s.",
+            "weeks_at_top": "Number of weeks at position 1.",
+        },
+    ),
+    "yearly": (
+        "One row per year.",
+        {
+            "decade": "e.g. 1980 for the 80s.",
+            "new_entries": "Songs that first charted that year.",
+            "number_ones": "Songs that first reached number 1 that year.",
+            "weeks_at_top": "Weeks at number 1 for those songs.",
+        },
+    ),
+    "decades": (
+        "One row per decade.",
+        {
+            "decade": "e.g. 1980 for the 80s.",
+            "new_entries": "Songs that first charted that decade.",
+            "number_ones": "Songs that first reached number 1 that decade.",
+            "weeks_at_top": "Weeks at number 1 for those songs.",
+        },
+    ),
+    "artists": (
+        "One row per artist, all-time totals.",
+        {
+            "artist": "The name of the artist or band.",
+            "songs_charted": "Number of different songs that charted.",
+            "number_ones": "Number of songs that reached number 1.",
+            "total_weeks": "Total weeks on the chart across all songs.",
+            "weeks_at_top": "Total weeks at number 1 across all songs.",
+            "best_peak": "Best position reached by any song (1 is best).",
+            "total_score": "Sum of the songs' all-time scores.",
+            "first_charted": "Date of the artist's first chart entry.",
+        },
+    ),
+    "labels": (
+        "One row per record label, crediting each song to its first label.",
+        {
+            "label": "Record label.",
+            "songs_charted": "Number of different songs that charted.",
+            "artists": "Number of different artists.",
+            "number_ones": "Number of songs that reached number 1.",
+            "total_weeks": "Total weeks on the chart across all songs.",
+            "best_peak": "Best position reached by any song (1 is best).",
+        },
+    ),
+    "runs": (
+        "One row per song with its chart-run statistics. A run is a stretch of\n"
+        "consecutive chart weeks; dropping out and coming back starts a new run.\n"
+        "Use this for re-entries, longest runs, climbs and how fast a song rose.",
+        {
+            "artist": "The name of the artist or band.",
+            "title": "The name of the song.",
+            "debut_date": "Date the song first entered the chart.",
+            "debut_position": "Position in its first chart week.",
+            "runs": "Number of separate chart runs.",
+            "reentries": "Number of times the song re-entered (runs - 1).",
+            "longest_run": "Most consecutive weeks on the chart.",
+            "biggest_climb": (
+                "Largest week-on-week rise in positions, NULL if it never climbed."
+            ),
+            "weeks_to_peak": (
+                "Chart week in which it first reached its peak (1 = debut week)."
+            ),
+            "weeks_to_top": (
+                "Chart week in which it first reached number 1, NULL if it never did."
+            ),
+        },
+    ),
+}
+
+# Precomputed per-song, per-period and per-artist totals, introduced by
+# ROLLUPS_NOTE
+ROLLUP_KINDS = ("number_ones", "yearly", "decades", "artists", "labels")
+ROLLUPS_NOTE = "Precomputed rollups. Prefer these over GROUP BY on the tables above."
+
+# Filled in with the chart id
+SCHEMA_RANGE_SCORES = """
+Date-range ranking. For the best songs of a period (e.g. between 1983 and
+1987), rank with this instead of aggregating the raw table:
 
-SCHEMA_RANKINGS = """
-Table: charts.uk_singles_prestreaming_scored
-Columns:
-- artist (text): The name of the artist or band.
-- title (text): The name of the song.
-- score (bigint): A calculated score for all-time ranking.
-- first_charted (date): Date the song first entered the chart.
-- peak_position (smallint): Best position reached (1 is best).
-- weeks_at_top (bigint): Number of weeks at position 1.
-- weeks_in_chart (bigint): Total weeks spent on the chart.
+Table macro: charts.range_scores(chart, start_date, end_date)
+- chart (text): Always '{chart_id}'.
+- start_date, end_date (date): Chart weeks starting in this range count.
+Returns columns artist, title, score (bigint, the all-time score counted over
+the range only), weeks (bigint) and weeks_at_top (integer), best first.
+Example:
+  SELECT * FROM charts.range_scores('{chart_id}', DATE '1983-01-01', DATE '1987-12-31') LIMIT 10
 """
 
-SCHEMA_ALL = SCHEMA_RAW + "\n" + SCHEMA_RANKINGS
+# Filled in with the chart id
+SCHEMA_NAME_LOOKUP = """
+Name lookup. Artist and title names may be misspelled or partial in the
+question. Resolve them to exact names and filter with `=` instead of ILIKE:
+
+Table macro: charts.fuzzy_match(chart, kind, text)
+- chart (text): Always '{chart_id}'.
+- kind (text): 'artist' or 'title'.
+- text (text): The name as written in the question.
+Returns columns name (text) and similarity (double, 0 to 1), best match first.
+Example:
+  WHERE title = (SELECT name FROM charts.fuzzy_match('{chart_id}', 'title', 'BOHEMIAN RAPSODY') LIMIT 1)
+"""
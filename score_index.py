@@ -0,0 +1,164 @@
+import array
+import bisect
+import datetime
+import heapq
+import itertools
+import time
+from chart_catalog import chart_table
+
+# Songs whose chart weeks span more than this are checked for every range
+SPAN_WEEKS = 104
+
+
+class ScoreIndex:
+    """
+    In-memory prefix-sum index of song scores over a chart's week axis.
+
+    Each song's chart weeks are a contiguous, week-sorted slice of `weeks`,
+    and `scores` and `tops` hold running totals over all rows, so that a
+    song's score between two weeks is found with two bisects in its slice
+    and a subtraction, however long the range. A date-range ranking costs
+    that per song plus a top-K selection, instead of a scan of every chart
+    row in the range.
+    """
+
+    def __init__(self, week_starts, songs, offsets, weeks, scores, tops):
+        """
+        Args:
+            week_starts: Sorted start dates of the chart weeks; a week's
+                         ordinal is its index here.
+            songs: (artist, title) per song.
+            offsets: Start of each song's slice of `weeks`, plus the end.
+            weeks: Week ordinal of each song row.
+            scores, tops: Running totals of score and weeks at number 1,
+                          one longer than `weeks`: the total before row i
+                          is at i.
+        """
+        self.week_starts = week_starts
+        self.songs = songs
+        self.offsets = offsets
+        self.weeks = weeks
+        self.scores = scores
+        self.tops = tops
+        # Songs that charted within SPAN_WEEKS of their debut, in order of
+        # debut, so that a range only visits the songs that debuted shortly
+        # before or during it; the few long-lived songs are always visited
+        spans = [
+            weeks[offsets[i + 1] - 1] - weeks[offsets[i]] for i in range(len(songs))
+        ]
+        self.long_lived = [i for i in range(len(songs)) if spans[i] > SPAN_WEEKS]
+        self.by_debut = sorted(
+            (i for i in range(len(songs)) if spans[i] <= SPAN_WEEKS),
+            key=lambda i: weeks[offsets[i]],
+        )
+        self.debuts = [weeks[offsets[i]] for i in self.by_debut]
+
+    @classmethod
+    def from_connection(cls, conn, chart_id=None):
+        """Loads a chart's score index (built by init_duckdb.py) from DuckDB."""
+        start = time.perf_counter()
+        week_starts = [
+            row[0]
+            for row in conn.execute(f"""
+                SELECT from_date FROM {chart_table(chart_id, "weeks")}
+                ORDER BY from_date
+            """).fetchall()
+        ]
+        result = conn.execute(f"""
+            SELECT song_id, artist, title, week, score_through, top_through
+            FROM {chart_table(chart_id, "cumulative")}
+            ORDER BY song_id, week
+        """)
+
+        songs = []
+        offsets = array.array("q")
+        weeks = array.array("i")
+        scores = array.array("d", [0.0])
+        tops = array.array("q", [0])
+        score_base, top_base = 0.0, 0
+        last_song = None
+        while rows := result.fetchmany(100_000):
+            for song_id, artist, title, week, score_through, top_through in rows:
+                if song_id != last_song:
+                    # Running totals restart per song; continue them across
+                    score_base, top_base = scores[-1], tops[-1]
+                    songs.append((artist, title))
+                    offsets.append(len(weeks))
+                    last_song = song_id
+                weeks.append(week)
+                scores.append(score_base + score_through)
+                tops.append(top_base + top_through)
+        offsets.append(len(weeks))
+
+        index = cls(week_starts, songs, offsets, weeks, scores, tops)
+        index.load_ms = (time.perf_counter() - start) * 1000
+        return index
+
+    def week_range(self, start, end):
+        """
+        Returns the ordinals of the first and last chart weeks starting
+        within [start, end] (dates or ISO strings), or None if there are none.
+        """
+        if isinstance(start, str):
+            start = datetime.date.fromisoformat(start)
+        if isinstance(end, str):
+            end = datetime.date.fromisoformat(end)
+        first = bisect.bisect_left(self.week_starts, start)
+        last = bisect.bisect_right(self.week_starts, end) - 1
+        if first > last:
+            return None
+        return first, last
+
+    def top(self, start, end, limit=50):
+        """
+        Ranks songs by their score over the chart weeks starting between
+        `start` and `end` inclusive, as scored for the all-time ranking.
+
+        Returns up to `limit` dicts with artist, title, score (rounded),
+        weeks and weeks_at_top, best first.
+        """
+        weeks = self.week_range(start, end)
+        if weeks is None:
+            return []
+        first, last = weeks
+
+        debuts = self.debuts
+        recent = self.by_debut[
+            bisect.bisect_left(debuts, first - SPAN_WEEKS) : bisect.bisect_right(
+                debuts, last
+            )
+        ]
+        offsets, song_weeks, scores = self.offsets, self.weeks, self.scores
+        candidates = []
+        for i in itertools.chain(recent, self.long_lived):
+            lo, hi = offsets[i], offsets[i + 1]
+            if song_weeks[hi - 1] < first or song_weeks[lo] > last:
+                continue
+            # Bisect only the ends of the slice that fall outside the range
+            if song_weeks[lo] < first:
+                lo = bisect.bisect_left(song_weeks, first, lo, hi)
+            if song_weeks[hi - 1] > last:
+                hi = bisect.bisect_right(song_weeks, last, lo, hi)
+            # Ties go to more weeks, then to the song first by artist, title
+            candidates.append((scores[hi] - scores[lo], hi - lo, -i, lo, hi))
+
+        best = heapq.nlargest(limit, candidates)
+        return [
+            {
+                "artist": self.songs[-i][0],
+                "title": self.songs[-i][1],
+                "score": round(score),
+                "weeks": hi - lo,
+                "weeks_at_top": self.tops[hi] - self.tops[lo],
+            }
+            for score, _, i, lo, hi in best
+        ]
+
+    def stats(self):
+        return {
+            "songs": len(self.songs),
+            "long_lived": len(self.long_lived),
+            "rows": len(self.weeks),
+            "weeks": len(self.week_starts),
+            "load_ms": round(getattr(self, "load_ms", 0.0), 1),
+        }
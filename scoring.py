@@ -0,0 +1,269 @@
+"""
+What-if scoring: all-time rankings under alternative scoring functions.
+
+The all-time score built by init_duckdb.py gives each chart week
+100 / position points. A scoring function here is another per-week points
+expression, evaluated by DuckDB over a chart's raw table in one vectorized
+GROUP BY, optionally normalized per era. Each (chart, scoring) ranking is
+materialized on first use as a table in an in-memory database attached to
+the serving connection as `scores`, e.g. scores.uk_singles_prestreaming_linear,
+so generated SQL can query it like any other table. The least used rankings
+are dropped when more than SCORING_MAX_TABLES are held.
+"""
+
+import collections
+import contextlib
+import re
+import threading
+import chart_db
+from chart_catalog import chart_table, check_chart_id
+from config import config
+
+# name -> description, per-week points (SQL over the raw table), and whether
+# song totals are normalized against songs that first charted the same year
+SCORINGS = {
+    "inverse": {
+        "description": "100 / position points per week; the standard all-time score.",
+        "points": "100.0 / position",
+        "era": False,
+    },
+    "linear": {
+        "description": (
+            "101 - position points per week: 100 for number 1, 1 for number 100."
+        ),
+        "points": "GREATEST(101 - position, 0)",
+        "era": False,
+    },
+    "top10": {
+        "description": (
+            "Only top 10 weeks count: 10 points for number 1 down to 1 for number 10."
+        ),
+        "points": "CASE WHEN position <= 10 THEN 11 - position ELSE 0 END",
+        "era": False,
+    },
+    "era": {
+        "description": (
+            "The standard score relative to the average song that first charted "
+            "the same year (100 = average), so songs from eras with longer or "
+            "shorter chart runs compare fairly."
+        ),
+        "points": "100.0 / position",
+        "era": True,
+    },
+}
+
+DEFAULT_SCORING = "inverse"
+
+_REFERENCE = re.compile(r"\bscores\.(?:main\.)?([a-z][a-z0-9_]*)", re.IGNORECASE)
+
+
+class ScoringEngine:
+    """
+    Materializes and caches rankings for the connection `db`. Tables are
+    shared by every cursor of `db`, and kept in order of last use with a
+    use count; beyond `max_tables`, the least used (and of those, least
+    recently used) ranking that no query has pinned is dropped.
+    """
+
+    def __init__(self, db, max_tables=None):
+        self.db = db
+        self.max_tables = max_tables or config.SCORING_MAX_TABLES
+        # table name -> uses, least recently used first
+        self._tables = collections.OrderedDict()
+        # table name -> queries running on it (see pinned())
+        self._pins = collections.Counter()
+        self._lock = threading.Lock()
+        self.builds = 0
+        self.evictions = 0
+        # An in-memory database is writable even on a read-only connection
+        db.execute("ATTACH IF NOT EXISTS ':memory:' AS scores (READ_ONLY false)")
+
+    def table(self, chart_id, scoring):
+        """
+        Returns the name of a chart's ranking under `scoring`, materializing
+        it first if needed. Raises ValueError for an unknown scoring.
+        """
+        with self._lock:
+            return f"scores.{self._table(chart_id, scoring)}"
+
+    def ranking(self, chart_id, scoring, limit=50, offset=0):
+        """Returns (columns, rows) of a page of a chart's ranking, best first."""
+        # Read under the lock, so that another ranking cannot evict the table
+        # between materializing and reading it
+        with self._lock:
+            name = self._table(chart_id, scoring)
+            cursor = self.db.cursor()
+            try:
+                result = cursor.execute(
+                    f"SELECT * FROM scores.{name} ORDER BY rank, artist, title "
+                    "LIMIT ? OFFSET ?",
+                    [limit, offset],
+                )
+                return [desc[0] for desc in result.description], result.fetchall()
+            finally:
+                cursor.close()
+
+    @contextlib.contextmanager
+    def pinned(self, sql):
+        """
+        Materializes the rankings that `sql` refers to (as scores.<table>)
+        and keeps them from being evicted until the block exits, so that
+        generated SQL can be validated, run and fetched in it. Unknown names
+        are left for DuckDB to report.
+        """
+        names = []
+        try:
+            for chart_id, scoring in _references(sql):
+                with self._lock:
+                    try:
+                        name = self._table(chart_id, scoring)
+                    except ValueError:
+                        continue
+                    self._pins[name] += 1
+                    names.append(name)
+            yield
+        finally:
+            with self._lock:
+                for name in names:
+                    self._pins[name] -= 1
+                    if not self._pins[name]:
+                        del self._pins[name]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "tables": dict(self._tables),
+                "builds": self.builds,
+                "evictions": self.evictions,
+                "pinned": dict(self._pins),
+            }
+
+    # The methods below are called with the lock held
+
+    def _table(self, chart_id, scoring):
+        if scoring not in SCORINGS:
+            raise ValueError(f"Unknown scoring: {scoring!r}")
+        chart_id = check_chart_id(chart_id or config.DEFAULT_CHART)
+        name = f"{chart_id}_{scoring}"
+        if name in self._tables:
+            self._tables[name] += 1
+            self._tables.move_to_end(name)
+            return name
+        cursor = self.db.cursor()
+        try:
+            cursor.execute(
+                f"CREATE OR REPLACE TABLE scores.{name} AS "
+                + ranking_sql(chart_id, scoring)
+            )
+            self._tables[name] = 1
+            self.builds += 1
+            while len(self._tables) > self.max_tables:
+                if not self._evict(cursor, keep=name):
+                    # Every other ranking is pinned; a later build drops
+                    # the excess once they are released
+                    break
+        finally:
+            cursor.close()
+        return name
+
+    def _evict(self, cursor, keep):
+        # Fewest uses first; min() keeps the least recently used of a tie
+        candidates = [n for n in self._tables if n != keep and n not in self._pins]
+        if not candidates:
+            return False
+        name = min(candidates, key=self._tables.get)
+        cursor.execute(f"DROP TABLE IF EXISTS scores.{name}")
+        del self._tables[name]
+        self.evictions += 1
+        return True
+
+
+def _references(sql):
+    # (chart_id, scoring) of each scores.<chart>_<scoring> name in `sql`
+    for name in {m.group(1).lower() for m in _REFERENCE.finditer(sql)}:
+        for scoring in SCORINGS:
+            chart_id = name.removesuffix(f"_{scoring}")
+            if chart_id != name:
+                yield chart_id, scoring
+                break
+
+
+def ranking_sql(chart_id, scoring):
+    """The query ranking a chart's songs under a scoring function."""
+    spec = SCORINGS[scoring]
+    if spec["era"]:
+        score = "points * 100 / AVG(points) OVER (PARTITION BY YEAR(first_charted))"
+    else:
+        score = "points"
+    return f"""
+        WITH songs AS (
+            SELECT
+                artist,
+                title,
+                SUM({spec["points"]}) AS points,
+                MIN(from_date) AS first_charted,
+                MIN(position) AS peak_position,
+                COUNT(*) AS weeks_in_chart
+            FROM
+                {chart_table(chart_id, "raw")}
+            GROUP BY
+                artist,
+                title
+        ),
+        scored AS (
+            SELECT *, {score} AS score FROM songs
+        )
+        SELECT
+            CAST(RANK() OVER (ORDER BY score DESC) AS INTEGER) AS rank,
+            artist,
+            title,
+            CAST(ROUND(score, 2) AS DOUBLE) AS score,
+            first_charted,
+            peak_position,
+            weeks_in_chart
+        FROM
+            scored
+        ORDER BY
+            rank,
+            artist,
+            title
+    """
+
+
+def describe(chart_id=None):
+    """Describes the alternative rankings of a chart to the LLM."""
+    chart_id = check_chart_id(chart_id or config.DEFAULT_CHART)
+    lines = [
+        "Alternative all-time rankings, for questions that ask for a different "
+        "scoring (points, top 10 weighting, era-adjusted). Each table has columns "
+        "rank (1 is best), artist, title, score (double), first_charted (date), "
+        "peak_position and weeks_in_chart:"
+    ]
+    for name, spec in SCORINGS.items():
+        if name != DEFAULT_SCORING:
+            lines.append(f"- scores.{chart_id}_{name}: {spec['description']}")
+    return "\n".join(lines)
+
+
+_engine_lock = threading.Lock()
+_engine = None
+
+
+def get_engine():
+    """
+    Returns the scoring engine of the connection chart_db.connect() serves
+    from. A new one (with no rankings yet) replaces it when the database is
+    rebuilt or reloaded.
+    """
+    global _engine
+    db = chart_db.get_db()
+    with _engine_lock:
+        if _engine is None or _engine.db is not db:
+            _engine = ScoringEngine(db)
+        return _engine
+
+
+def engine_stats():
+    """Stats of the current scoring engine, or {} if none was needed yet."""
+    engine = _engine
+    return engine.stats() if engine is not None else {}
@@ -0,0 +1,34 @@
+"""
+Runs the API under uvicorn with API_WORKERS worker processes.
+
+With more than one worker, the SQL, result and artwork caches must be
+shared, so CACHE_PATH defaults to a local SQLite file. Each worker opens its
+own read-only DuckDB handle (see chart_db.get_file_db).
+
+Usage:
+    API_WORKERS=4 python serve.py
+"""
+
+import os
+import uvicorn
+from config import config
+
+DEFAULT_SHARED_CACHE_PATH = "chart_cache.sqlite"
+
+
+def main():
+    workers = max(1, config.API_WORKERS)
+    if workers > 1 and not config.CACHE_PATH:
+        # Workers are separate processes that re-read the environment
+        os.environ["CACHE_PATH"] = os.path.abspath(DEFAULT_SHARED_CACHE_PATH)
+
+    uvicorn.run(
+        "api.index:app",
+        host=config.API_HOST,
+        port=config.API_PORT,
+        workers=workers,
+    )
+
+
+if __name__ == "__main__":
+    main()
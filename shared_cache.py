@@ -0,0 +1,154 @@
+import collections
+import json
+import os
+import sqlite3
+import threading
+import time
+from config import config
+from telemetry import CACHE_REQUESTS
+
+# Returned by SharedCache.get on a miss, so that None can be cached
+MISSING = object()
+
+# Expired and excess entries are pruned once every this many writes
+_PRUNE_EVERY = 200
+
+
+def normalize_question(question):
+    """Normalizes a question for use as a cache key."""
+    return " ".join(question.lower().split()).rstrip("?!. ")
+
+
+class SharedCache:
+    """
+    Key-value cache for JSON-serializable values, split into namespaces
+    ("sql", "result", "artwork").
+
+    With config.CACHE_PATH set, entries live in a local SQLite database in
+    WAL mode, which is safe for concurrent readers and writers, so every API
+    worker process shares one cache. Without it, each process keeps an
+    in-memory LRU of the same size.
+    """
+
+    def __init__(self, namespace, ttl_seconds=None, max_entries=None, path=None):
+        self.namespace = namespace
+        self.ttl_seconds = ttl_seconds or config.CACHE_TTL_SECONDS
+        self.max_entries = max_entries or config.CACHE_MAX_ENTRIES
+        self.path = config.CACHE_PATH if path is None else path
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._memory = collections.OrderedDict()
+        self._writes = 0
+
+    def get(self, key):
+        """Returns the cached value for `key`, or MISSING."""
+        value = self._get(key)
+        if value is MISSING:
+            self.misses += 1
+            CACHE_REQUESTS.inc(cache=self.namespace, result="miss")
+        else:
+            self.hits += 1
+            CACHE_REQUESTS.inc(cache=self.namespace, result="hit")
+        return value
+
+    def set(self, key, value, ttl_seconds=None):
+        expires_at = time.time() + (ttl_seconds or self.ttl_seconds)
+        if not self.path:
+            with self._lock:
+                self._memory[key] = (expires_at, value)
+                self._memory.move_to_end(key)
+                while len(self._memory) > self.max_entries:
+                    self._memory.popitem(last=False)
+            return
+
+        conn = self._connection()
+        with conn:
+            conn.execute(
+                """
+                INSERT OR REPLACE INTO cache (namespace, key, value, expires_at)
+                VALUES (?, ?, ?, ?)
+                """,
+                (self.namespace, key, json.dumps(value, default=str), expires_at),
+            )
+        self._writes += 1
+        if self._writes % _PRUNE_EVERY == 0:
+            self.prune()
+
+    def prune(self):
+        """Drops expired entries and the oldest ones beyond max_entries."""
+        if not self.path:
+            return
+        conn = self._connection()
+        with conn:
+            conn.execute(
+                "DELETE FROM cache WHERE namespace = ? AND expires_at < ?",
+                (self.namespace, time.time()),
+            )
+            conn.execute(
+                """
+                DELETE FROM cache WHERE namespace = ? AND key IN (
+                    SELECT key FROM cache WHERE namespace = ?
+                    ORDER BY expires_at DESC LIMIT -1 OFFSET ?
+                )
+                """,
+                (self.namespace, self.namespace, self.max_entries),
+            )
+
+    def stats(self):
+        return {
+            "backend": "sqlite" if self.path else "memory",
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+    def _get(self, key):
+        now = time.time()
+        if not self.path:
+            with self._lock:
+                entry = self._memory.get(key)
+                if entry is None:
+                    return MISSING
+                if entry[0] < now:
+                    del self._memory[key]
+                    return MISSING
+                self._memory.move_to_end(key)
+                return entry[1]
+
+        row = (
+            self._connection()
+            .execute(
+                "SELECT value, expires_at FROM cache WHERE namespace = ? AND key = ?",
+                (self.namespace, key),
+            )
+            .fetchone()
+        )
+        if row is None or row[1] < now:
+            return MISSING
+        return json.loads(row[0])
+
+    def _connection(self):
+        # One SQLite connection per thread, reopened after a fork
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS cache (
+                    namespace TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    expires_at REAL NOT NULL,
+                    PRIMARY KEY (namespace, key)
+                )
+            """)
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+
+sql_cache = SharedCache("sql")
+result_cache = SharedCache("result")
+artwork_cache = SharedCache("artwork")
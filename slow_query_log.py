@@ -0,0 +1,199 @@
+import argparse
+import logging
+import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from config import config
+from telemetry import SLOW_QUERIES
+
+# Profiling re-runs the query, so it happens on one background thread and is
+# skipped (the entry is still logged) when this many are already queued
+_MAX_PENDING = 8
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_LIST = re.compile(r"\?(?:\s*,\s*\?)+")
+
+_executor = None
+_pending = 0
+_lock = threading.Lock()
+
+
+def query_shape(sql):
+    """
+    Reduces a query to its shape: literals become ?, lists of literals
+    collapse to one ?, and whitespace and case are normalized. Queries that
+    only differ in the artist, year or limit they ask for share a shape.
+    """
+    shape = _STRING.sub("?", sql)
+    shape = _NUMBER.sub("?", shape)
+    shape = _LIST.sub("?", shape)
+    return " ".join(shape.split()).rstrip(";").strip().lower()
+
+
+def record_if_slow(question, sql, elapsed_ms, rows, db_version=None):
+    """
+    Logs a generated query that took longer than config.SLOW_QUERY_MS.
+
+    The EXPLAIN ANALYZE profile and the write happen on a background thread,
+    so the request that hit the slow query is not delayed further. Returns
+    the Future of the write, or None if the query was not slow.
+    """
+    if not config.SLOW_QUERY_LOG_PATH or elapsed_ms < config.SLOW_QUERY_MS:
+        return None
+
+    global _executor, _pending
+    SLOW_QUERIES.inc()
+    logging.warning(f"Slow query ({elapsed_ms:.0f} ms, {rows} rows): {sql}")
+
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="slow-query-log"
+            )
+        profile = _pending < _MAX_PENDING
+        _pending += 1
+
+    entry = {
+        "recorded_at": time.time(),
+        "question": question,
+        "sql": sql,
+        "shape": query_shape(sql),
+        "elapsed_ms": elapsed_ms,
+        "rows": rows,
+        "db_version": db_version,
+    }
+    return _executor.submit(_write_entry, entry, profile, config.SLOW_QUERY_LOG_PATH)
+
+
+def _write_entry(entry, profile, path):
+    global _pending
+    try:
+        entry["plan"] = _explain_analyze(entry["sql"]) if profile else None
+        conn = _connect(path)
+        try:
+            with conn:
+                conn.execute(
+                    """
+                    INSERT INTO slow_queries (
+                        recorded_at, question, sql, shape, elapsed_ms, rows,
+                        db_version, plan
+                    ) VALUES (
+                        :recorded_at, :question, :sql, :shape, :elapsed_ms,
+                        :rows, :db_version, :plan
+                    )
+                    """,
+                    entry,
+                )
+        finally:
+            conn.close()
+    except Exception as e:
+        logging.error(f"Failed to record slow query: {e}")
+    finally:
+        with _lock:
+            _pending -= 1
+
+
+def _explain_analyze(sql):
+    import chart_db
+
+    conn = chart_db.connect()
+    try:
+        rows = conn.execute(f"EXPLAIN ANALYZE {sql}").fetchall()
+        return "\n".join(row[1] for row in rows)
+    except Exception as e:
+        return f"EXPLAIN ANALYZE failed: {e}"
+    finally:
+        conn.close()
+
+
+def _connect(path):
+    conn = sqlite3.connect(path, timeout=10)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS slow_queries (
+            id INTEGER PRIMARY KEY,
+            recorded_at REAL NOT NULL,
+            question TEXT,
+            sql TEXT NOT NULL,
+            shape TEXT NOT NULL,
+            elapsed_ms REAL NOT NULL,
+            rows INTEGER,
+            db_version TEXT,
+            plan TEXT
+        )
+    """)
+    return conn
+
+
+def report(limit=10, path=None):
+    """
+    Ranks query shapes by the total time spent in them, worst first. Each
+    entry has the shape's count, total/avg/max milliseconds, average rows,
+    and the question and plan of its slowest run.
+    """
+    conn = _connect(path or config.SLOW_QUERY_LOG_PATH)
+    conn.row_factory = sqlite3.Row
+    try:
+        rows = conn.execute(
+            """
+            WITH ranked AS (
+                SELECT *, ROW_NUMBER() OVER (
+                    PARTITION BY shape ORDER BY elapsed_ms DESC
+                ) AS rn
+                FROM slow_queries
+            )
+            SELECT
+                shape,
+                COUNT(*) AS count,
+                SUM(elapsed_ms) AS total_ms,
+                AVG(elapsed_ms) AS avg_ms,
+                MAX(elapsed_ms) AS max_ms,
+                AVG(rows) AS avg_rows,
+                MAX(CASE WHEN rn = 1 THEN question END) AS slowest_question,
+                MAX(CASE WHEN rn = 1 THEN plan END) AS slowest_plan
+            FROM ranked
+            GROUP BY shape
+            ORDER BY total_ms DESC
+            LIMIT ?
+            """,
+            (limit,),
+        ).fetchall()
+        return [dict(row) for row in rows]
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Rank the slowest generated query shapes."
+    )
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--path", default=None, help="Slow query log (SQLite).")
+    parser.add_argument(
+        "--plans", action="store_true", help="Print the slowest run's profile."
+    )
+    args = parser.parse_args()
+
+    entries = report(limit=args.limit, path=args.path)
+    if not entries:
+        print("No slow queries recorded.")
+        return
+
+    for i, entry in enumerate(entries, 1):
+        print(
+            f"{i}. {entry['count']} runs, total {entry['total_ms']:.0f} ms, "
+            f"avg {entry['avg_ms']:.0f} ms, max {entry['max_ms']:.0f} ms, "
+            f"avg {entry['avg_rows']:.0f} rows"
+        )
+        print(f"   shape: {entry['shape']}")
+        print(f"   slowest question: {entry['slowest_question']}")
+        if args.plans and entry["slowest_plan"]:
+            print(entry["slowest_plan"])
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,42 @@
-import { useState, useMemo } from 'react';
+import { useState, useMemo, useEffect } from 'react';
 import { Search, Music, TrendingUp, AlertCircle, Database } from 'lucide-react';
 import { LineChart, Line, XAxis, YAxis, CartesianGrid, Tooltip, ResponsiveContainer } from 'recharts';
 import './index.css';
 
+const PAGE_SIZE = 50;
+
 function App() {
   const [query, setQuery] = useState('');
   const [loading, setLoading] = useState(false);
   const [result, setResult] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
+  const [suggestions, setSuggestions] = useState([]);
+
+  // Type-ahead for artists and song titles, debounced per keystroke
+  useEffect(() => {
+    const q = query.trim();
+    if (q.length < 2) {
+      setSuggestions([]);
+      return;
+    }
+    const controller = new AbortController();
+    const timer = setTimeout(async () => {
+      try {
+        const base = import.meta.env.DEV ? 'http://localhost:8000' : '';
+        const res = await fetch(`${base}/api/suggest?q=${encodeURIComponent(q)}&limit=8`, {
+          signal: controller.signal,
+        });
+        const data = await res.json();
+        setSuggestions(data.suggestions || []);
+      } catch {
+        // Aborted or offline; keep the previous suggestions
+      }
+    }, 120);
+    return () => {
+      clearTimeout(timer);
+      controller.abort();
+    };
+  }, [query]);
 
   const handleSearch = async (e) => {
     e.preventDefault();
@@ -20,7 +50,7 @@ function App() {
       const res = await fetch(apiUrl, {
         method: 'POST',
         headers: { 'Content-Type': 'application/json' },
-        body: JSON.stringify({ query }),
+        body: JSON.stringify({ query, page_size: PAGE_SIZE }),
       });
       const data = await res.json();
       setResult(data);
@@ -31,6 +61,35 @@ function App() {
     }
   };
 
+  // Later pages come from the server's cached result via the cursor
+  const loadMore = async () => {
+    if (!result?.next_cursor) return;
+
+    setLoadingMore(true);
+    try {
+      const apiUrl = import.meta.env.DEV ? 'http://localhost:8000/api/query' : '/api/query';
+      const res = await fetch(apiUrl, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ cursor: result.next_cursor, page_size: PAGE_SIZE }),
+      });
+      const page = await res.json();
+      if (page.error) {
+        setResult(prev => ({ ...prev, next_cursor: null, error: page.error }));
+      } else {
+        setResult(prev => ({
+          ...prev,
+          data: [...prev.data, ...page.data],
+          next_cursor: page.next_cursor,
+        }));
+      }
+    } catch (err) {
+      setResult(prev => ({ ...prev, error: "Failed to connect to the server." }));
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const renderTable = (data) => {
     if (!data || data.length === 0) return <p>No results found.</p>;
     const columns = Object.keys(data[0]);
@@ -44,14 +103,23 @@ function App() {
             </tr>
           </thead>
           <tbody>
-            {data.slice(0, 50).map((row, i) => (
+            {data.map((row, i) => (
               <tr key={i}>
                 {columns.map(col => <td key={col}>{row[col]}</td>)}
               </tr>
             ))}
           </tbody>
         </table>
-        {data.length > 50 && <p style={{ color: '#94a3b8', marginTop: '1rem', textAlign: 'center' }}>Showing first 50 results</p>}
+        {result?.total_rows > data.length && (
+          <div style={{ marginTop: '1rem', textAlign: 'center' }}>
+            <p style={{ color: '#94a3b8' }}>Showing {data.length} of {result.total_rows} results</p>
+            {result.next_cursor && (
+              <button type="button" onClick={loadMore} disabled={loadingMore}>
+                {loadingMore ? 'Loading...' : 'Load more'}
+              </button>
+            )}
+          </div>
+        )}
       </div>
     );
   };
@@ -101,7 +169,15 @@ function App() {
           value={query}
           onChange={(e) => setQuery(e.target.value)}
           disabled={loading}
+          list="search-suggestions"
+          autoComplete="off"
         />
+        <datalist id="search-suggestions">
+          {suggestions.map((s) => {
+            const label = s.kind === 'artist' ? s.artist : `${s.title} - ${s.artist}`;
+            return <option key={`${s.kind}:${s.artist}:${s.title}`} value={label} />;
+          })}
+        </datalist>
         <button type="submit" className="search-button" disabled={loading || !query.trim()}>
           {loading ? 'Searching...' : 'Search'}
         </button>
@@ -0,0 +1,154 @@
+import bisect
+import heapq
+import sys
+import time
+from chart_catalog import chart_table
+
+# Prefix ranges larger than this get their top suggestions precomputed at
+# build time; smaller ranges are ranked on the fly.
+SCAN_LIMIT = 256
+TOP_K = 20
+
+
+class SuggestIndex:
+    """
+    In-memory autocomplete index over artists and song titles.
+
+    Every name is indexed under each of its word starts ("BOHEMIAN
+    RHAPSODY" is found by "BOH" and by "RHAP"). Keys are held in one sorted
+    list, so a prefix maps to a contiguous range found with bisect. Ranges
+    are ranked by all-time score; for short, very common prefixes the top
+    suggestions are precomputed so every lookup stays sub-millisecond.
+    """
+
+    def __init__(self, rows):
+        """
+        Args:
+            rows: Iterable of (kind, artist, title, score) tuples, with kind
+                  "artist" (title None) or "title".
+        """
+        start = time.perf_counter()
+        self.items = [tuple(row) for row in rows]
+
+        pairs = []
+        for item_id, (kind, artist, title, _score) in enumerate(self.items):
+            name = artist if kind == "artist" else title
+            for key in _word_starts(name):
+                pairs.append((key, item_id))
+        pairs.sort()
+
+        self.keys = [key for key, _ in pairs]
+        self.item_ids = [item_id for _, item_id in pairs]
+        self.top = {}
+        self._precompute_top("", 0, len(self.keys))
+        self.build_ms = (time.perf_counter() - start) * 1000
+        self.size_bytes = self.memory_bytes()
+
+    @classmethod
+    def from_connection(cls, conn, chart_id=None):
+        """
+        Loads artists and titles with their scores from a chart's scored
+        table (by default config.DEFAULT_CHART).
+        """
+        scored = chart_table(chart_id, "scored")
+        rows = conn.execute(f"""
+            SELECT 'artist' AS kind, artist, NULL AS title, SUM(score) AS score
+            FROM {scored}
+            GROUP BY artist
+            UNION ALL
+            SELECT 'title' AS kind, artist, title, score
+            FROM {scored}
+        """).fetchall()
+        return cls(rows)
+
+    def _range(self, prefix):
+        lo = bisect.bisect_left(self.keys, prefix)
+        hi = bisect.bisect_left(self.keys, prefix + "\uffff", lo)
+        return lo, hi
+
+    def _rank(self, lo, hi, limit):
+        # A name can be indexed under several keys in the same range
+        return heapq.nlargest(
+            limit,
+            set(self.item_ids[lo:hi]),
+            key=lambda item_id: (self.items[item_id][3] or 0, -item_id),
+        )
+
+    def _precompute_top(self, prefix, lo, hi):
+        if hi - lo <= SCAN_LIMIT:
+            return
+        self.top[prefix] = self._rank(lo, hi, TOP_K)
+
+        # Recurse into each distinct next character within the range
+        depth = len(prefix)
+        i = lo
+        while i < hi:
+            key = self.keys[i]
+            if len(key) <= depth:
+                i += 1
+                continue
+            child = key[: depth + 1]
+            child_hi = bisect.bisect_left(self.keys, child + "\uffff", i, hi)
+            self._precompute_top(child, i, child_hi)
+            i = child_hi
+
+    def suggest(self, prefix, limit=10):
+        """
+        Returns up to `limit` suggestions whose artist or title has a word
+        starting with `prefix`, best score first.
+        """
+        prefix = " ".join(prefix.upper().split())
+        if not prefix:
+            return []
+
+        limit = max(1, min(limit, TOP_K))
+        if prefix in self.top:
+            ids = self.top[prefix][:limit]
+        else:
+            lo, hi = self._range(prefix)
+            ids = self._rank(lo, hi, limit) if hi > lo else []
+
+        return [
+            {"kind": kind, "artist": artist, "title": title, "score": score}
+            for kind, artist, title, score in (self.items[i] for i in ids)
+        ]
+
+    def memory_bytes(self):
+        """Approximate memory held by the index, counting shared strings once."""
+        seen = set()
+        total = 0
+
+        def add(obj):
+            nonlocal total
+            if id(obj) not in seen:
+                seen.add(id(obj))
+                total += sys.getsizeof(obj)
+
+        for container in (self.items, self.keys, self.item_ids, self.top):
+            add(container)
+        for item in self.items:
+            add(item)
+            for value in item:
+                add(value)
+        for key in self.keys:
+            add(key)
+        for key, ids in self.top.items():
+            add(key)
+            add(ids)
+        return total
+
+    def stats(self):
+        return {
+            "items": len(self.items),
+            "keys": len(self.keys),
+            "precomputed_prefixes": len(self.top),
+            "memory_bytes": self.size_bytes,
+            "build_ms": round(self.build_ms, 1),
+        }
+
+
+def _word_starts(name):
+    """Yields the normalized name and every suffix starting at a later word."""
+    words = (name or "").upper().split()
+    for i in range(len(words)):
+        yield " ".join(words[i:])
@@ -0,0 +1,241 @@
+import bisect
+import contextlib
+import contextvars
+import threading
+import time
+
+_current_timer = contextvars.ContextVar("current_timer", default=None)
+
+DEFAULT_BUCKETS = (
+    0.001,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+)
+
+
+class StageTimer:
+    """
+    Collects the duration of each stage of one request (LLM call, SQL
+    validation, query execution, ...). Stages that run more than once, such
+    as validation attempts, are summed and counted.
+    """
+
+    def __init__(self):
+        self._stages = {}
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def activate(self):
+        """Makes this the timer that `stage()` records into for this context."""
+        token = _current_timer.set(self)
+        try:
+            yield self
+        finally:
+            _current_timer.reset(token)
+
+    def add(self, name, seconds):
+        with self._lock:
+            total, count = self._stages.get(name, (0.0, 0))
+            self._stages[name] = (total + seconds, count + 1)
+
+    def totals(self):
+        """Returns {stage: (milliseconds, count)} in the order stages started."""
+        with self._lock:
+            return {
+                name: (total * 1000, count)
+                for name, (total, count) in self._stages.items()
+            }
+
+    def server_timing(self):
+        """Formats the stages as a Server-Timing header value."""
+        parts = []
+        for name, (ms, count) in self.totals().items():
+            part = f"{name};dur={ms:.1f}"
+            if count > 1:
+                part += f';desc="{count}x"'
+            parts.append(part)
+        return ", ".join(parts)
+
+    def summary(self):
+        """Formats the stages for a log line."""
+        return " ".join(
+            f"{name}={ms:.1f}ms" + (f"(x{count})" if count > 1 else "")
+            for name, (ms, count) in self.totals().items()
+        )
+
+
+@contextlib.contextmanager
+def stage(name):
+    """
+    Times a block as the named stage. The duration goes into the
+    stage_duration_seconds histogram and into the active StageTimer, if any.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_SECONDS.observe(elapsed, stage=name)
+        timer = _current_timer.get()
+        if timer is not None:
+            timer.add(name, elapsed)
+
+
+class Counter:
+    def __init__(self, name, documentation):
+        self.name = name
+        self.documentation = documentation
+        self._values = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def inc(self, amount=1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(tuple(sorted(labels.items())), 0)
+
+    def render(self):
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} counter",
+        ]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(key)} {value}")
+        return lines
+
+
+class Gauge(Counter):
+    def set(self, value, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = value
+
+    def render(self):
+        lines = super().render()
+        lines[1] = f"# TYPE {self.name} gauge"
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, documentation, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(buckets)
+        # labels -> [bucket counts..., sum, count]
+        self._values = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def observe(self, value, **labels):
+        key = tuple(sorted(labels.items()))
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                series = self._values[key] = [0] * (len(self.buckets) + 2)
+            if i < len(self.buckets):
+                series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def count(self, **labels):
+        series = self._values.get(tuple(sorted(labels.items())))
+        return series[-1] if series else 0
+
+    def render(self):
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} histogram",
+        ]
+        with self._lock:
+            for key, series in sorted(self._values.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets, series):
+                    cumulative += count
+                    labels = _format_labels(key + (("le", _format_bound(bound)),))
+                    lines.append(f"{self.name}_bucket{labels} {cumulative}")
+                labels = _format_labels(key + (("le", "+Inf"),))
+                lines.append(f"{self.name}_bucket{labels} {series[-1]}")
+                lines.append(f"{self.name}_sum{_format_labels(key)} {series[-2]}")
+                lines.append(f"{self.name}_count{_format_labels(key)} {series[-1]}")
+        return lines
+
+
+def render_prometheus():
+    """Renders every registered metric in the Prometheus text format."""
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+def _format_labels(key):
+    if not key:
+        return ""
+    escaped = (
+        (name, str(value).replace("\\", "\\\\").replace('"', '\\"'))
+        for name, value in key
+    )
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+
+def _format_bound(bound):
+    return repr(float(bound))
+
+
+REGISTRY = []
+
+STAGE_SECONDS = Histogram(
+    "chart_explorer_stage_duration_seconds",
+    "Time spent in each stage of answering a request.",
+)
+REQUEST_SECONDS = Histogram(
+    "chart_explorer_request_duration_seconds",
+    "End-to-end request latency by path.",
+)
+LLM_RETRIES = Counter(
+    "chart_explorer_llm_retries_total",
+    "LLM generations retried after the SQL failed validation.",
+)
+CACHE_REQUESTS = Counter(
+    "chart_explorer_cache_requests_total",
+    "Cache lookups by cache and result (hit or miss).",
+)
+COALESCED = Counter(
+    "chart_explorer_coalesced_total",
+    "Calls that waited for an identical in-flight call instead of running.",
+)
+UPSTREAM_ERRORS = Counter(
+    "chart_explorer_upstream_errors_total",
+    "Errors from upstream services (openai, musicbrainz, coverartarchive).",
+)
+SLOW_QUERIES = Counter(
+    "chart_explorer_slow_queries_total",
+    "Generated queries that exceeded the slow-query threshold.",
+)
+ADMISSION_ACTIVE = Gauge(
+    "chart_explorer_admission_active",
+    "Callers currently holding an admission slot, by limiter.",
+)
+ADMISSION_QUEUED = Gauge(
+    "chart_explorer_admission_queued",
+    "Callers waiting for an admission slot, by limiter.",
+)
+ADMISSION_REJECTED = Counter(
+    "chart_explorer_admission_rejected_total",
+    "Callers turned away by a limiter, by reason (queue_full or timeout).",
+)
@@ -0,0 +1,64 @@
+import threading
+import pytest
+from admission import AdmissionLimiter, Overloaded
+
+
+def test_limits_concurrency_and_rejects_when_queue_is_full():
+    """Test that callers beyond the slots and the queue are turned away."""
+    limiter = AdmissionLimiter(
+        "test", max_concurrent=1, max_queue=1, max_wait_seconds=5
+    )
+    holding = threading.Event()
+    release = threading.Event()
+    order = []
+
+    def hold():
+        with limiter.admit():
+            holding.set()
+            release.wait(timeout=10)
+            order.append("first")
+
+    def wait_for_slot():
+        with limiter.admit():
+            order.append("queued")
+
+    first = threading.Thread(target=hold)
+    first.start()
+    holding.wait(timeout=10)
+    queued = threading.Thread(target=wait_for_slot)
+    queued.start()
+    while limiter.queued < 1:
+        pass
+
+    with pytest.raises(Overloaded) as excinfo:
+        with limiter.admit():
+            pass
+    assert excinfo.value.retry_after >= 1
+
+    release.set()
+    first.join(timeout=10)
+    queued.join(timeout=10)
+    assert order == ["first", "queued"]
+    assert limiter.stats() == {
+        "active": 0,
+        "queued": 0,
+        "admitted": 2,
+        "rejected": 1,
+        "max_concurrent": 1,
+        "max_queue": 1,
+    }
+
+
+def test_queued_caller_times_out():
+    """Test that a queued caller gives up after the max wait."""
+    limiter = AdmissionLimiter(
+        "test", max_concurrent=1, max_queue=5, max_wait_seconds=0.05
+    )
+    with limiter.admit():
+        with pytest.raises(Overloaded):
+            with limiter.admit():
+                pass
+    assert limiter.queued == 0 and limiter.active == 0
+
+    with limiter.admit():
+        assert limiter.active == 1
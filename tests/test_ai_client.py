@@ -5,7 +5,7 @@ from ai_client import get_sql_from_llm
 
 @pytest.fixture
 def mock_openai_client():
-    with patch("ai_client.OpenAI") as mock_openai:
+    with patch("ai_client.make_client") as mock_openai:
         yield mock_openai
 
 
@@ -0,0 +1,413 @@
+import json
+import os
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+import duckdb
+import pytest
+from unittest.mock import patch
+from fastapi.testclient import TestClient
+from config import config
+from shared_cache import MISSING
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_health_does_not_load_heavy_dependencies():
+    """Test that importing the API and calling /api/health stay lightweight."""
+    script = """
+import json, sys
+import api.index as api
+from fastapi.testclient import TestClient
+response = TestClient(api.app).get("/api/health")
+heavy = ["duckdb", "openai", "requests"]
+print(json.dumps({
+    "status": response.json()["status"],
+    "loaded": [m for m in heavy if m in sys.modules],
+}))
+"""
+    proc = subprocess.run(
+        [sys.executable, "-c", script],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+
+    assert result == {"status": "ok", "loaded": []}
+
+
+@pytest.fixture
+def client(tmp_path):
+    """API client against a small chart database."""
+    path = str(tmp_path / "music.duckdb")
+    conn = duckdb.connect(path)
+    conn.execute("CREATE SCHEMA charts;")
+    conn.execute("""
+        CREATE TABLE charts.uk_singles_prestreaming_raw AS
+        SELECT * FROM (VALUES
+            (1, DATE '1985-07-13', DATE '1985-07-19', 1, 'QUEEN', 'RADIO GA GA', 'EMI'),
+            (2, DATE '1985-07-20', DATE '1985-07-26', 3, 'QUEEN', 'RADIO GA GA', 'EMI')
+        ) AS t(id, from_date, to_date, position, artist, title, label)
+    """)
+    conn.execute("""
+        CREATE TABLE charts.uk_singles_prestreaming_scored AS
+        SELECT artist, title, 133 AS score FROM charts.uk_singles_prestreaming_raw
+        GROUP BY artist, title
+    """)
+    conn.close()
+
+    import api.index as api
+
+    with (
+        patch.object(config, "DUCKDB_PATH", path),
+        patch.object(config, "SCHEMA_CACHE_PATH", str(tmp_path / "schema.json")),
+        patch("artwork_client.get_artwork_url", return_value=None),
+        patch("ai_client.get_sql_from_llm") as mock_llm,
+    ):
+        mock_llm.return_value = (
+            "SELECT artist, title, score FROM charts.uk_singles_prestreaming_scored"
+        )
+        yield TestClient(api.app), mock_llm
+
+
+def test_query_reuses_cached_sql_and_result(client):
+    """Test that a repeated question skips the LLM and the query."""
+    test_client, mock_llm = client
+
+    first = test_client.post("/api/query", json={"query": "Queen songs?"}).json()
+    second = test_client.post("/api/query", json={"query": "  queen SONGS "}).json()
+
+    assert first["error"] is None
+    assert first["data"] == [{"artist": "QUEEN", "title": "RADIO GA GA", "score": 133}]
+    assert first["metrics"] == {"peak": 1, "weeks": 2, "debut": "1985-07-13"}
+    assert second == first
+    assert mock_llm.call_count == 1
+
+
+def test_query_reports_stage_timings_and_metrics(client):
+    """Test the Server-Timing header and the Prometheus endpoint."""
+    test_client, _ = client
+
+    response = test_client.post("/api/query", json={"query": "Queen songs?"})
+    stages = [
+        part.split(";")[0] for part in response.headers["Server-Timing"].split(", ")
+    ]
+    assert {"execute", "history", "serialize", "total"} <= set(stages)
+
+    metrics = test_client.get("/api/metrics")
+    assert metrics.headers["content-type"].startswith("text/plain")
+    assert (
+        'chart_explorer_stage_duration_seconds_count{stage="execute"}' in metrics.text
+    )
+    assert (
+        'chart_explorer_cache_requests_total{cache="sql",result="miss"}' in metrics.text
+    )
+
+
+def test_query_pages_are_served_from_cached_result(client):
+    """Test that cursor pages come from the cache, without the LLM or the DB."""
+    test_client, mock_llm = client
+    mock_llm.return_value = (
+        "SELECT artist, title, position FROM charts.uk_singles_prestreaming_raw "
+        "ORDER BY from_date"
+    )
+
+    first = test_client.post(
+        "/api/query", json={"query": "Queen weeks", "page_size": 1}
+    ).json()
+    assert first["data"] == [{"artist": "QUEEN", "title": "RADIO GA GA", "position": 1}]
+    assert first["total_rows"] == 2
+    assert first["next_cursor"]
+
+    with patch("api.index.get_db", side_effect=AssertionError("DB was queried")):
+        second = test_client.post(
+            "/api/query", json={"cursor": first["next_cursor"], "page_size": 1}
+        ).json()
+    assert second["data"] == [
+        {"artist": "QUEEN", "title": "RADIO GA GA", "position": 3}
+    ]
+    assert second["sql"] == first["sql"]
+    assert second["next_cursor"] is None
+    assert mock_llm.call_count == 1
+
+    invalid = test_client.post("/api/query", json={"cursor": "nonsense"}).json()
+    assert invalid["error"] == "Invalid cursor."
+
+
+def test_query_cursor_expires_with_cached_result(client):
+    """Test that a cursor whose cached result was evicted fails cleanly."""
+    test_client, mock_llm = client
+    mock_llm.return_value = (
+        "SELECT artist, position FROM charts.uk_singles_prestreaming_raw "
+        "ORDER BY from_date"
+    )
+    first = test_client.post(
+        "/api/query", json={"query": "Queen positions", "page_size": 1}
+    ).json()
+
+    with patch("api.index.result_cache.get", return_value=MISSING):
+        response = test_client.post("/api/query", json={"cursor": first["next_cursor"]})
+    assert response.status_code == 200
+    assert response.json()["data"] == []
+    assert response.json()["error"] == (
+        "These results have expired. Please ask the question again."
+    )
+    assert mock_llm.call_count == 1
+
+
+def test_query_without_question_or_cursor(client):
+    """Test that an empty request is rejected before admission and the LLM."""
+    test_client, mock_llm = client
+
+    for body in ({}, {"query": "   "}):
+        response = test_client.post("/api/query", json=body)
+        assert response.status_code == 422
+        assert response.json()["error"] == "A question or a cursor is required."
+    assert mock_llm.call_count == 0
+
+
+def test_query_compact_format(client):
+    """Test the columnar format, selected by query parameter or Accept header."""
+    test_client, mock_llm = client
+    mock_llm.return_value = (
+        "SELECT from_date, position FROM charts.uk_singles_prestreaming_raw "
+        "ORDER BY from_date"
+    )
+
+    first = test_client.post(
+        "/api/query?format=columnar", json={"query": "Weeks", "page_size": 1}
+    ).json()
+    assert first["format"] == "columnar"
+    assert first["columns"] == ["from_date", "position"]
+    assert first["values"] == [["1985-07-13"], [1]]
+    assert "data" not in first
+
+    second = test_client.post(
+        "/api/query",
+        json={"cursor": first["next_cursor"]},
+        headers={"Accept": "application/vnd.chart-explorer.columnar+json"},
+    ).json()
+    assert second["values"] == [["1985-07-20"], [3]]
+    assert second["next_cursor"] is None
+
+    rows = test_client.post("/api/query", json={"query": "Weeks"}).json()
+    assert rows["data"] == [
+        {"from_date": "1985-07-13", "position": 1},
+        {"from_date": "1985-07-20", "position": 3},
+    ]
+    assert "values" not in rows
+
+
+def test_query_row_format_values(client):
+    """Test how dates, timestamps, decimals and NULL appear in the row format."""
+    test_client, mock_llm = client
+    mock_llm.return_value = """
+        SELECT
+            MIN(from_date) AS debut,
+            TIMESTAMP '1985-07-13 12:00:05.25' AS charted_at,
+            SUM(position::DECIMAL(18, 0)) AS total,
+            AVG(position::DECIMAL(18, 1)) AS average,
+            NULL AS label
+        FROM charts.uk_singles_prestreaming_raw
+    """
+
+    rows = test_client.post("/api/query", json={"query": "Totals"}).json()
+    assert rows["data"] == [
+        {
+            "debut": "1985-07-13",
+            "charted_at": "1985-07-13T12:00:05.250000",
+            "total": 4,
+            "average": 2.0,
+            "label": "",
+        }
+    ]
+
+
+def test_query_batch_dedupes_and_reports_per_item(client):
+    """Test that a batch answers each distinct question once, in order."""
+    test_client, mock_llm = client
+
+    def generate_sql(question, **kwargs):
+        if "broken" in question:
+            raise ValueError("no SQL for that")
+        return "SELECT artist, title FROM charts.uk_singles_prestreaming_scored"
+
+    mock_llm.side_effect = generate_sql
+
+    batch = test_client.post(
+        "/api/query/batch",
+        json={"queries": ["Queen songs?", "broken question", "queen songs"]},
+    ).json()
+
+    assert batch["error"] is None
+    results = batch["results"]
+    assert [item["query"] for item in results] == [
+        "Queen songs?",
+        "broken question",
+        "queen songs",
+    ]
+    assert results[0]["response"]["data"] == [
+        {"artist": "QUEEN", "title": "RADIO GA GA"}
+    ]
+    assert results[0]["timings"]["execute"] >= 0
+    assert results[1]["response"]["error"] == "no SQL for that"
+    assert results[2]["duplicate"] is True
+    assert results[2]["response"] == results[0]["response"]
+    assert "columns" not in results[0]["response"]
+    assert mock_llm.call_count == 2
+    assert batch["elapsed_ms"] >= max(item["elapsed_ms"] for item in results)
+
+
+def test_query_batch_size_limit(client):
+    """Test that oversized batches are rejected."""
+    test_client, _ = client
+
+    with patch.object(config, "BATCH_MAX_QUERIES", 2):
+        batch = test_client.post("/api/query/batch", json={"queries": ["a", "b", "c"]})
+
+    assert batch.json() == {
+        "results": [],
+        "elapsed_ms": 0,
+        "error": "At most 2 questions per batch.",
+    }
+
+
+def test_query_is_rejected_when_llm_is_saturated(client):
+    """Test the fast 429 when no LLM slot is free, and that cache hits bypass it."""
+    import api.index as api
+    from admission import AdmissionLimiter
+
+    test_client, mock_llm = client
+    assert test_client.post("/api/query", json={"query": "Queen"}).status_code == 200
+
+    saturated = AdmissionLimiter(
+        "llm", max_concurrent=0, max_queue=0, max_wait_seconds=1
+    )
+    with patch.object(api, "llm_limiter", saturated):
+        rejected = test_client.post("/api/query", json={"query": "Another question"})
+        cached = test_client.post("/api/query", json={"query": "Queen"})
+
+    assert rejected.status_code == 429
+    assert int(rejected.headers["Retry-After"]) >= 1
+    assert "busy" in rejected.json()["error"]
+    assert cached.status_code == 200 and cached.json()["error"] is None
+    assert mock_llm.call_count == 1
+    assert (
+        'chart_explorer_admission_rejected_total{limiter="llm",reason="queue_full"}'
+        in (test_client.get("/api/metrics").text)
+    )
+
+
+def test_compare_aligns_requested_songs(client):
+    """Test that /api/compare returns one aligned series per charted song."""
+    test_client, _ = client
+    songs = [
+        {"artist": "QUEEN", "title": "RADIO GA GA"},
+        {"artist": "NOBODY", "title": "NOTHING"},
+    ]
+
+    by_debut = test_client.post("/api/compare", json={"songs": songs}).json()
+    by_date = test_client.post(
+        "/api/compare", json={"songs": songs, "align": "date"}
+    ).json()
+
+    assert by_debut == {
+        "align": "debut",
+        "series": [
+            {"artist": "QUEEN", "title": "RADIO GA GA", "x": [0, 1], "position": [1, 3]}
+        ],
+        "error": None,
+    }
+    assert by_date["series"][0]["x"] == ["1985-07-13", "1985-07-20"]
+    bad = test_client.post("/api/compare", json={"songs": songs, "align": "peak"})
+    assert bad.json()["error"] == "Unknown alignment: 'peak'"
+
+
+def test_charts_and_unknown_chart(client):
+    """Test that a database without a catalog lists just the default chart."""
+    test_client, mock_llm = client
+
+    charts = test_client.get("/api/charts").json()
+    assert charts["default"] == "uk_singles_prestreaming"
+    assert [c["chart_id"] for c in charts["charts"]] == ["uk_singles_prestreaming"]
+
+    result = test_client.post(
+        "/api/query", json={"query": "top songs", "chart": "uk_albums"}
+    ).json()
+    assert result["error"] == "Unknown chart: uk_albums"
+    assert mock_llm.call_count == 0
+
+
+def test_ranking_by_scoring_function(client):
+    """Test that /api/ranking ranks songs by the requested scoring."""
+    test_client, _ = client
+
+    result = test_client.get("/api/ranking", params={"scoring": "linear"}).json()
+    assert result["entries"] == [
+        {
+            "rank": 1,
+            "artist": "QUEEN",
+            "title": "RADIO GA GA",
+            "score": 198.0,
+            "first_charted": "1985-07-13",
+            "peak_position": 1,
+            "weeks_in_chart": 2,
+        }
+    ]
+    bad = test_client.get("/api/ranking", params={"scoring": "nope"}).json()
+    assert bad["error"] == "Unknown scoring: 'nope'"
+
+
+def test_concurrent_queries_keep_their_rankings(client):
+    """Test that what-if tables a query reads are not evicted while it runs."""
+    test_client, mock_llm = client
+    scorings = ["linear", "top10", "era"]
+
+    def generate(question, **kwargs):
+        i = int(question.split()[-1])
+        return (
+            f"SELECT artist, rank FROM scores.uk_singles_prestreaming_{scorings[i % 3]}"
+            f" WHERE rank > -{i}"
+        )
+
+    def ask(i):
+        response = test_client.post("/api/query", json={"query": f"question {i}"})
+        return response.json()
+
+    mock_llm.side_effect = generate
+    with patch.object(config, "SCORING_MAX_TABLES", 1):
+        with ThreadPoolExecutor(6) as pool:
+            results = list(pool.map(ask, range(60)))
+
+    assert [r["error"] for r in results] == [None] * 60
+    assert all(r["data"][0]["rank"] == 1 for r in results)
+
+
+def test_range_ranking(client):
+    """Test that /api/ranking/range ranks songs over the requested weeks."""
+    test_client, _ = client
+    from init_duckdb import build_score_index, build_week_index
+
+    conn = duckdb.connect(config.DUCKDB_PATH)
+    build_week_index(conn)
+    build_score_index(conn)
+    conn.close()
+
+    result = test_client.get(
+        "/api/ranking/range", params={"start": "1985-07-14", "end": "1985-12-31"}
+    ).json()
+    assert result["entries"] == [
+        {
+            "artist": "QUEEN",
+            "title": "RADIO GA GA",
+            "score": 33,
+            "weeks": 1,
+            "weeks_at_top": 0,
+        }
+    ]
+    bad = test_client.get(
+        "/api/ranking/range", params={"start": "1985", "end": "1986-01-01"}
+    ).json()
+    assert bad["error"].startswith("Invalid isoformat")
@@ -1,11 +1,14 @@
+import time
 import pytest
 from unittest.mock import patch, MagicMock
 from artwork_client import (
+    NOT_FOUND_TTL_SECONDS,
     get_artwork_url,
     _search_musicbrainz_candidates,
     _get_cover_art_archive_url,
 )
 import requests
+from shared_cache import SharedCache
 
 
 @pytest.fixture
@@ -120,3 +123,23 @@ def test_get_cover_art_url_exceptions(mock_requests_head):
     mock_requests_head.side_effect = requests.RequestException("Timeout")
     url = _get_cover_art_archive_url("fake_mbid")
     assert url is None
+
+
+def test_get_artwork_url_retries_not_found_after_ttl(
+    mock_requests_get, mock_requests_head
+):
+    """Test that "no artwork" is looked up again once its shared entry expires."""
+    mock_requests_get.return_value.json.return_value = {"release-groups": []}
+    mock_requests_head.return_value.status_code = 200
+
+    with patch("artwork_client.artwork_cache", SharedCache("artwork", path="")):
+        assert get_artwork_url("Retry Artist", "Retry Title") is None
+        mock_requests_get.return_value.json.return_value = {
+            "release-groups": [{"id": "mbid_late", "score": 100}]
+        }
+        assert get_artwork_url("Retry Artist", "Retry Title") is None
+
+        later = time.time() + NOT_FOUND_TTL_SECONDS + 1
+        with patch("shared_cache.time.time", return_value=later):
+            url = get_artwork_url("Retry Artist", "Retry Title")
+    assert url == "https://coverartarchive.org/release-group/mbid_late/front-500"
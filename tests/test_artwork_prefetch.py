@@ -0,0 +1,77 @@
+import threading
+from artwork_prefetch import SELECTED, ArtworkPrefetcher
+
+
+def test_selected_song_jumps_the_queue():
+    """Test that a selected song is fetched before queued prefetches."""
+    release = threading.Event()
+    started = threading.Event()
+    fetched = []
+
+    def fetch(artist, title):
+        if title == "BLOCKER":
+            started.set()
+            release.wait(timeout=10)
+        fetched.append(title)
+        return f"http://art/{title}"
+
+    prefetcher = ArtworkPrefetcher(fetch)
+    prefetcher.request("A", "BLOCKER")
+    started.wait(timeout=10)
+    first = prefetcher.request("A", "ROW 1")
+    prefetcher.request("A", "ROW 2")
+    selected = prefetcher.request("A", "ROW 2", priority=SELECTED)
+    release.set()
+
+    assert selected.result(timeout=10) == "http://art/ROW 2"
+    assert first.result(timeout=10) == "http://art/ROW 1"
+    assert fetched == ["BLOCKER", "ROW 2", "ROW 1"]
+
+
+def test_requests_share_a_future_and_errors_propagate():
+    """Test deduplication of repeat requests and failed lookups."""
+    calls = []
+
+    def fetch(artist, title):
+        calls.append(title)
+        raise RuntimeError("MusicBrainz down")
+
+    prefetcher = ArtworkPrefetcher(fetch)
+    future = prefetcher.request("A", "SONG")
+    future.exception(timeout=10)
+
+    assert prefetcher.request("A", "SONG") is future
+    assert isinstance(future.exception(), RuntimeError)
+    assert calls == ["SONG"]
+
+
+def test_repeat_requests_are_not_queued_again():
+    """Test that reruns only re-queue a song to raise its priority."""
+    release = threading.Event()
+    started = threading.Event()
+    fetched = []
+
+    def fetch(artist, title):
+        if title == "BLOCKER":
+            started.set()
+            release.wait(timeout=10)
+        fetched.append(title)
+        return f"http://art/{title}"
+
+    prefetcher = ArtworkPrefetcher(fetch)
+    prefetcher.request("A", "BLOCKER")
+    started.wait(timeout=10)
+    for _ in range(5):
+        for title in ("ROW 1", "ROW 2"):
+            prefetcher.request("A", title)
+    assert prefetcher._queue.qsize() == 2
+
+    for _ in range(3):
+        selected = prefetcher.request("A", "ROW 2", priority=SELECTED)
+    assert prefetcher._queue.qsize() == 3
+    release.set()
+
+    assert selected.result(timeout=10) == "http://art/ROW 2"
+    prefetcher.request("A", "ROW 1").result(timeout=10)
+    assert prefetcher.request("A", "ROW 2", priority=SELECTED) is selected
+    assert fetched == ["BLOCKER", "ROW 2", "ROW 1"]
@@ -0,0 +1,82 @@
+import duckdb
+import pytest
+from unittest.mock import patch
+import chart_db
+from config import config
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / "music.duckdb")
+    conn = duckdb.connect(path)
+    conn.execute("CREATE SCHEMA charts;")
+    conn.execute("""
+        CREATE TABLE charts.songs AS
+        SELECT * FROM (VALUES ('QUEEN', 'RADIO GA GA', 2)) AS t(artist, title, peak)
+    """)
+    conn.execute("CREATE VIEW charts.top_songs AS SELECT * FROM charts.songs")
+    conn.execute("""
+        CREATE MACRO charts.songs_by(name) AS TABLE
+        SELECT title FROM charts.songs WHERE artist = name
+    """)
+    conn.close()
+    return path
+
+
+@pytest.fixture
+def memory_mode(db_path):
+    with (
+        patch.object(config, "DUCKDB_PATH", db_path),
+        patch.object(config, "DUCKDB_IN_MEMORY", True),
+        patch.object(chart_db, "_memory_db", None),
+        patch.object(chart_db, "_memory_db_version", None),
+        patch.object(chart_db, "_memory_skipped_version", None),
+        patch.dict(chart_db.memory_stats, clear=True),
+    ):
+        yield
+
+
+def test_load_into_memory_copies_tables_views_and_macros(db_path):
+    """Test that the in-memory copy answers the same queries as the file."""
+    conn, stats = chart_db.load_into_memory(db_path)
+
+    assert conn.execute("SELECT * FROM charts.top_songs").fetchall() == [
+        ("QUEEN", "RADIO GA GA", 2)
+    ]
+    assert conn.execute("SELECT * FROM charts.songs_by('QUEEN')").fetchall() == [
+        ("RADIO GA GA",)
+    ]
+    assert stats["tables"] == 1
+    assert stats["rows"] == 1
+    assert stats["load_ms"] >= 0
+
+
+def test_connect_serves_from_memory(memory_mode):
+    """Test that memory mode hands out cursors on one shared copy."""
+    conn = chart_db.connect()
+
+    assert chart_db.get_db_mode() == "memory"
+    assert conn.execute("SELECT COUNT(*) FROM charts.songs").fetchone() == (1,)
+    assert chart_db.get_memory_db() is chart_db.get_memory_db()
+    assert chart_db.memory_stats["tables"] == 1
+
+
+def test_connect_falls_back_to_file_when_memory_is_tight(memory_mode):
+    """Test the fallback to a read-only file connection."""
+    with patch.object(chart_db, "available_memory_bytes", return_value=1):
+        conn = chart_db.connect()
+
+    assert chart_db.get_db_mode() == "file"
+    assert conn.execute("SELECT COUNT(*) FROM charts.songs").fetchone() == (1,)
+    with pytest.raises(duckdb.Error):
+        conn.execute("DROP TABLE charts.songs")
+
+
+def test_is_select_only():
+    """Test that only SELECT statements pass the guard."""
+    conn = duckdb.connect(":memory:")
+
+    assert chart_db.is_select_only(conn, "SELECT 1")
+    assert chart_db.is_select_only(conn, "WITH t AS (SELECT 1) SELECT * FROM t")
+    assert not chart_db.is_select_only(conn, "DROP TABLE charts.songs")
+    assert not chart_db.is_select_only(conn, "SELECT 1; DELETE FROM charts.songs")
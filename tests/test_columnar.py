@@ -0,0 +1,76 @@
+import duckdb
+from unittest.mock import patch
+from columnar import encode_json, fetch_columns, to_rows
+
+QUERY = """
+    SELECT * FROM (VALUES
+        (1, DATE '1985-07-13', 'QUEEN', 2::HUGEINT, 1.5),
+        (2, DATE '1985-07-20', NULL, 3::HUGEINT, NULL)
+    ) AS t(position, from_date, artist, total, share)
+"""
+
+EXPECTED_COLUMNS = ["position", "from_date", "artist", "total", "share"]
+EXPECTED_VALUES = [
+    [1, 2],
+    ["1985-07-13", "1985-07-20"],
+    ["QUEEN", None],
+    [2, 3],
+    [1.5, None],
+]
+
+
+def test_fetch_columns_from_arrow():
+    """Test column-major conversion with ISO dates and integer sums."""
+    columns, values = fetch_columns(duckdb.connect().execute(QUERY))
+
+    assert columns == EXPECTED_COLUMNS
+    assert values == EXPECTED_VALUES
+
+
+def test_fetch_columns_without_pyarrow():
+    """Test that the row-by-row fallback gives the same output."""
+    conn = duckdb.connect()
+    with patch.dict("sys.modules", {"pyarrow": None}):
+        columns, values = fetch_columns(conn.execute(QUERY))
+        _, no_rows = fetch_columns(conn.execute(QUERY + " WHERE false"))
+
+    assert columns == EXPECTED_COLUMNS
+    assert values == EXPECTED_VALUES
+    assert [type(v) for v in values[4]] == [float, type(None)]
+    assert no_rows == [[] for _ in EXPECTED_COLUMNS]
+
+
+def test_fetch_columns_formats_timestamps_like_isoformat():
+    """Test that Arrow keeps microseconds and UTC offsets, as isoformat() does."""
+    conn = duckdb.connect()
+    conn.execute("SET TimeZone = 'Europe/London'")
+    query = """
+        SELECT * FROM (VALUES
+            (TIMESTAMP '1985-07-13 12:00:05.25', TIMESTAMP_NS '1985-07-13 00:00:00'),
+            (TIMESTAMP '1969-12-31 23:59:59.5', NULL)
+        ) AS t(charted_at, charted_at_ns)
+    """
+    _, values = fetch_columns(conn.execute(query))
+    with patch.dict("sys.modules", {"pyarrow": None}):
+        _, by_row = fetch_columns(conn.execute(query))
+
+    assert values == [
+        ["1985-07-13T12:00:05.250000", "1969-12-31T23:59:59.500000"],
+        ["1985-07-13T00:00:00", None],
+    ]
+    assert values == by_row
+
+    _, zoned = fetch_columns(
+        conn.execute("SELECT TIMESTAMPTZ '1985-07-13 12:00:05.25+00' AS charted_at")
+    )
+    assert zoned == [["1985-07-13T13:00:05.250000+01:00"]]
+
+
+def test_to_rows_and_encode_json():
+    """Test the row format (None as empty string) and compact encoding."""
+    rows = to_rows(["artist", "peak"], [["QUEEN", None], [1, 2]])
+
+    assert rows == [{"artist": "QUEEN", "peak": 1}, {"artist": "", "peak": 2}]
+    assert encode_json({"values": [[1, None]]}) == b'{"values":[[1,null]]}'
+    with patch.dict("sys.modules", {"orjson": None}):
+        assert encode_json({"values": [[1, None]]}) == b'{"values":[[1,null]]}'
@@ -0,0 +1,68 @@
+import duckdb
+import pytest
+from generate_charts import generate, write_charts
+from init_duckdb import init_db
+
+
+@pytest.fixture(scope="module")
+def generated():
+    return generate(weeks=120, chart_size=40, seed=1)
+
+
+def test_generate_charts_shape(generated):
+    """Test that every week is a full chart ranked from 1 without gaps."""
+    charts, songs = generated
+    sizes = charts.groupby("week")["position"].agg(["count", "max"])
+    assert len(sizes) == 120
+    assert (sizes["count"] == sizes["max"]).all()
+    assert sizes["count"].max() == 40
+    assert not charts.duplicated(["week", "song"]).any()
+    assert not songs.duplicated(["artist", "title"]).any()
+
+
+def test_generate_charts_has_reentries_and_repeat_artists(generated):
+    """Test that runs break and restart, and some artists have many hits."""
+    charts, songs = generated
+    weeks = charts.sort_values("week").groupby("song")["week"]
+    reentries = (weeks.diff() > 1).groupby(charts["song"]).any()
+    assert reentries.sum() > 0
+    hits = songs[songs["song"].isin(charts["song"])].groupby("artist").size()
+    assert hits.max() >= 5
+    assert (hits == 1).sum() > len(hits) / 3
+
+
+@pytest.mark.parametrize("extension", ["tsv", "parquet"])
+def test_generated_charts_load_with_init_db(generated, tmp_path, extension):
+    """Test that both output formats build a database."""
+    charts, songs = generated
+    data_path = str(tmp_path / f"charts.{extension}")
+    db_path = str(tmp_path / "music.duckdb")
+    write_charts(charts, songs, data_path)
+
+    init_db(db_path, data_path)
+
+    conn = duckdb.connect(db_path, read_only=True)
+    raw_rows, weeks = conn.execute(
+        """
+        SELECT COUNT(*), COUNT(DISTINCT from_date)
+        FROM charts.uk_singles_prestreaming_raw
+        """
+    ).fetchone()
+    assert (raw_rows, weeks) == (len(charts), 120)
+    scored = conn.execute(
+        "SELECT COUNT(*) FROM charts.uk_singles_prestreaming_scored"
+    ).fetchone()[0]
+    assert scored == charts["song"].nunique()
+    conn.close()
+
+
+@pytest.mark.parametrize("extension", ["tsv", "parquet"])
+def test_write_charts_quotes_the_path(generated, tmp_path, extension):
+    """Test that a path with a quote in it is written as given."""
+    charts, songs = generated
+    data_path = tmp_path / f"o'brien's charts.{extension}"
+    write_charts(charts, songs, str(data_path))
+
+    reader = "read_parquet" if extension == "parquet" else "read_csv"
+    rows = duckdb.execute(f"SELECT COUNT(*) FROM {reader}(?)", [str(data_path)])
+    assert rows.fetchone()[0] == len(charts)
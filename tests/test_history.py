@@ -0,0 +1,63 @@
+import duckdb
+import pandas as pd
+import pytest
+from history import align_histories, fetch_histories, split_histories
+
+
+@pytest.fixture
+def conn():
+    conn = duckdb.connect()
+    conn.execute("CREATE SCHEMA charts;")
+    conn.execute("""
+        CREATE TABLE charts.uk_singles_prestreaming_raw AS
+        SELECT * FROM (VALUES
+            (DATE '1985-07-20', DATE '1985-07-26', 3, 'QUEEN', 'RADIO GA GA'),
+            (DATE '1985-07-13', DATE '1985-07-19', 1, 'QUEEN', 'RADIO GA GA'),
+            (DATE '1985-07-13', DATE '1985-07-19', 2, 'MADONNA', 'HOLIDAY'),
+            (DATE '1985-07-13', DATE '1985-07-19', 5, 'QUEEN', 'HOLIDAY')
+        ) AS t(from_date, to_date, position, artist, title)
+    """)
+    return conn
+
+
+def test_fetch_histories_loads_requested_songs_in_one_query(conn):
+    """Test that only the requested pairs are returned, ordered by date."""
+    songs = [("QUEEN", "RADIO GA GA"), ("MADONNA", "HOLIDAY"), ("QUEEN", "RADIO GA GA")]
+
+    histories = split_histories(fetch_histories(conn, songs))
+
+    assert set(histories) == {("QUEEN", "RADIO GA GA"), ("MADONNA", "HOLIDAY")}
+    queen = histories[("QUEEN", "RADIO GA GA")]
+    assert list(queen.columns) == ["from_date", "to_date", "position"]
+    assert queen["position"].tolist() == [1, 3]
+    assert histories[("MADONNA", "HOLIDAY")]["position"].tolist() == [2]
+
+
+def test_fetch_histories_with_no_songs(conn):
+    """Test that an empty request returns no histories."""
+    assert split_histories(fetch_histories(conn, [])) == {}
+
+
+def test_align_histories_by_debut_inserts_gaps():
+    """Test weeks-since-debut alignment and a break after a drop-out."""
+    histories = pd.DataFrame(
+        {
+            "artist": ["A", "A", "A", "B"],
+            "title": ["X", "X", "X", "Y"],
+            "from_date": ["1985-01-01", "1985-01-08", "1985-01-29", "1990-06-01"],
+            "to_date": ["1985-01-07", "1985-01-14", "1985-02-04", "1990-06-07"],
+            "position": [10, 4, 30, 1],
+        }
+    )
+
+    by_debut = align_histories(histories)
+    a = by_debut[by_debut["artist"] == "A"]
+    assert a["x"].tolist() == [0, 1, 2, 4]
+    assert a["position"].isna().tolist() == [False, False, True, False]
+    assert by_debut[by_debut["artist"] == "B"]["x"].tolist() == [0]
+
+    by_date = align_histories(histories, by="date")
+    assert str(by_date["x"].iloc[2].date()) == "1985-01-15"
+
+    with pytest.raises(ValueError):
+        align_histories(histories, by="peak")
@@ -0,0 +1,194 @@
+from datetime import date, timedelta
+import duckdb
+import pytest
+from init_duckdb import (
+    build_rollups,
+    build_runs,
+    build_score_index,
+    build_scored,
+    init_db,
+)
+
+
+# (from_date, position, artist, title, label)
+RAW_ROWS = [
+    ("1985-01-05", 1, "QUEEN", "SONG A", "EMI"),
+    ("1985-01-05", 2, "MADONNA", "SONG B", "SIRE"),
+    ("1985-01-12", 1, "MADONNA", "SONG B", "SIRE"),
+    ("1985-01-12", 2, "QUEEN", "SONG A", "EMI"),
+    ("1985-01-19", 1, "MADONNA", "SONG B", "SIRE"),
+    ("1985-01-19", 2, "QUEEN", "SONG C", "EMI"),
+    ("1991-03-02", 1, "QUEEN", "SONG D", "PARLOPHONE"),
+    ("1991-03-02", 2, "MADONNA", "SONG E", None),
+]
+
+
+@pytest.fixture
+def conn():
+    conn = duckdb.connect(":memory:")
+    conn.execute("CREATE SCHEMA charts;")
+    conn.execute("""
+        CREATE TABLE charts.uk_singles_prestreaming_raw (
+            id INTEGER,
+            from_date DATE,
+            to_date DATE,
+            position INTEGER,
+            artist VARCHAR,
+            title VARCHAR,
+            label VARCHAR
+        );
+    """)
+    conn.executemany(
+        """
+        INSERT INTO charts.uk_singles_prestreaming_raw
+        VALUES (?, ?, CAST(? AS DATE) + 6, ?, ?, ?, ?)
+        """,
+        [
+            (i, from_date, from_date, position, artist, title, label)
+            for i, (from_date, position, artist, title, label) in enumerate(RAW_ROWS)
+        ],
+    )
+    build_scored(conn)
+    yield conn
+    conn.close()
+
+
+def test_build_rollups_number_ones(conn):
+    """Test that each number one is dated by its first week at the top."""
+    build_rollups(conn)
+
+    rows = conn.execute("""
+        SELECT artist, title, year, decade, weeks_at_top
+        FROM charts.uk_singles_prestreaming_number_ones
+        ORDER BY first_week_at_top
+    """).fetchall()
+    assert rows == [
+        ("QUEEN", "SONG A", 1985, 1980, 1),
+        ("MADONNA", "SONG B", 1985, 1980, 2),
+        ("QUEEN", "SONG D", 1991, 1990, 1),
+    ]
+
+    decades = conn.execute("""
+        SELECT decade, number_ones, new_entries
+        FROM charts.uk_singles_prestreaming_decades
+        ORDER BY decade
+    """).fetchall()
+    assert decades == [(1980, 2, 3), (1990, 1, 2)]
+
+
+def test_build_rollups_artist_totals(conn):
+    """Test per-artist totals are derived from the scored table."""
+    build_rollups(conn)
+
+    row = conn.execute("""
+        SELECT songs_charted, number_ones, total_weeks, weeks_at_top, best_peak
+        FROM charts.uk_singles_prestreaming_artists
+        WHERE artist = 'QUEEN'
+    """).fetchone()
+    assert row == (3, 2, 4, 2, 1)
+
+
+def test_build_rollups_label_totals(conn):
+    """Test songs are credited to their first label and NULL labels skipped."""
+    build_rollups(conn)
+
+    rows = conn.execute("""
+        SELECT label, songs_charted, artists, number_ones
+        FROM charts.uk_singles_prestreaming_labels
+        ORDER BY label
+    """).fetchall()
+    assert rows == [
+        ("EMI", 2, 1, 1),
+        ("PARLOPHONE", 1, 1, 1),
+        ("SIRE", 1, 1, 1),
+    ]
+
+
+def test_build_runs_reentries_and_climbs(conn):
+    """Test run splitting on gaps, climbs within runs and rise to the top."""
+    conn.execute("DELETE FROM charts.chart_entries;")
+    conn.execute("""
+        INSERT INTO charts.chart_entries
+        SELECT 'uk_singles_prestreaming', i, from_date, from_date + 6, position,
+            'A', 'SONG', NULL
+        FROM (VALUES
+            (1, DATE '1990-01-06', 40),
+            (2, DATE '1990-01-13', 10),
+            (3, DATE '1990-01-20', 3),
+            (4, DATE '1990-01-27', 5),
+            (5, DATE '1990-03-03', 60),
+            (6, DATE '1990-03-10', 1),
+            (7, DATE '1990-06-02', 1)
+        ) AS t(i, from_date, position)
+    """)
+    build_runs(conn)
+
+    row = conn.execute("""
+        SELECT debut_position, runs, reentries, longest_run, biggest_climb,
+               weeks_to_peak, weeks_to_top
+        FROM charts.uk_singles_prestreaming_runs
+    """).fetchone()
+    # Runs: 4 weeks, 2 weeks, 1 week. The 60 -> 1 climb is the biggest; the
+    # drop from 5 to 60 across the gap is not a week-on-week move.
+    assert row == (40, 3, 2, 4, 59, 6, 6)
+
+
+def _write_tsv(path, rows):
+    """Writes rows like RAW_ROWS in the Postgres COPY format of the dump."""
+    with open(path, "w") as f:
+        for i, (from_date, position, artist, title, label) in enumerate(rows):
+            to_date = date.fromisoformat(from_date) + timedelta(days=6)
+            label = label or "\\N"
+            f.write(
+                f"{i}\t{from_date}\t{to_date}\t{position}\t{artist}\t{title}\t{label}\n"
+            )
+    return str(path)
+
+
+def test_init_db_keeps_charts_apart(tmp_path):
+    """Test that charts share the fact table but are built and reloaded apart."""
+    db_path = str(tmp_path / "music.duckdb")
+    singles = _write_tsv(tmp_path / "singles.tsv", RAW_ROWS)
+    albums = _write_tsv(
+        tmp_path / "albums.tsv",
+        [("2001-06-02", 1, "DIDO", "NO ANGEL", "CHEEKY")],
+    )
+    init_db(db_path, singles)
+    init_db(db_path, albums, chart_id="uk_albums", name="UK Albums")
+    # Loading a chart again replaces only that chart's rows
+    init_db(db_path, _write_tsv(tmp_path / "fewer.tsv", RAW_ROWS[:2]))
+
+    conn = duckdb.connect(db_path, read_only=True)
+    catalog = conn.execute("""
+        SELECT chart_id, name, first_week, weeks, entries
+        FROM charts.chart_catalog ORDER BY chart_id
+    """).fetchall()
+    assert [(c, n, str(w), weeks, e) for c, n, w, weeks, e in catalog] == [
+        ("uk_albums", "UK Albums", "2001-06-02", 1, 1),
+        ("uk_singles_prestreaming", "uk_singles_prestreaming", "1985-01-05", 1, 2),
+    ]
+    assert conn.execute(
+        "SELECT artist, title, weeks_at_top FROM charts.uk_albums_number_ones"
+    ).fetchall() == [("DIDO", "NO ANGEL", 1)]
+    assert conn.execute(
+        "SELECT count(*) FROM charts.uk_singles_prestreaming_scored"
+    ).fetchone() == (2,)
+    conn.close()
+
+
+def test_range_scores_match_scores_over_the_range(conn):
+    """Test that the prefix-sum macro scores only the weeks in the range."""
+    build_score_index(conn)
+
+    rows = conn.execute("""
+        SELECT * FROM charts.range_scores(
+            'uk_singles_prestreaming', DATE '1985-01-12', '1991-12-31'
+        )
+    """).fetchall()
+    assert rows == [
+        ("MADONNA", "SONG B", 200, 2, 2),
+        ("QUEEN", "SONG D", 100, 1, 1),
+        ("MADONNA", "SONG E", 50, 1, 0),
+        ("QUEEN", "SONG A", 50, 1, 0),
+        ("QUEEN", "SONG C", 50, 1, 0),
+    ]
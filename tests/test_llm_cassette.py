@@ -0,0 +1,99 @@
+import json
+import duckdb
+import pytest
+from unittest.mock import MagicMock
+from ai_client import get_sql_from_llm
+from bench_nl2sql import results_match, run, summarize
+from llm_cassette import Cassette, CassetteMiss
+
+
+def _real_client(*contents):
+    client = MagicMock()
+    responses = []
+    for content in contents:
+        response = MagicMock()
+        response.choices[0].message.content = content
+        responses.append(response)
+    client.chat.completions.create.side_effect = responses
+    return client
+
+
+def _validate(sql):
+    if "INVALID" in sql:
+        return False, "Syntax Error"
+    return True, None
+
+
+def test_record_then_replay_offline(tmp_path):
+    """Test that a recorded conversation, retries included, replays offline."""
+    path = str(tmp_path / "cassette.json")
+    real = _real_client("INVALID SQL", "<sql>SELECT 1</sql>")
+
+    recorder = Cassette(path, mode="record")
+    sql = get_sql_from_llm(
+        "question",
+        "schema",
+        10,
+        validation_callback=_validate,
+        client=recorder.client(real),
+    )
+    assert sql == "SELECT 1"
+    assert recorder.recorded == 2
+
+    # The first request was recorded before the retry feedback was appended
+    saved = json.load(open(path))["interactions"].values()
+    assert sorted(len(i["messages"]) for i in saved) == [2, 4]
+
+    player = Cassette(path)
+    sql = get_sql_from_llm(
+        "question", "schema", 10, validation_callback=_validate, client=player.client()
+    )
+    assert sql == "SELECT 1"
+    assert (player.calls, player.hits) == (2, 2)
+    assert real.chat.completions.create.call_count == 2
+
+
+def test_replay_miss_raises(tmp_path):
+    """Test that replaying an unrecorded request fails instead of calling out."""
+    player = Cassette(str(tmp_path / "empty.json"))
+    with pytest.raises(CassetteMiss):
+        get_sql_from_llm("question", "schema", 10, client=player.client())
+
+
+def test_results_match():
+    """Test matching by name or value, extra columns and row order."""
+    expected = (["artist", "weeks"], [("QUEEN", 9), ("ABBA", 5)])
+
+    # Extra column, an alias and a float count still match
+    actual = (["artist", "title", "n"], [("ABBA", "SOS", 5.0), ("QUEEN", "X", 9)])
+    assert results_match(expected, actual)
+    assert not results_match(expected, actual, ordered=True)
+    assert not results_match(expected, (["artist"], [("QUEEN",), ("ABBA",)]))
+    assert not results_match(expected, (["artist", "weeks"], [("QUEEN", 9)]))
+
+
+def test_run_reports_status_and_stages(tmp_path):
+    """Test the offline runner over a small golden set."""
+    conn = duckdb.connect()
+    conn.execute("CREATE TABLE songs AS SELECT * FROM (VALUES ('QUEEN', 9)) t(a, w)")
+    golden = [
+        {"question": "correct", "expected_sql": "SELECT a FROM songs"},
+        {"question": "wrong", "expected_sql": "SELECT w FROM songs"},
+        {"question": "missing", "expected_sql": "SELECT a FROM songs"},
+    ]
+    path = str(tmp_path / "cassette.json")
+    recorder = Cassette(path, mode="record")
+    real = _real_client(
+        "SELECT missing_col FROM songs", "SELECT a, w FROM songs", "SELECT 1"
+    )
+    run(golden[:2], recorder.client(real), conn, cassette=recorder)
+
+    player = Cassette(path)
+    results = run(golden, player.client(), conn, cassette=player)
+
+    assert [r["status"] for r in results] == ["correct", "wrong", "missing"]
+    assert results[0]["attempts"] == 2
+    assert results[0]["ms"]["validate"] > 0
+    summary = summarize(results)
+    assert summary["accuracy"] == 0.5
+    assert summary["missing"] == 1
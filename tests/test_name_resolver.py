@@ -0,0 +1,78 @@
+import duckdb
+import pytest
+from init_duckdb import build_trigram_index
+from name_resolver import resolve_name
+
+
+@pytest.fixture
+def conn():
+    conn = duckdb.connect(":memory:")
+    conn.execute("CREATE SCHEMA charts;")
+    conn.execute("""
+        CREATE TABLE charts.uk_singles_prestreaming_scored AS
+        SELECT * FROM (VALUES
+            ('QUEEN', 'BOHEMIAN RHAPSODY'),
+            ('QUEEN', 'RADIO GA GA'),
+            ('QUEEN LATIFAH', 'U.N.I.T.Y.'),
+            ('WHAM!', 'LAST CHRISTMAS'),
+            ('MADONNA', 'LIKE A PRAYER')
+        ) AS t(artist, title)
+    """)
+    build_trigram_index(conn)
+    yield conn
+    conn.close()
+
+
+def test_resolve_name_typo(conn):
+    """Test that a misspelled title resolves to the canonical one."""
+    matches = resolve_name(conn, "bohemian rapsody", kind="title")
+
+    assert matches[0][0] == "BOHEMIAN RHAPSODY"
+    assert 0.5 < matches[0][1] < 1.0
+
+
+def test_resolve_name_exact_match_scores_one(conn):
+    """Test that an exact match ranks first with similarity 1."""
+    matches = resolve_name(conn, "Queen", kind="artist")
+
+    assert matches[0] == ("QUEEN", 1.0)
+    assert matches[1][0] == "QUEEN LATIFAH"
+
+
+def test_resolve_name_ignores_punctuation(conn):
+    """Test that punctuation in stored names does not prevent a match."""
+    assert resolve_name(conn, "wham", kind="artist")[0] == ("WHAM!", 1.0)
+
+
+def test_resolve_name_threshold_and_empty(conn):
+    """Test that unrelated text and blank input return no candidates."""
+    assert resolve_name(conn, "zzzz", kind="artist") == []
+    assert resolve_name(conn, "   ", kind="artist") == []
+
+
+def test_resolve_name_invalid_kind(conn):
+    """Test that an unknown kind is rejected."""
+    with pytest.raises(ValueError):
+        resolve_name(conn, "Queen", kind="label")
+
+
+def test_resolve_name_per_chart():
+    """Test that names only resolve within the chart they charted on."""
+    conn = duckdb.connect(":memory:")
+    conn.execute("CREATE SCHEMA charts;")
+    conn.execute("""
+        CREATE TABLE charts.chart_scored AS
+        SELECT * FROM (VALUES
+            ('uk_singles_prestreaming', 'QUEEN', 'RADIO GA GA'),
+            ('uk_albums', 'QUEEN', 'THE WORKS'),
+            ('uk_albums', 'QUEENSRYCHE', 'EMPIRE')
+        ) AS t(chart_id, artist, title)
+    """)
+    build_trigram_index(conn)
+
+    assert resolve_name(conn, "radio ga ga", kind="title") == [("RADIO GA GA", 1.0)]
+    assert resolve_name(conn, "radio ga ga", kind="title", chart_id="uk_albums") == []
+    albums = resolve_name(conn, "queen", kind="artist", chart_id="uk_albums")
+    assert [name for name, _ in albums] == ["QUEEN", "QUEENSRYCHE"]
+    with pytest.raises(ValueError):
+        resolve_name(conn, "queen", chart_id="UK; DROP")
@@ -0,0 +1,81 @@
+import os
+import pandas as pd
+from result_store import ResultStore
+
+
+def _frame(rows):
+    return pd.DataFrame({"artist": ["QUEEN"] * rows, "position": range(rows)})
+
+
+def _store(tmp_path, **limits):
+    kwargs = {
+        "max_session_bytes": 10**9,
+        "max_total_bytes": 10**9,
+        "max_spill_bytes": 10**9,
+    }
+    kwargs.update(limits)
+    return ResultStore(str(tmp_path / "spill"), **kwargs)
+
+
+def test_round_trip_and_session_isolation(tmp_path):
+    """Test that results come back unchanged and only for their session."""
+    store = _store(tmp_path)
+    df = pd.DataFrame(
+        {"artist": ["QUEEN"], "from_date": [pd.Timestamp("1985-07-13").date()]}
+    )
+    result_id = store.put("s1", df)
+
+    pd.testing.assert_frame_equal(store.get("s1", result_id), df)
+    assert store.get("s2", result_id) is None
+    assert store.get("s1", "unknown") is None
+
+
+def test_session_cap_spills_least_recently_used(tmp_path):
+    """Test spilling to disk over the session cap and reading back."""
+    probe = _store(tmp_path)
+    probe.put("probe", _frame(1000))
+    one_result = probe.stats()["memory_bytes"]
+
+    store = _store(tmp_path, max_session_bytes=int(one_result * 1.5))
+    first = store.put("s1", _frame(1000))
+    second = store.put("s1", _frame(1000))
+
+    stats = store.stats("s1")
+    assert stats["in_memory"] == 1 and stats["spilled"] == 1
+    assert stats["session_memory_bytes"] <= one_result
+
+    pd.testing.assert_frame_equal(store.get("s1", first), _frame(1000))
+    assert store.stats()["reloads"] == 1
+    # Reading the first result back pushed the second one out instead
+    assert store.get("s1", second) is not None
+    assert store.stats()["spills"] == 2
+
+
+def test_global_cap_spills_other_sessions(tmp_path):
+    """Test that the global cap spills the oldest result of any session."""
+    probe = _store(tmp_path)
+    probe.put("probe", _frame(1000))
+    one_result = probe.stats()["memory_bytes"]
+
+    store = _store(tmp_path, max_total_bytes=int(one_result * 1.5))
+    store.put("s1", _frame(1000))
+    store.put("s2", _frame(1000))
+
+    assert store.stats("s1")["session_memory_bytes"] == 0
+    assert store.stats("s2")["session_memory_bytes"] == one_result
+
+
+def test_old_results_and_spill_files_are_dropped(tmp_path):
+    """Test the per-session result count and the spill size cap."""
+    store = _store(tmp_path, max_session_bytes=1, max_spill_bytes=1)
+    ids = [store.put("s1", _frame(10)) for _ in range(3)]
+
+    # Older results were spilled, then dropped to stay within the spill cap
+    assert [store.get("s1", rid) is None for rid in ids] == [True, True, False]
+    assert os.listdir(tmp_path / "spill" / "s1") == []
+
+    capped = _store(tmp_path)
+    capped.max_results_per_session = 2
+    ids = [capped.put("s1", _frame(10)) for _ in range(3)]
+    assert capped.get("s1", ids[0]) is None
+    assert capped.stats("s1")["session_results"] == 2
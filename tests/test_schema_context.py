@@ -0,0 +1,81 @@
+import duckdb
+import pytest
+from unittest.mock import Mock, patch
+from config import config
+from init_duckdb import build_rollups, build_scored
+from scoring import SCORINGS
+from schema_context import QUERY_KINDS, build_schema_context, get_schema_context
+
+
+@pytest.fixture
+def conn():
+    conn = duckdb.connect(":memory:")
+    conn.execute("CREATE SCHEMA charts;")
+    conn.execute("""
+        CREATE TABLE charts.uk_singles_prestreaming_raw AS
+        SELECT * FROM (VALUES
+            (1, DATE '1985-07-13', DATE '1985-07-19', 1, 'QUEEN', 'RADIO GA GA', 'EMI'),
+            (2, DATE '1985-07-20', DATE '1985-07-26', 3, 'QUEEN', 'RADIO GA GA', 'EMI'),
+            (3, DATE '1985-07-20', DATE '1985-07-26', 1, 'MADONNA', 'INTO THE GROOVE', 'SIRE'),
+            (4, DATE '1986-01-04', DATE '1986-01-10', 2, 'QUEEN', 'ONE VISION', NULL)
+        ) AS t(id, from_date, to_date, position, artist, title, label)
+    """)
+    build_scored(conn)
+    build_rollups(conn)
+    yield conn
+    conn.close()
+
+
+def test_context_has_real_types_and_value_stats(conn):
+    """Test that tables are described with their actual types and values."""
+    context = build_schema_context(conn, kinds=QUERY_KINDS)
+
+    assert "charts.uk_singles_prestreaming_raw" not in context
+    assert "Table: charts.uk_singles_prestreaming_scored (3 rows)" in context
+    assert (
+        "- peak_position (integer): Best position reached (1 is best). 1 to 2."
+        in context
+    )
+    assert (
+        "- first_charted (date): Date the song first entered the chart. "
+        "1985-07-13 to 1986-01-04." in context
+    )
+    assert (
+        "- artist (varchar): The name of the artist or band. "
+        "2 distinct, e.g. 'QUEEN', 'MADONNA'." in context
+    )
+    assert "Precomputed rollups." in context
+    # Not built in this database
+    assert "_runs" not in context
+    assert "fuzzy_match" not in context
+
+
+def test_context_is_cached_on_disk_by_db_version(conn, tmp_path):
+    """Test that a cached context is reused until the database changes."""
+    connect = Mock(side_effect=conn.cursor)
+
+    with patch.object(config, "SCHEMA_CACHE_PATH", str(tmp_path / "schema.json")):
+        first = get_schema_context(connect, "v1")
+        assert get_schema_context(connect, "v1") == first
+        assert connect.call_count == 1
+
+        conn.execute("DELETE FROM charts.chart_scored WHERE artist = 'MADONNA'")
+        assert get_schema_context(connect, "v1") == first
+        second = get_schema_context(connect, "v2")
+        assert connect.call_count == 2
+        assert "scored (2 rows)" in second
+
+
+def test_cached_context_is_rebuilt_when_descriptions_change(conn, tmp_path):
+    """Test that editing the descriptions in code invalidates the cache."""
+    connect = Mock(side_effect=conn.cursor)
+
+    with patch.object(config, "SCHEMA_CACHE_PATH", str(tmp_path / "schema.json")):
+        first = get_schema_context(connect, "v1")
+        with patch.dict(
+            "scoring.SCORINGS",
+            {"linear": {**SCORINGS["linear"], "description": "Reworded."}},
+        ):
+            second = get_schema_context(connect, "v1")
+        assert connect.call_count == 2
+        assert "Reworded." in second and "Reworded." not in first
@@ -0,0 +1,69 @@
+import duckdb
+import pytest
+from init_duckdb import build_score_index, build_week_index, ensure_chart_entries
+from score_index import ScoreIndex
+
+
+@pytest.fixture
+def index():
+    conn = duckdb.connect(":memory:")
+    conn.execute("CREATE SCHEMA charts;")
+    conn.execute("""
+        CREATE TABLE charts.uk_singles_prestreaming_raw AS
+        SELECT * FROM (VALUES
+            (1, DATE '1985-07-13', DATE '1985-07-19', 1, 'QUEEN', 'RADIO GA GA', 'EMI'),
+            (2, DATE '1985-07-13', DATE '1985-07-19', 2, 'WHAM', 'FREEDOM', 'EPIC'),
+            (3, DATE '1985-07-20', DATE '1985-07-26', 1, 'WHAM', 'FREEDOM', 'EPIC'),
+            (4, DATE '1985-07-20', DATE '1985-07-26', 4, 'QUEEN', 'RADIO GA GA', 'EMI'),
+            (5, DATE '1985-07-27', DATE '1985-08-02', 1, 'WHAM', 'FREEDOM', 'EPIC'),
+            (6, DATE '1990-03-03', DATE '1990-03-09', 2, 'QUEEN', 'RADIO GA GA', 'EMI'),
+            (7, DATE '1990-03-03', DATE '1990-03-09', 1, 'A-HA', 'TAKE ON ME', 'WB')
+        ) AS t(id, from_date, to_date, position, artist, title, label)
+    """)
+    ensure_chart_entries(conn)
+    build_week_index(conn)
+    build_score_index(conn)
+    yield ScoreIndex.from_connection(conn)
+    conn.close()
+
+
+def test_top_scores_only_weeks_in_range(index):
+    """Test that range scores are differences of the running totals."""
+    assert index.top("1985-07-20", "1990-12-31") == [
+        {
+            "artist": "WHAM",
+            "title": "FREEDOM",
+            "score": 200,
+            "weeks": 2,
+            "weeks_at_top": 2,
+        },
+        {
+            "artist": "A-HA",
+            "title": "TAKE ON ME",
+            "score": 100,
+            "weeks": 1,
+            "weeks_at_top": 1,
+        },
+        {
+            "artist": "QUEEN",
+            "title": "RADIO GA GA",
+            "score": 75,
+            "weeks": 2,
+            "weeks_at_top": 0,
+        },
+    ]
+    assert [e["title"] for e in index.top("1985-01-01", "1985-07-13")] == [
+        "RADIO GA GA",
+        "FREEDOM",
+    ]
+
+
+def test_top_limit_ties_and_empty_ranges(index):
+    """Test top-K selection, tie order and ranges without chart weeks."""
+    # FREEDOM and TAKE ON ME both score 100 in one week; ties go by artist
+    top = index.top("1985-07-27", "1990-12-31", limit=2)
+    assert [(e["artist"], e["score"]) for e in top] == [("A-HA", 100), ("WHAM", 100)]
+
+    assert index.top("1986-01-01", "1989-12-31") == []
+    assert index.week_range("1985-07-14", "1985-07-19") is None
+    assert index.stats()["songs"] == 3
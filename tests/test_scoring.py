@@ -0,0 +1,111 @@
+from concurrent.futures import ThreadPoolExecutor
+import duckdb
+import pytest
+from init_duckdb import ensure_chart_entries
+from scoring import ScoringEngine
+
+
+@pytest.fixture
+def db():
+    db = duckdb.connect(":memory:")
+    db.execute("CREATE SCHEMA charts;")
+    db.execute("""
+        CREATE TABLE charts.uk_singles_prestreaming_raw AS
+        SELECT * FROM (VALUES
+            (1, DATE '1985-07-13', DATE '1985-07-19', 1, 'QUEEN', 'RADIO GA GA', 'EMI'),
+            (2, DATE '1985-07-20', DATE '1985-07-26', 20, 'QUEEN', 'RADIO GA GA', 'EMI'),
+            (3, DATE '1985-07-20', DATE '1985-07-26', 2, 'WHAM', 'FREEDOM', 'EPIC'),
+            (4, DATE '1986-01-04', DATE '1986-01-10', 5, 'A-HA', 'TAKE ON ME', 'WB')
+        ) AS t(id, from_date, to_date, position, artist, title, label)
+    """)
+    ensure_chart_entries(db)
+    yield db
+    db.close()
+
+
+def test_rankings_under_each_scoring(db):
+    """Test that each scoring function ranks the songs by its own points."""
+    engine = ScoringEngine(db)
+
+    def ranking(scoring):
+        _, rows = engine.ranking(None, scoring)
+        return [(rank, title, score) for rank, _, title, score, *_ in rows]
+
+    assert ranking("inverse") == [
+        (1, "RADIO GA GA", 105.0),
+        (2, "FREEDOM", 50.0),
+        (3, "TAKE ON ME", 20.0),
+    ]
+    assert ranking("linear")[0] == (1, "RADIO GA GA", 181.0)
+    # Only top 10 weeks count
+    assert ranking("top10") == [
+        (1, "RADIO GA GA", 10.0),
+        (2, "FREEDOM", 9.0),
+        (3, "TAKE ON ME", 6.0),
+    ]
+    # Relative to songs that first charted the same year
+    assert ranking("era") == [
+        (1, "RADIO GA GA", 135.48),
+        (2, "TAKE ON ME", 100.0),
+        (3, "FREEDOM", 64.52),
+    ]
+    with pytest.raises(ValueError):
+        engine.ranking(None, "golden_oldies")
+
+
+def test_rankings_are_cached_and_least_used_evicted(db):
+    """Test that rankings are built once and the least used one is dropped."""
+    engine = ScoringEngine(db, max_tables=2)
+    cursor = db.cursor()
+
+    with engine.pinned("SELECT * FROM scores.uk_singles_prestreaming_linear"):
+        pass
+    engine.table(None, "linear")
+    engine.table(None, "top10")
+    assert cursor.execute(
+        "SELECT count(*) FROM scores.uk_singles_prestreaming_top10"
+    ).fetchone() == (3,)
+    assert engine.builds == 2
+
+    engine.table(None, "era")
+    assert engine.stats() == {
+        "tables": {
+            "uk_singles_prestreaming_linear": 2,
+            "uk_singles_prestreaming_era": 1,
+        },
+        "builds": 3,
+        "evictions": 1,
+        "pinned": {},
+    }
+    with pytest.raises(duckdb.CatalogException):
+        cursor.execute("SELECT * FROM scores.uk_singles_prestreaming_top10")
+
+
+def test_pinned_rankings_are_not_evicted(db):
+    """Test that rankings a query is running on are kept until it ends."""
+    engine = ScoringEngine(db, max_tables=1)
+    sql = "SELECT * FROM scores.uk_singles_prestreaming_linear"
+
+    with engine.pinned(sql):
+        engine.table(None, "top10")
+        assert db.cursor().execute(sql).fetchall()
+        assert engine.stats()["pinned"] == {"uk_singles_prestreaming_linear": 1}
+    assert engine.stats()["pinned"] == {}
+
+    engine.table(None, "era")
+    assert list(engine.stats()["tables"]) == ["uk_singles_prestreaming_era"]
+
+
+def test_concurrent_rankings_survive_eviction(db):
+    """Test that rankings read while others evict them never go missing."""
+    engine = ScoringEngine(db, max_tables=1)
+
+    def rank(scoring):
+        for _ in range(20):
+            columns, rows = engine.ranking(None, scoring, limit=1)
+            assert rows[0][columns.index("artist")] == "QUEEN"
+
+    with ThreadPoolExecutor(3) as pool:
+        for future in [pool.submit(rank, s) for s in ("linear", "top10", "inverse")]:
+            future.result()
+    assert engine.evictions > 0
@@ -0,0 +1,65 @@
+import multiprocessing
+from unittest.mock import patch
+from shared_cache import MISSING, SharedCache, normalize_question
+
+
+def _write_from_other_process(path):
+    SharedCache("sql", path=path).set("q", "SELECT 1")
+
+
+def test_sqlite_cache_is_shared_between_processes(tmp_path):
+    """Test that a value written by one process is read by another."""
+    path = str(tmp_path / "cache.sqlite")
+    process = multiprocessing.get_context("spawn").Process(
+        target=_write_from_other_process, args=(path,)
+    )
+    process.start()
+    process.join(timeout=30)
+
+    cache = SharedCache("sql", path=path)
+    assert cache.get("q") == "SELECT 1"
+    assert SharedCache("result", path=path).get("q") is MISSING
+
+
+def test_sqlite_cache_round_trips_none_and_expires(tmp_path):
+    """Test caching None (e.g. no artwork) and TTL expiry."""
+    cache = SharedCache("artwork", path=str(tmp_path / "cache.sqlite"))
+    cache.set("found", "http://x/front-500")
+    cache.set("not found", None)
+
+    assert cache.get("found") == "http://x/front-500"
+    assert cache.get("not found") is None
+    assert cache.get("never set") is MISSING
+
+    with patch("shared_cache.time.time", return_value=10**12):
+        assert cache.get("found") is MISSING
+    assert cache.stats() == {"backend": "sqlite", "hits": 2, "misses": 2}
+
+
+def test_sqlite_cache_prune_keeps_newest(tmp_path):
+    """Test that pruning drops the oldest entries beyond max_entries."""
+    cache = SharedCache("sql", max_entries=2, path=str(tmp_path / "cache.sqlite"))
+    for i in range(4):
+        cache.set(f"q{i}", i, ttl_seconds=100 + i)
+    cache.prune()
+
+    assert [cache.get(f"q{i}") for i in range(4)] == [MISSING, MISSING, 2, 3]
+
+
+def test_memory_cache_evicts_least_recently_used():
+    """Test the per-process fallback when no cache path is configured."""
+    cache = SharedCache("sql", max_entries=2, path="")
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("a") == 1
+    assert cache.get("b") is MISSING
+    assert cache.get("c") == 3
+
+
+def test_normalize_question():
+    """Test that trivial differences map to the same cache key."""
+    assert normalize_question("  Top 5 songs of  1985? ") == "top 5 songs of 1985"
+    assert normalize_question("TOP 5 SONGS OF 1985") == "top 5 songs of 1985"
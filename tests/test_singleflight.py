@@ -0,0 +1,90 @@
+import threading
+import time
+import pytest
+from singleflight import SingleFlight
+
+
+def _run_concurrently(n, target):
+    results = [None] * n
+    errors = [None] * n
+
+    def worker(i):
+        try:
+            results[i] = target()
+        except Exception as e:
+            errors[i] = e
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(n)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(timeout=10)
+    return results, errors
+
+
+def test_concurrent_duplicates_share_one_call():
+    """Test that concurrent calls with the same key run the function once."""
+    flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        started.set()
+        release.wait(timeout=10)
+        return {"sql": "SELECT 1"}
+
+    leader = threading.Thread(target=lambda: flight.do("q", slow))
+    leader.start()
+    started.wait(timeout=10)
+
+    results = []
+    followers = [
+        threading.Thread(target=lambda: results.append(flight.do("q", slow)))
+        for _ in range(5)
+    ]
+    for t in followers:
+        t.start()
+    while flight.coalesced < 5:
+        time.sleep(0.01)
+    release.set()
+    for t in followers + [leader]:
+        t.join(timeout=10)
+
+    assert len(calls) == 1
+    assert results == [{"sql": "SELECT 1"}] * 5
+    assert flight.stats() == {"calls": 1, "coalesced": 5}
+
+
+def test_errors_are_shared_with_waiters():
+    """Test that waiters get the leader's exception."""
+    flight = SingleFlight()
+    barrier = threading.Barrier(3, timeout=10)
+
+    def failing():
+        time.sleep(0.2)
+        raise RuntimeError("LLM unavailable")
+
+    def call():
+        barrier.wait()
+        return flight.do("q", failing)
+
+    _, errors = _run_concurrently(3, call)
+
+    assert all(isinstance(e, RuntimeError) for e in errors)
+    assert flight.calls + flight.coalesced == 3
+
+
+def test_different_keys_and_later_calls_run_separately():
+    """Test that keys are independent and released after completion."""
+    flight = SingleFlight()
+
+    assert flight.do("a", lambda: 1) == 1
+    assert flight.do("b", lambda: 2) == 2
+    assert flight.do("a", lambda: 3) == 3
+    assert flight.stats() == {"calls": 3, "coalesced": 0}
+
+    with pytest.raises(ValueError):
+        flight.do("a", int, "not a number")
+    assert flight.do("a", lambda: 4) == 4
@@ -0,0 +1,50 @@
+import duckdb
+from unittest.mock import patch
+import slow_query_log
+from config import config
+from slow_query_log import query_shape, record_if_slow, report
+
+
+def test_query_shape_strips_literals():
+    """Test that queries differing only in literals share a shape."""
+    a = query_shape(
+        "SELECT * FROM charts.t WHERE artist = 'QUEEN' AND year IN (1984, 1985)\nLIMIT 50;"
+    )
+    b = query_shape(
+        "select *  from charts.t where artist = 'ABBA' and year in (1976) limit 10"
+    )
+
+    assert a == b == "select * from charts.t where artist = ? and year in (?) limit ?"
+
+
+def test_slow_queries_are_profiled_and_ranked(tmp_path):
+    """Test that only slow queries are logged, with a plan, and ranked by total time."""
+    db_path = str(tmp_path / "music.duckdb")
+    conn = duckdb.connect(db_path)
+    conn.execute("CREATE TABLE songs AS SELECT range AS id FROM range(100)")
+    conn.close()
+
+    log_path = str(tmp_path / "slow.sqlite")
+    with (
+        patch.object(config, "DUCKDB_PATH", db_path),
+        patch.object(config, "SLOW_QUERY_LOG_PATH", log_path),
+        patch.object(config, "SLOW_QUERY_MS", 500),
+    ):
+        assert record_if_slow("fast", "SELECT 1", 10, 1) is None
+        futures = [
+            record_if_slow("few", "SELECT * FROM songs WHERE id < 5", 600, 5),
+            record_if_slow("more", "SELECT * FROM songs WHERE id < 50", 900, 50),
+            record_if_slow("count", "SELECT COUNT(*) FROM songs", 700, 1),
+        ]
+        for future in futures:
+            future.result(timeout=30)
+
+        entries = report(path=log_path)
+
+    assert [(e["shape"], e["count"], e["total_ms"]) for e in entries] == [
+        ("select * from songs where id < ?", 2, 1500),
+        ("select count(*) from songs", 1, 700),
+    ]
+    assert entries[0]["slowest_question"] == "more"
+    assert "Total Time" in entries[0]["slowest_plan"]
+    assert slow_query_log._pending == 0
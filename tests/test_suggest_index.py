@@ -0,0 +1,62 @@
+from unittest.mock import patch
+import suggest_index
+from suggest_index import SuggestIndex
+
+
+ROWS = [
+    ("artist", "QUEEN", None, 5000),
+    ("artist", "QUEEN LATIFAH", None, 300),
+    ("artist", "THE QUEENS", None, 100),
+    ("title", "QUEEN", "BOHEMIAN RHAPSODY", 2000),
+    ("title", "QUEEN", "RADIO GA GA", 800),
+    ("title", "MADONNA", "LIKE A PRAYER", 1500),
+    ("title", "PRINCE", "THE QUEEN OF THE NIGHT", 50),
+]
+
+
+def test_suggest_ranks_by_score():
+    """Test that matches on any word start are returned best score first."""
+    index = SuggestIndex(ROWS)
+
+    results = index.suggest("que")
+    assert [(r["artist"], r["title"]) for r in results] == [
+        ("QUEEN", None),
+        ("QUEEN LATIFAH", None),
+        ("THE QUEENS", None),
+        ("PRINCE", "THE QUEEN OF THE NIGHT"),
+    ]
+
+
+def test_suggest_matches_later_words_once():
+    """Test that a title matching under several keys is returned once."""
+    index = SuggestIndex(ROWS)
+
+    results = index.suggest("the")
+    assert [(r["artist"], r["title"]) for r in results] == [
+        ("THE QUEENS", None),
+        ("PRINCE", "THE QUEEN OF THE NIGHT"),
+    ]
+    assert index.suggest("rhap")[0]["title"] == "BOHEMIAN RHAPSODY"
+
+
+def test_suggest_normalizes_input_and_limit():
+    """Test case and whitespace insensitivity, the limit and empty input."""
+    index = SuggestIndex(ROWS)
+
+    assert index.suggest("  like   a ")[0]["title"] == "LIKE A PRAYER"
+    assert len(index.suggest("q", limit=2)) == 2
+    assert len(index.suggest("q", limit=-5)) == 1
+    assert index.suggest("   ") == []
+    assert index.suggest("zzz") == []
+
+
+def test_suggest_precomputed_prefixes_match_scan():
+    """Test that precomputed top lists agree with ranking on the fly."""
+    rows = [("title", f"ARTIST {i}", f"SONG {i}", i) for i in range(50)]
+    with patch.object(suggest_index, "SCAN_LIMIT", 4):
+        index = SuggestIndex(rows)
+        assert "SONG" in index.top
+
+        results = index.suggest("song", limit=5)
+        assert [r["score"] for r in results] == [49, 48, 47, 46, 45]
+        assert index.stats()["memory_bytes"] > 0
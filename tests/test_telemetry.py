@@ -0,0 +1,59 @@
+import threading
+import time
+from telemetry import Counter, Histogram, StageTimer, render_prometheus, stage
+
+
+def test_stage_records_into_active_timer():
+    """Test that stages sum per name and are only recorded while active."""
+    timer = StageTimer()
+    with stage("llm"):
+        pass
+    with timer.activate():
+        with stage("llm"):
+            time.sleep(0.01)
+        for _ in range(3):
+            with stage("validate"):
+                pass
+
+    totals = timer.totals()
+    assert list(totals) == ["llm", "validate"]
+    assert totals["llm"][0] >= 10 and totals["llm"][1] == 1
+    assert totals["validate"][1] == 3
+
+    header = timer.server_timing()
+    assert header.startswith("llm;dur=")
+    assert "validate;dur=" in header and 'desc="3x"' in header
+
+
+def test_timer_is_per_context():
+    """Test that a stage in another thread does not leak into this timer."""
+    timer = StageTimer()
+
+    def work():
+        with stage("execute"):
+            pass
+
+    with timer.activate():
+        worker = threading.Thread(target=work)
+        worker.start()
+        worker.join()
+    assert timer.totals() == {}
+
+
+def test_prometheus_rendering():
+    """Test counter and cumulative histogram output."""
+    counter = Counter("test_errors_total", "Errors.")
+    histogram = Histogram("test_seconds", "Latency.", buckets=(0.1, 1.0))
+    counter.inc(service="openai")
+    counter.inc(2, service="openai")
+    histogram.observe(0.05, stage="llm")
+    histogram.observe(0.5, stage="llm")
+    histogram.observe(5, stage="llm")
+
+    text = render_prometheus()
+    assert "# TYPE test_errors_total counter" in text
+    assert 'test_errors_total{service="openai"} 3' in text
+    assert 'test_seconds_bucket{stage="llm",le="0.1"} 1' in text
+    assert 'test_seconds_bucket{stage="llm",le="1.0"} 2' in text
+    assert 'test_seconds_bucket{stage="llm",le="+Inf"} 3' in text
+    assert 'test_seconds_count{stage="llm"} 3' in text
@@ -1,6 +1,6 @@
 import pandas as pd
 from unittest.mock import patch
-from ui_components import plot_song_chart
+from ui_components import plot_comparison, plot_song_chart
 
 
 def test_plot_song_chart_gap_logic():
@@ -51,3 +51,23 @@ def test_plot_song_chart_empty():
     with patch("ui_components.st.warning") as mock_warn:
         plot_song_chart(df, "Title")
         mock_warn.assert_called_once()
+
+
+def test_plot_comparison_uses_one_webgl_trace_per_song():
+    """Test that each song becomes a Scattergl trace with gaps kept."""
+    aligned = pd.DataFrame(
+        {
+            "artist": ["A", "A", "A", "B"],
+            "title": ["X", "X", "X", "Y"],
+            "x": [0, 1, 2, 0],
+            "position": [10.0, None, 4.0, 1.0],
+        }
+    )
+
+    with patch("ui_components.st.plotly_chart") as mock_plotly_chart:
+        plot_comparison(aligned)
+
+    fig = mock_plotly_chart.call_args[0][0]
+    assert [trace.type for trace in fig.data] == ["scattergl", "scattergl"]
+    assert [trace.name for trace in fig.data] == ["A - X", "B - Y"]
+    assert fig.data[0].connectgaps is False
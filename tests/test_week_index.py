@@ -0,0 +1,63 @@
+import duckdb
+import pytest
+from init_duckdb import build_week_index
+from week_index import WeekIndex
+
+
+@pytest.fixture
+def week_index():
+    conn = duckdb.connect(":memory:")
+    conn.execute("CREATE SCHEMA charts;")
+    conn.execute("""
+        CREATE TABLE charts.uk_singles_prestreaming_raw AS
+        SELECT * FROM (VALUES
+            (1, DATE '1985-07-06', DATE '1985-07-12', 1, 'A', 'ONE', 'EMI'),
+            (2, DATE '1985-07-06', DATE '1985-07-12', 2, 'B', 'TWO', NULL),
+            (3, DATE '1985-07-13', DATE '1985-07-19', 1, 'B', 'TWO', NULL),
+            (4, DATE '1985-07-13', DATE '1985-07-19', 2, 'A', 'ONE', 'EMI'),
+            (5, DATE '1985-07-13', DATE '1985-07-19', 3, 'C', 'THREE', 'SIRE'),
+            (6, DATE '1985-08-03', DATE '1985-08-09', 1, 'C', 'THREE', 'SIRE')
+        ) AS t(id, from_date, to_date, position, artist, title, label)
+        ORDER BY from_date, position
+    """)
+    build_week_index(conn)
+    index = WeekIndex.from_connection(conn)
+    conn.close()
+    return index
+
+
+def test_get_chart_mid_week(week_index):
+    """Test that a date inside a week resolves to that week's chart."""
+    chart = week_index.get_chart("1985-07-15")
+
+    assert chart["from_date"] == "1985-07-13"
+    assert chart["to_date"] == "1985-07-19"
+    assert [e["title"] for e in chart["entries"]] == ["TWO", "ONE", "THREE"]
+    assert chart["entries"][0] == {
+        "position": 1,
+        "artist": "B",
+        "title": "TWO",
+        "label": None,
+    }
+
+
+def test_get_chart_week_boundaries(week_index):
+    """Test the first and last day of a week both resolve to it."""
+    assert week_index.get_chart("1985-07-06")["from_date"] == "1985-07-06"
+    assert week_index.get_chart("1985-07-12")["from_date"] == "1985-07-06"
+    assert week_index.get_chart("1985-08-09")["from_date"] == "1985-08-03"
+
+
+def test_get_chart_limit(week_index):
+    """Test that the limit truncates the entries."""
+    chart = week_index.get_chart("1985-07-13", limit=2)
+    assert [e["position"] for e in chart["entries"]] == [1, 2]
+    chart = week_index.get_chart("1985-07-13", limit=-5)
+    assert [e["position"] for e in chart["entries"]] == [1]
+
+
+def test_get_chart_outside_weeks(week_index):
+    """Test that dates before, between and after chart weeks return None."""
+    assert week_index.get_chart("1985-07-01") is None
+    assert week_index.get_chart("1985-07-25") is None
+    assert week_index.get_chart("1985-08-10") is None
@@ -1,4 +1,5 @@
 import plotly.express as px
+import plotly.graph_objects as go
 import pandas as pd
 import streamlit as st
 
@@ -23,18 +24,36 @@ def render_metrics(peak_pos: int, weeks_on_chart: int, first_entry: str):
     )
 
 
-def render_artwork(artist: str, title: str, fetch_callback):
-    """Fetches and renders the artwork with a loading spinner."""
-    with st.spinner("Loading artwork..."):
-        artwork_url = fetch_callback(artist, title)
-        if artwork_url:
-            st.image(
-                artwork_url,
-                caption=f"{artist} - {title}",
-                use_container_width=True,
-            )
-        else:
-            st.info("No artwork found")
+def render_artwork(artist: str, title: str, artwork):
+    """
+    Renders the artwork once its background lookup (a Future of the URL)
+    finishes. Until then a placeholder is shown and _await_artwork polls the
+    lookup, so the rest of the page does not wait for MusicBrainz.
+    """
+    if not artwork.done():
+        st.caption("Loading artwork...")
+        _await_artwork(artwork)
+        return
+
+    artwork_url = None if artwork.exception() else artwork.result()
+    if artwork_url:
+        st.image(
+            artwork_url,
+            caption=f"{artist} - {title}",
+            use_container_width=True,
+        )
+    else:
+        st.info("No artwork found")
+
+
+@st.fragment(run_every=0.5)
+def _await_artwork(artwork):
+    # Only started while the lookup is pending. Once it finishes, the page
+    # reruns: that renders the artwork and does not start this fragment again,
+    # which stops the polling. A fragment-scoped rerun would not, as it cannot
+    # be requested from the full page run that first draws the placeholder.
+    if artwork.done():
+        st.rerun()
 
 
 def plot_song_chart(hist_df: pd.DataFrame, title: str) -> None:
@@ -103,3 +122,70 @@ def plot_song_chart(hist_df: pd.DataFrame, title: str) -> None:
     )
 
     st.plotly_chart(fig, use_container_width=True)
+
+
+def plot_comparison(aligned: pd.DataFrame, align: str = "debut") -> None:
+    """
+    Overlays many chart runs, as prepared by `history.align_histories`.
+
+    Uses WebGL (Scattergl) traces so that hundreds of runs stay interactive;
+    the legend is hidden when there are too many songs to read it.
+
+    Args:
+        aligned: DataFrame with 'artist', 'title', 'x' and 'position' columns.
+        align: "debut" (x is weeks since debut) or "date" (x is the chart date).
+    """
+    if aligned.empty:
+        st.warning("No history data available to compare.")
+        return
+
+    fig = go.Figure()
+    songs = aligned.groupby(["artist", "title"], sort=False)
+    for (artist, title), run in songs:
+        fig.add_trace(
+            go.Scattergl(
+                x=run["x"],
+                y=run["position"],
+                mode="lines",
+                name=f"{artist} - {title}",
+                connectgaps=False,
+                hovertemplate=f"{artist} - {title}<br>%{{x}}: #%{{y}}<extra></extra>",
+            )
+        )
+
+    # Reverse the y-axis so that 1 is at the top
+    fig.update_yaxes(autorange="reversed", title="Position")
+    fig.update_xaxes(title="Weeks since debut" if align == "debut" else "Chart date")
+    fig.update_layout(
+        template="plotly_dark",
+        paper_bgcolor="rgba(0,0,0,0)",
+        plot_bgcolor="rgba(0,0,0,0)",
+        showlegend=songs.ngroups <= 20,
+    )
+
+    st.plotly_chart(fig, use_container_width=True)
+
+
+def render_week_chart(chart: dict | None) -> None:
+    """
+    Renders a single chart week as returned by `WeekIndex.get_chart`.
+
+    Args:
+        chart: Dict with 'from_date', 'to_date' and 'entries', or None.
+    """
+    if chart is None:
+        st.info("No chart found for that week.")
+        return
+
+    st.caption(f"Week of {chart['from_date']} to {chart['to_date']}")
+    st.dataframe(
+        pd.DataFrame(chart["entries"]),
+        use_container_width=True,
+        column_config={
+            "position": st.column_config.NumberColumn("Rank", format="%d"),
+            "artist": "Artist",
+            "title": "Song Title",
+            "label": "Label",
+        },
+        hide_index=True,
+    )
@@ -0,0 +1,80 @@
+import bisect
+import datetime
+from chart_catalog import chart_table
+
+
+class WeekIndex:
+    """
+    In-memory index of every chart week.
+
+    Chart rows are held in (from_date, position) order, so each week is a
+    contiguous slice. `week_starts` is sorted, which lets a date be resolved
+    to its week with a binary search instead of a scan of the raw table.
+    """
+
+    def __init__(self, week_starts, week_ends, offsets, counts, rows):
+        self.week_starts = week_starts
+        self.week_ends = week_ends
+        self.offsets = offsets
+        self.counts = counts
+        # (position, artist, title, label) tuples
+        self.rows = rows
+
+    @classmethod
+    def from_connection(cls, conn, chart_id=None):
+        """
+        Loads the week index and the sorted chart rows of a chart (by default
+        config.DEFAULT_CHART) from DuckDB.
+        """
+        weeks = conn.execute(f"""
+            SELECT from_date, to_date, row_offset, entries
+            FROM {chart_table(chart_id, "weeks")}
+            ORDER BY from_date
+        """).fetchall()
+        rows = conn.execute(f"""
+            SELECT position, artist, title, label
+            FROM {chart_table(chart_id, "raw")}
+            ORDER BY from_date, position
+        """).fetchall()
+
+        week_starts = [w[0] for w in weeks]
+        week_ends = [w[1] for w in weeks]
+        offsets = [w[2] for w in weeks]
+        counts = [w[3] for w in weeks]
+        if weeks and offsets[-1] + counts[-1] != len(rows):
+            raise ValueError(
+                "Week index is out of date with the raw table. Re-run init_duckdb.py."
+            )
+        return cls(week_starts, week_ends, offsets, counts, rows)
+
+    def find_week(self, date):
+        """
+        Returns the index of the week containing `date`, or None if the date
+        falls outside every chart week.
+        """
+        if isinstance(date, str):
+            date = datetime.date.fromisoformat(date)
+        i = bisect.bisect_right(self.week_starts, date) - 1
+        if i < 0 or date > self.week_ends[i]:
+            return None
+        return i
+
+    def get_chart(self, date, limit=100):
+        """
+        Returns the chart for the week containing `date` as a dict with
+        `from_date`, `to_date` and `entries`, or None if there is no such week.
+        """
+        i = self.find_week(date)
+        if i is None:
+            return None
+
+        start = self.offsets[i]
+        end = start + min(self.counts[i], max(limit, 1))
+        return {
+            "from_date": self.week_starts[i].isoformat(),
+            "to_date": self.week_ends[i].isoformat(),
+            "entries": [
+                {"position": position, "artist": artist, "title": title, "label": label}
+                for position, artist, title, label in self.rows[start:end]
+            ],
+        }